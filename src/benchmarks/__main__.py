@@ -0,0 +1,141 @@
+import argparse
+import json
+import os
+import sys
+
+# Permite importar core/, input/ e utils/ ao rodar 'python -m benchmarks' de dentro de src/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.components import run_all, compare
+from benchmarks.synthetic import RESOLUTIONS
+
+def cmd_run(args):
+    resolutions = args.resolutions.split(",") if args.resolutions else list(RESOLUTIONS)
+    for res in resolutions:
+        if res not in RESOLUTIONS:
+            print(f"[ERRO] Resolução desconhecida: {res}. Opções: {', '.join(RESOLUTIONS)}")
+            return 2
+    data = run_all(resolutions, repeat=args.repeat, include_screen=not args.no_screen)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    print(f"[INFO] Resultados salvos em {args.output}")
+    return 0
+
+def cmd_compare(args):
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+
+    rows = compare(baseline, current, threshold=args.threshold)
+    regressions = 0
+    print(f"{'benchmark':<44} {'base ms':>10} {'atual ms':>10} {'razão':>7}")
+    for name, base_ms, cur_ms, ratio, regressed in rows:
+        flag = "  REGRESSÃO" if regressed else ""
+        print(f"{name:<44} {base_ms:>10.3f} {cur_ms:>10.3f} {ratio:>7.2f}{flag}")
+        regressions += regressed
+    print(f"[INFO] {len(rows)} benchmarks comparados, {regressions} regressões "
+          f"(limite +{args.threshold * 100:.0f}%).")
+    return 1 if regressions else 0
+
+def cmd_soak(args):
+    from benchmarks.soak import run_soak
+    result = run_soak(resets=args.resets, frames_per_reset=args.frames, width=args.width, height=args.height,
+                      max_rss_growth_mb=args.max_rss_growth, min_fps_ratio=args.min_fps_ratio)
+    print(f"{'reinícios':>10} {'RSS MB':>10} {'FPS':>8}")
+    for sample in result["samples"]:
+        print(f"{sample['resets']:>10} {sample['rss_mb']:>10.1f} {sample['fps']:>8.1f}")
+    status = "OK" if result["passed"] else "FALHOU"
+    print(f"[INFO] {result['resets']} reinícios, {result['frames']} frames: "
+          f"RSS {result['rss_growth_mb']:+.1f} MB, FPS final/inicial {result['fps_ratio']:.2f} -> {status}")
+    return 0 if result["passed"] else 1
+
+def cmd_alloc(args):
+    from benchmarks.alloc import run_alloc
+    result = run_alloc(frames=args.frames, warmup=args.warmup, width=args.width, height=args.height,
+                       max_peak_fraction=args.max_peak_fraction)
+    print(f"{'modo':<10} {'frames':>7} {'pico KB':>10} {'KB/frame':>10}")
+    for mode in ("pooled", "unpooled"):
+        r = result[mode]
+        print(f"{mode:<10} {r['frames']:>7} {r['peak_kb']:>10.1f} {r['net_kb_per_frame']:>10.3f}")
+    status = "OK" if result["passed"] else "FALHOU"
+    print(f"[INFO] Pico com pools: {result['pooled']['peak_kb']:.1f} KB "
+          f"(limite {args.max_peak_fraction * result['frame_kb']:.0f} KB = "
+          f"{args.max_peak_fraction:.0%} de um frame) -> {status}")
+    return 0 if result["passed"] else 1
+
+def cmd_hypotheses(args):
+    from benchmarks.hypotheses import run_hypotheses_check
+    speeds = [float(v) for v in args.speeds.split(",")]
+    result = run_hypotheses_check(speeds=speeds, cup_width=args.cup_width, seeds=args.seeds)
+    print(f"{'px/frame':>8} {'ruído':>6} {'troca':>6} {'acertos':>8} {'conf. mín':>10} {'us/update':>10}")
+    for row in result["rows"]:
+        print(f"{row['speed']:>8.1f} {row['noise']:>6.1f} {'sim' if row['swap'] else 'não':>6} "
+              f"{row['hits']:>4}/{row['runs']:<3} {row['min_confidence']:>10.2f} {row['us_per_update']:>10.0f}")
+    status = "OK" if result["passed"] else "FALHOU"
+    print(f"[INFO] Cruzamentos com e sem troca de rastreadores -> {status}")
+    return 0 if result["passed"] else 1
+
+def cmd_chunks(args):
+    from benchmarks.chunks import run_unknown_count_check
+    result = run_unknown_count_check(frames=args.frames, processes=args.processes, tracker_type=args.tracker)
+    status = "OK" if result["passed"] else "FALHOU"
+    print(f"[INFO] Total informado pelo container: {result['reported']}; {result['analyzed']} de "
+          f"{result['expected']} frames analisados em trechos"
+          f"{', em ordem' if result['consecutive'] else ', FORA DE ORDEM'} -> {status}")
+    return 0 if result["passed"] else 1
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Microbenchmarks dos componentes do Thimbles AI.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Executa os benchmarks e salva um baseline JSON.")
+    run.add_argument("--output", "-o", default="benchmark_results.json")
+    run.add_argument("--resolutions", "-r", help="Lista separada por vírgula (720p,1080p,1440p).")
+    run.add_argument("--repeat", "-n", type=int, default=30, help="Execuções medidas por benchmark.")
+    run.add_argument("--no-screen", action="store_true", help="Não mede ScreenVideoSource.")
+    run.set_defaults(func=cmd_run)
+
+    cmp_ = sub.add_parser("compare", help="Compara dois resultados e aponta regressões.")
+    cmp_.add_argument("baseline")
+    cmp_.add_argument("current")
+    cmp_.add_argument("--threshold", "-t", type=float, default=0.10,
+                      help="Aumento relativo tolerado na mediana (padrão 0.10 = 10%%).")
+    cmp_.set_defaults(func=cmd_compare)
+
+    soak = sub.add_parser("soak", help="Teste de longa duração: centenas de reinícios ('r') do loop ao vivo.")
+    soak.add_argument("--resets", type=int, default=300)
+    soak.add_argument("--frames", type=int, default=5, help="Frames rastreados entre reinícios.")
+    soak.add_argument("--width", type=int, default=320)
+    soak.add_argument("--height", type=int, default=180)
+    soak.add_argument("--max-rss-growth", type=float, default=25.0, help="Crescimento máximo de RSS (MB).")
+    soak.add_argument("--min-fps-ratio", type=float, default=0.7, help="FPS final mínimo relativo ao inicial.")
+    soak.set_defaults(func=cmd_soak)
+
+    alloc = sub.add_parser("alloc", help="Alocações por frame (tracemalloc) do loop estável após o aquecimento.")
+    alloc.add_argument("--frames", type=int, default=200, help="Frames medidos.")
+    alloc.add_argument("--warmup", type=int, default=30, help="Frames de aquecimento (não medidos).")
+    alloc.add_argument("--width", type=int, default=1280)
+    alloc.add_argument("--height", type=int, default=720)
+    alloc.add_argument("--max-peak-fraction", type=float, default=0.05,
+                       help="Pico máximo de memória alocada, relativo ao tamanho de um frame.")
+    alloc.set_defaults(func=cmd_alloc)
+
+    hyp = sub.add_parser("hypotheses", help="Identidade dos copos (CupHypotheses) em cruzamentos sintéticos.")
+    hyp.add_argument("--speeds", default="2,3,6,10", help="Velocidades dos copos (px/frame), separadas por vírgula.")
+    hyp.add_argument("--cup-width", type=int, default=40)
+    hyp.add_argument("--seeds", type=int, default=3, help="Execuções (ruído diferente) por cenário.")
+    hyp.set_defaults(func=cmd_hypotheses)
+
+    chunks = sub.add_parser("chunks", help="Análise em trechos de um vídeo sem total de frames no container.")
+    chunks.add_argument("--frames", type=int, default=180)
+    chunks.add_argument("--processes", type=int, default=2)
+    chunks.add_argument("--tracker", default="KCF")
+    chunks.set_defaults(func=cmd_chunks)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
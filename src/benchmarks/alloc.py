@@ -0,0 +1,72 @@
+import os
+import tempfile
+import tracemalloc
+
+from benchmarks.synthetic import write_video
+
+def _measure(video_path, frames, warmup, pooled):
+    """
+    Roda o trecho estável do loop (leitura do arquivo, detecção da bola por cor e frame
+    de exibição) e mede com tracemalloc as alocações depois do aquecimento.
+
+    Returns:
+        dict: peak_kb (pico acima do início da medição), net_kb_per_frame e frames medidos.
+    """
+    import main
+    from core.detector import Detector
+    from input.video_source import FileVideoSource
+    from utils.buffer_pool import FramePool
+
+    source = FileVideoSource(video_path, pool=FramePool() if pooled else None)
+    display_pool = FramePool() if pooled else None
+    detector = Detector()
+
+    def step():
+        frame = source.get_frame()
+        if frame is None:
+            return False
+        detector.detect_ball_automatically(frame)
+        scale_factor = 1280 / frame.shape[1] if frame.shape[1] > 1280 else 1.0
+        main.make_display_frame(frame, scale_factor, display_pool)
+        return True
+
+    try:
+        for _ in range(warmup):
+            step()
+        tracemalloc.start()
+        try:
+            base, _ = tracemalloc.get_traced_memory()
+            measured = 0
+            while measured < frames and step():
+                measured += 1
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    finally:
+        source.release()
+    return {
+        "frames": measured,
+        "peak_kb": (peak - base) / 1024,
+        "net_kb_per_frame": (current - base) / 1024 / max(1, measured),
+    }
+
+def run_alloc(frames=200, warmup=30, width=1280, height=720, max_peak_fraction=0.05):
+    """
+    Verifica que, depois do aquecimento, o loop estável com FramePool/ScratchBuffers
+    praticamente não aloca por frame: o pico de memória rastreada (tracemalloc, que
+    também vê os arrays do NumPy/OpenCV) deve ficar abaixo de 'max_peak_fraction' de
+    um frame e não deve haver crescimento líquido. O mesmo loop sem pools é medido
+    como referência (aloca pelo menos um frame por leitura).
+
+    Returns:
+        dict: 'pooled', 'unpooled', frame_kb e 'passed'.
+    """
+    frame_kb = width * height * 3 / 1024
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "alloc.avi")
+        write_video(path, width, height, frames=warmup + frames)
+        pooled = _measure(path, frames, warmup, pooled=True)
+        unpooled = _measure(path, frames, warmup, pooled=False)
+    passed = (pooled["frames"] > 0 and pooled["peak_kb"] <= max_peak_fraction * frame_kb
+              and pooled["net_kb_per_frame"] <= 1.0)
+    return {"pooled": pooled, "unpooled": unpooled, "frame_kb": frame_kb, "passed": passed}
@@ -0,0 +1,48 @@
+import os
+import tempfile
+
+import cv2
+import numpy as np
+
+from benchmarks.synthetic import render_frame
+
+def write_raw_mjpeg(path, width, height, frames, round_length=90):
+    """
+    Grava a cena sintética como MJPEG bruto (JPEGs concatenados, sem container):
+    o OpenCV não consegue informar o número de frames desse formato.
+    """
+    with open(path, "wb") as f:
+        for i in range(frames):
+            ok, data = cv2.imencode(".jpg", render_frame(width, height, i, round_length=round_length))
+            if not ok:
+                raise ValueError("Falha ao codificar o frame sintético.")
+            f.write(data.tobytes())
+    return path
+
+def run_unknown_count_check(frames=180, width=640, height=360, processes=2, tracker_type='KCF'):
+    """
+    Análise em trechos (offline.chunks) de um vídeo cujo container não informa o total de
+    frames (frame_count <= 0): o resultado deve cobrir todos os frames do arquivo, em ordem.
+
+    Returns:
+        dict: reported (total informado), expected, analyzed, consecutive e 'passed'.
+    """
+    from input.video_source import FileVideoSource
+    from offline.chunks import analyze_chunked
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_raw_mjpeg(os.path.join(tmp, "unknown_count.mjpeg"), width, height, frames)
+        source = FileVideoSource(path)
+        reported = source.frame_count
+        source.release()
+        log = analyze_chunked(path, processes=processes, tracker_type=tracker_type)
+
+    frame_index = log.to_arrays()["frame_index"]
+    consecutive = bool(len(frame_index) and frame_index[0] == 0 and np.all(np.diff(frame_index) == 1))
+    return {
+        "reported": reported,
+        "expected": frames,
+        "analyzed": len(frame_index),
+        "consecutive": consecutive,
+        "passed": reported <= 0 and len(frame_index) == frames and consecutive,
+    }
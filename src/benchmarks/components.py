@@ -0,0 +1,199 @@
+import os
+import platform
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.synthetic import RESOLUTIONS, render_frame, home_cup_bboxes, cup_area, write_video
+from core.analyzer import ThimblesAnalyzer
+from core.detector import Detector
+from core.tracker import TRACKER_TYPES, MultiObjectTracker
+from utils.visualizer import Visualizer
+
+def measure(fn, repeat=30, warmup=3, setup=None):
+    """
+    Mede o tempo de 'fn()' em 'repeat' execuções após 'warmup' execuções de aquecimento.
+    'setup()', se fornecido, roda antes de cada execução fora da medição.
+
+    Returns:
+        dict: Estatísticas em ms (median, mean, min, p95) e número de execuções.
+    """
+    for _ in range(warmup):
+        if setup: setup()
+        fn()
+    samples = []
+    for _ in range(repeat):
+        if setup: setup()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    samples.sort()
+    return {
+        "median_ms": samples[len(samples) // 2],
+        "mean_ms": sum(samples) / len(samples),
+        "min_ms": samples[0],
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "runs": len(samples),
+    }
+
+def bench_detector(frames, repeat):
+    """detect_ball_automatically e detect_cups_in_area em um frame com a bola visível."""
+    detector = Detector()
+    frame = frames[0]
+    h, w = frame.shape[:2]
+    area = cup_area(w, h)
+    avg_cup_area = float(np.mean([bw * bh for (_, _, bw, bh) in home_cup_bboxes(w, h)]))
+    return {
+        "detect_ball_automatically": measure(
+            lambda: detector.detect_ball_automatically(frame, max_area=avg_cup_area * 1.2), repeat),
+        "detect_cups_in_area": measure(lambda: detector.detect_cups_in_area(frame, area), repeat),
+    }
+
+def bench_trackers(frames, repeat):
+    """MultiObjectTracker.update com os 3 copos, para cada tipo de rastreador disponível."""
+    results = {}
+    h, w = frames[0].shape[:2]
+    for tracker_type in TRACKER_TYPES:
+        tracker = MultiObjectTracker(tracker_type=tracker_type)
+        try:
+            tracker.initialize(frames[0], home_cup_bboxes(w, h))
+        except AttributeError as e:
+            print(f"[AVISO] Rastreador {tracker_type} indisponível: {e}")
+            continue
+        position = [0]
+
+        def step():
+            position[0] = (position[0] + 1) % len(frames)
+            tracker.update(frames[position[0]])
+
+        results[f"tracker_update_{tracker_type}"] = measure(step, repeat)
+    return results
+
+def bench_analyzer(frames, repeat):
+    """ThimblesAnalyzer.update alternando bola visível e escondida."""
+    h, w = frames[0].shape[:2]
+    cups = home_cup_bboxes(w, h)
+    mx, my, mw, mh = cups[1]
+    ball = (mx + mw // 2 - 10, my + mh // 2 - 10, 20, 20)
+    analyzer = ThimblesAnalyzer(verbose=False)
+    analyzer.initialize(ball, cups)
+    toggle = [False]
+
+    def step():
+        toggle[0] = not toggle[0]
+        analyzer.update(ball if toggle[0] else None, cups)
+
+    return {"analyzer_update": measure(step, repeat * 10)}
+
+def bench_visualizer(frames, repeat):
+    """Visualizer.draw_tracking sobre uma cópia do frame (a cópia não é medida)."""
+    h, w = frames[0].shape[:2]
+    cups = home_cup_bboxes(w, h)
+    canvas = np.empty_like(frames[0])
+    visualizer = Visualizer()
+    return {
+        "draw_tracking": measure(
+            lambda: visualizer.draw_tracking(canvas, cups, (10, 10, 20, 20), 1, True),
+            repeat, setup=lambda: np.copyto(canvas, frames[0])),
+    }
+
+def bench_file_source(width, height, repeat, workdir):
+    """Leitura de FileVideoSource (decodificação MJPG), com e sem FramePool."""
+    from input.video_source import FileVideoSource
+    from utils.buffer_pool import FramePool
+
+    path = os.path.join(workdir, f"synthetic_{width}x{height}.avi")
+    if not os.path.exists(path):
+        write_video(path, width, height, frames=repeat + 10)
+
+    results = {}
+    for name, pool in (("file_source_read", None), ("file_source_read_pooled", FramePool())):
+        source = FileVideoSource(path, pool=pool)
+        results[name] = measure(source.get_frame, repeat)
+        source.release()
+    return results
+
+def bench_screen_source(width, height, repeat):
+    """Leitura de ScreenVideoSource (grab + BGRA->BGR). Requer um display (ex: Xvfb)."""
+    try:
+        from input.video_source import ScreenVideoSource
+        from utils.buffer_pool import FramePool
+        source = ScreenVideoSource(monitor_index=1, bbox=(0, 0, width, height), target_fps=None, pool=FramePool())
+        if source.get_frame() is None:
+            raise RuntimeError("captura retornou None")
+    except Exception as e:
+        print(f"[AVISO] ScreenVideoSource ignorado ({width}x{height}): {e}")
+        return {}
+    try:
+        return {"screen_source_read": measure(source.get_frame, repeat)}
+    finally:
+        source.release()
+
+def environment_info():
+    """Metadados do ambiente para acompanhar o baseline."""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def run_all(resolutions=None, repeat=30, include_screen=True, workdir=None):
+    """
+    Executa todos os benchmarks de componentes nas resoluções pedidas.
+
+    Returns:
+        dict: {"environment": {...}, "results": {"<benchmark>/<resolução>": stats}}
+    """
+    resolutions = resolutions or list(RESOLUTIONS)
+    if workdir is None:
+        with tempfile.TemporaryDirectory(prefix="thimbles_bench_") as tmp:
+            return run_all(resolutions, repeat, include_screen, workdir=tmp)
+    results = {}
+    for res_name in resolutions:
+        width, height = RESOLUTIONS[res_name]
+        print(f"[BENCH] {res_name} ({width}x{height})...")
+        # Sequência curta cobrindo bola visível e embaralhamento
+        frames = [render_frame(width, height, i) for i in range(0, 60, 3)]
+
+        groups = [
+            bench_detector(frames, repeat),
+            bench_trackers(frames, repeat),
+            bench_analyzer(frames, repeat),
+            bench_visualizer(frames, repeat),
+            bench_file_source(width, height, repeat, workdir),
+        ]
+        if include_screen:
+            groups.append(bench_screen_source(width, height, repeat))
+
+        for group in groups:
+            for name, stats in group.items():
+                results[f"{name}/{res_name}"] = stats
+                print(f"  {name:<28} mediana {stats['median_ms']:8.3f} ms")
+    return {"environment": environment_info(), "results": results}
+
+def compare(baseline, current, threshold=0.10):
+    """
+    Compara dois resultados de run_all() pela mediana.
+
+    Args:
+        threshold (float): Aumento relativo tolerado (0.10 = 10%).
+
+    Returns:
+        list: Tuplas (nome, mediana_base, mediana_atual, razão, regrediu) para os
+              benchmarks presentes nos dois resultados.
+    """
+    rows = []
+    for name, base_stats in sorted(baseline["results"].items()):
+        cur_stats = current["results"].get(name)
+        if cur_stats is None:
+            continue
+        base_ms, cur_ms = base_stats["median_ms"], cur_stats["median_ms"]
+        ratio = cur_ms / base_ms if base_ms > 0 else float("inf")
+        rows.append((name, base_ms, cur_ms, ratio, ratio > 1.0 + threshold))
+    return rows
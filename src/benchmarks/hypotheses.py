@@ -0,0 +1,69 @@
+import time
+
+import numpy as np
+
+from core.hypotheses import CupHypotheses
+
+def crossing_boxes(speed, cup_width=40, swap=False, noise=0.0, seed=0, distance=3.0):
+    """
+    Caixas dos rastreadores em um cruzamento: os copos 0 e 1 partem a 'distance' larguras
+    de distância, se cruzam no meio (caixas sobrepostas) e se afastam o mesmo tanto; o
+    copo 2 fica parado ao lado. Com 'swap', os rastreadores 0 e 1 trocam de copo quando
+    os copos se encontram (o que um rastreador barato faz numa oclusão).
+
+    Returns:
+        list: Caixas (x, y, w, h) por frame, uma por rastreador.
+    """
+    rng = np.random.default_rng(seed)
+    w = h = cup_width
+    half = distance * cup_width / 2.0
+    frames = int(np.ceil(2 * half / speed)) + 1
+    meet = frames // 2
+    y = 100.0
+    result = []
+    for t in range(frames):
+        offset = -half + speed * t
+        cups = [(200.0 + offset, y), (200.0 - offset, y), (200.0 + 4 * cup_width, y)]
+        if swap and t >= meet:
+            cups[0], cups[1] = cups[1], cups[0]
+        result.append([(x + rng.normal(0, noise), yy + rng.normal(0, noise), w, h) for x, yy in cups])
+    return result
+
+def run_crossing(speed, cup_width=40, swap=False, noise=0.0, seed=0):
+    """
+    Returns:
+        tuple: (copo seguido pelo rastreador 0 ao final, confiança, microssegundos por update)
+    """
+    frames = crossing_boxes(speed, cup_width, swap, noise, seed)
+    hypotheses = CupHypotheses(frames[0])
+    start = time.perf_counter()
+    for boxes in frames[1:]:
+        hypotheses.update(boxes)
+    elapsed = time.perf_counter() - start
+    cup = hypotheses.cup_of_slot(0)
+    confidence = float(hypotheses.slot_probabilities(cup)[0])
+    return cup, confidence, elapsed / max(1, len(frames) - 1) * 1e6
+
+def run_hypotheses_check(speeds=(2, 3, 6, 10), noises=(0.0, 1.0, 2.0), cup_width=40, seeds=3):
+    """
+    Verifica CupHypotheses em cruzamentos sintéticos: com troca dos rastreadores, o
+    rastreador 0 deve passar a seguir o copo 1; sem troca, deve continuar no copo 0.
+
+    Returns:
+        dict: Linhas (velocidade, ruído, troca, acertos, confiança mínima, us/update) e 'passed'.
+    """
+    rows = []
+    passed = True
+    for speed in speeds:
+        for noise in noises:
+            for swap in (True, False):
+                expected = 1 if swap else 0
+                results = [run_crossing(speed, cup_width, swap, noise, seed) for seed in range(seeds)]
+                hits = sum(cup == expected for cup, _, _ in results)
+                rows.append({
+                    "speed": speed, "noise": noise, "swap": swap, "hits": hits, "runs": seeds,
+                    "min_confidence": min(conf for _, conf, _ in results),
+                    "us_per_update": float(np.mean([us for _, _, us in results])),
+                })
+                passed &= hits == seeds
+    return {"rows": rows, "passed": passed}
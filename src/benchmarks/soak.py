@@ -0,0 +1,74 @@
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import SyntheticVideoSource
+
+def current_rss_mb():
+    """Memória residente atual do processo (MB). Usa /proc no Linux; senão o pico do processo."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024**2
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss é KB no Linux e bytes no macOS
+        return peak / 1024**2 if peak > 1 << 32 else peak / 1024
+
+def run_soak(resets=300, frames_per_reset=5, width=320, height=180, max_rss_growth_mb=25.0, min_fps_ratio=0.7):
+    """
+    Teste de longa duração do loop ao vivo (main._run_tracker): a cada 'frames_per_reset'
+    frames simula a tecla 'r', com recalibração automática dos copos, até 'resets' reinícios.
+
+    Compara a memória residente e os FPS da primeira janela (após o aquecimento) com os
+    da última: a memória deve ficar estável (crescimento <= max_rss_growth_mb) e os FPS
+    não devem cair abaixo de min_fps_ratio do início.
+
+    Returns:
+        dict: Amostras por janela, crescimento de RSS, razão de FPS e 'passed'.
+    """
+    import main
+
+    options = dict(main.DEFAULT_OPTIONS, no_window=True, auto=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        options["calibration_cache"] = os.path.join(tmp, "calibration.json")
+        source = SyntheticVideoSource(width, height)
+
+        window = max(1, resets // 10)
+        samples = []
+        counters = {"frames": 0, "resets": 0}
+        last = {"time": time.perf_counter(), "frames": 0}
+
+        def on_frame(frame_disp):
+            counters["frames"] += 1
+            if counters["frames"] % frames_per_reset:
+                return -1
+            if counters["resets"] >= resets:
+                return 27 # ESC
+            counters["resets"] += 1
+            if counters["resets"] % window == 0:
+                now = time.perf_counter()
+                fps = (counters["frames"] - last["frames"]) / (now - last["time"])
+                samples.append({"resets": counters["resets"], "rss_mb": current_rss_mb(), "fps": fps})
+                last.update(time=now, frames=counters["frames"])
+            return ord('r')
+
+        # Rastreador e mensagens do loop ao vivo sem poluir a saída do teste
+        with contextlib.redirect_stdout(io.StringIO()):
+            main._run_tracker(source, options, None, on_frame=on_frame)
+
+    # A primeira janela inclui o aquecimento (alocação dos buffers, caches do OpenCV)
+    base, final = samples[1] if len(samples) > 2 else samples[0], samples[-1]
+    growth = final["rss_mb"] - base["rss_mb"]
+    fps_ratio = final["fps"] / base["fps"] if base["fps"] else 0.0
+    return {
+        "resets": counters["resets"],
+        "frames": counters["frames"],
+        "samples": samples,
+        "rss_growth_mb": growth,
+        "fps_ratio": fps_ratio,
+        "passed": counters["resets"] >= resets and growth <= max_rss_growth_mb and fps_ratio >= min_fps_ratio,
+    }
@@ -0,0 +1,106 @@
+import cv2
+import numpy as np
+
+from input.video_source import VideoSource
+
+# Resoluções padrão dos benchmarks (largura, altura)
+RESOLUTIONS = {
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+}
+
+# Layout da cena relativo ao tamanho do frame
+CUP_Y = 0.42          # Topo dos copos (fração da altura)
+CUP_W = 0.09          # Largura de cada copo (fração da largura)
+CUP_H = 0.20          # Altura de cada copo (fração da altura)
+CUP_CENTERS_X = (0.30, 0.50, 0.70)
+BALL_R = 0.018        # Raio da bola (fração da altura)
+
+def home_cup_bboxes(width, height):
+    """Bboxes (x, y, w, h) dos 3 copos nas posições iniciais da cena sintética."""
+    cw, ch = int(CUP_W * width), int(CUP_H * height)
+    y = int(CUP_Y * height)
+    return [(int(cx * width) - cw // 2, y, cw, ch) for cx in CUP_CENTERS_X]
+
+def cup_area(width, height, margin=0.03):
+    """Área (x, y, w, h) que engloba os 3 copos, com margem."""
+    boxes = home_cup_bboxes(width, height)
+    x0 = boxes[0][0] - int(margin * width)
+    x1 = boxes[-1][0] + boxes[-1][2] + int(margin * width)
+    y0 = boxes[0][1] - int(margin * height)
+    y1 = boxes[0][1] + boxes[0][3] + int(margin * height)
+    return (x0, y0, x1 - x0, y1 - y0)
+
+def render_frame(width, height, frame_index, round_length=90, seed=0):
+    """
+    Gera um frame determinístico da cena: fundo com textura fixa, 3 copos e a bola vermelha.
+
+    Cada rodada tem 'round_length' frames: bola visível em frente ao copo do meio,
+    embaralhamento (copos oscilam horizontalmente) e revelação.
+
+    Returns:
+        numpy.ndarray: Frame BGR (height, width, 3).
+    """
+    rng = np.random.default_rng(seed)
+    # Textura de fundo pequena e ampliada: barata e idêntica entre execuções
+    noise = rng.integers(0, 40, size=(height // 16 + 1, width // 16 + 1, 3), dtype=np.uint8)
+    frame = cv2.resize(noise, (width, height), interpolation=cv2.INTER_LINEAR)
+    frame += np.array([30, 70, 20], dtype=np.uint8)
+
+    phase = frame_index % round_length
+    shuffle_start, shuffle_end = round_length // 3, 2 * round_length // 3
+    shuffling = shuffle_start <= phase < shuffle_end
+
+    for k, (x, y, w, h) in enumerate(home_cup_bboxes(width, height)):
+        dx = int(0.05 * width * np.sin(phase / 6.0 + 2.1 * k)) if shuffling else 0
+        cv2.rectangle(frame, (x + dx, y), (x + dx + w, y + h), (205, 205, 225), -1)
+        cv2.rectangle(frame, (x + dx, y), (x + dx + w, y + h), (90, 90, 110), max(1, width // 640))
+
+    if not shuffling:
+        mx, my, mw, mh = home_cup_bboxes(width, height)[1]
+        radius = max(4, int(BALL_R * height))
+        cv2.circle(frame, (mx + mw // 2, my + mh + radius + 2), radius, (0, 0, 255), -1)
+
+    return frame
+
+def write_video(path, width, height, frames=180, fps=30.0, round_length=90, seed=0):
+    """
+    Grava um vídeo sintético (MJPG) para os benchmarks das fontes de arquivo.
+
+    Returns:
+        str: O caminho gravado.
+    """
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+    if not writer.isOpened():
+        raise ValueError(f"Não foi possível criar o vídeo sintético: {path}")
+    for i in range(frames):
+        writer.write(render_frame(width, height, i, round_length=round_length, seed=seed))
+    writer.release()
+    return path
+
+class SyntheticVideoSource(VideoSource):
+    """
+    Fonte de vídeo que gera a cena sintética sob demanda, sem fim (ou até 'frames').
+    Usada pelos testes de longa duração, que precisam de mais frames do que vale gravar.
+    """
+    def __init__(self, width=640, height=360, frames=None, fps=30.0, round_length=90, seed=0):
+        self.width, self.height = width, height
+        self.frames = frames
+        self._fps = fps
+        self.round_length = round_length
+        self.seed = seed
+
+    def get_frame(self):
+        if self.frames is not None and self.frame_index + 1 >= self.frames:
+            return None
+        frame = render_frame(self.width, self.height, self.frame_index + 1, self.round_length, self.seed)
+        self._stamp()
+        return frame
+
+    def release(self):
+        pass
+
+    @property
+    def fps(self):
+        return self._fps
@@ -1,41 +1,126 @@
+from core.events import (GameEvent, BALL_ENTERED_CUP, BALL_LOST, BALL_REAPPEARED,
+                         PREDICTED_ENTRY, TARGET_CHANGED, ROUND_RESET)
+from core.hypotheses import CupHypotheses, MAX_CUPS_FOR_HYPOTHESES
+
+# Motivo das mudanças de alvo vindas das hipóteses de identidade dos copos
+HYPOTHESIS = "hypothesis"
+
 class ThimblesAnalyzer:
     """
     Gerencia a lógica do jogo: quem tem a bola, onde ela está, etc.
+
+    Mudanças de estado são publicadas como GameEvent no EventBus opcional,
+    com o índice e o timestamp de captura do frame que as originou.
+
+    Com 'use_hypotheses', a identidade dos copos não é tomada dos rastreadores ao pé
+    da letra: CupHypotheses mantém hipóteses ponderadas sobre trocas entre rastreadores
+    (cruzamentos, oclusões) e, com a bola escondida, o alvo segue o copo que a contém.
     """
-    def __init__(self):
+    def __init__(self, events=None, verbose=True, use_hypotheses=True):
+        """
+        Args:
+            events (EventBus): Barramento onde publicar os eventos de jogo (opcional).
+            verbose (bool): Se False, não imprime as mensagens de jogo no console.
+            use_hypotheses (bool): Rastreia a identidade dos copos com hipóteses ponderadas.
+        """
         self.ball_bbox = None
         self.last_ball_bbox = None
         self.cup_bboxes = []
         self.target_cup_index = -1 # Índice do copo que contém a bola
         self.is_ball_hidden = False
+        self.events = events
+        self.verbose = verbose
+        self.frame_index = None # Frame atual (para os eventos)
+        self.timestamp = None
+        self.use_hypotheses = use_hypotheses
+        self.hypotheses = None
+        self._ball_cup = None # Identidade (nas hipóteses) do copo com a bola
+
+    def _log(self, message):
+        if self.verbose:
+            print(message)
+
+    def _emit(self, kind, cup_index=-1, **data):
+        if self.events is not None:
+            self.events.publish(GameEvent(kind, self.frame_index, self.timestamp, cup_index, data))
+
+    def _set_target(self, index, reason):
+        """Atualiza o copo alvo, emitindo TARGET_CHANGED se ele mudou."""
+        if self.hypotheses is not None and reason != HYPOTHESIS:
+            self._ball_cup = self.hypotheses.cup_of_slot(index) if index != -1 else None
+        if index != self.target_cup_index:
+            previous = self.target_cup_index
+            self.target_cup_index = index
+            self._emit(TARGET_CHANGED, index, previous=previous, reason=reason)
+
+    def _set_frame(self, frame_index, timestamp):
+        if frame_index is not None:
+            self.frame_index = frame_index
+        if timestamp is not None:
+            self.timestamp = timestamp
+
+    def reset_round(self, frame_index=None, timestamp=None, cup_bboxes=None):
+        """
+        Sinaliza que os copos voltaram às posições iniciais (nova rodada).
+        Com 'cup_bboxes' (caixas dos rastreadores reiniciados), as hipóteses de identidade
+        voltam à certeza a partir delas.
+        """
+        self._set_frame(frame_index, timestamp)
+        if self.hypotheses is not None and cup_bboxes is not None:
+            self.hypotheses.reset(cup_bboxes)
+            self._ball_cup = self.target_cup_index if self.target_cup_index != -1 else None
+        self._emit(ROUND_RESET, self.target_cup_index)
 
-    def initialize(self, ball_bbox, cup_bboxes):
+    def _create_hypotheses(self, cup_bboxes):
+        self.hypotheses = None
+        self._ball_cup = None
+        if (self.use_hypotheses and 2 <= len(cup_bboxes) <= MAX_CUPS_FOR_HYPOTHESES
+                and all(box is not None for box in cup_bboxes)):
+            self.hypotheses = CupHypotheses(cup_bboxes)
+
+    @property
+    def target_confidence(self):
+        """Probabilidade (pelas hipóteses) de o alvo atual seguir o copo com a bola, ou None."""
+        if self.hypotheses is None or self._ball_cup is None or self.target_cup_index == -1:
+            return None
+        return float(self.hypotheses.slot_probabilities(self._ball_cup)[self.target_cup_index])
+
+    def initialize(self, ball_bbox, cup_bboxes, frame_index=None, timestamp=None):
         """
         Configura o estado inicial do jogo.
         
         Args:
             ball_bbox: (x, y, w, h) da bola. Pode ser None se não detectada.
             cup_bboxes: Lista de (x, y, w, h) dos copos.
+            frame_index: Índice do frame atual (opcional, usado nos eventos).
+            timestamp: Timestamp de captura do frame atual (opcional, usado nos eventos).
         """
+        self._set_frame(frame_index, timestamp)
         self.ball_bbox = ball_bbox
         self.last_ball_bbox = ball_bbox
         self.cup_bboxes = cup_bboxes
+        self._create_hypotheses(cup_bboxes)
         
         # Tenta associar a bola a um copo inicialmente
         if self.ball_bbox:
             self._assign_ball_to_cup()
         else:
-            print("[WARN] Bola não detectada na inicialização. Selecione o copo que contém a bola se necessário.")
+            self._log("[WARN] Bola não detectada na inicialização. Selecione o copo que contém a bola se necessário.")
 
-    def update(self, ball_bbox, cup_bboxes):
+    def update(self, ball_bbox, cup_bboxes, frame_index=None, timestamp=None):
         """
         Atualiza o estado do jogo baseado nos novos rastreamentos.
         
         Args:
             ball_bbox: Nova posição da bola (ou None).
             cup_bboxes: Novas posições dos copos.
+            frame_index: Índice do frame atual (opcional, usado nos eventos).
+            timestamp: Timestamp de captura do frame atual (opcional, usado nos eventos).
         """
+        self._set_frame(frame_index, timestamp)
         self.cup_bboxes = cup_bboxes
+        if self.hypotheses is not None:
+            self.hypotheses.update(cup_bboxes)
         
         if ball_bbox is not None:
             # Se a bola reapareceu longe do copo alvo anterior, pode ser um novo jogo
@@ -44,7 +129,8 @@ class ThimblesAnalyzer:
                 # Verifica se a bola está DENTRO do copo alvo atual
                 if not self._is_ball_in_cup(ball_bbox, self.cup_bboxes[self.target_cup_index]):
                     # Se reapareceu FORA do copo alvo, reseta ou reavalia
-                    print("[GAME] Bola reapareceu fora do copo alvo. Reavaliando...")
+                    self._log("[GAME] Bola reapareceu fora do copo alvo. Reavaliando...")
+                    self._emit(BALL_REAPPEARED, self.target_cup_index, bbox=list(ball_bbox))
                     # Opcional: self.target_cup_index = -1 
             
             self.ball_bbox = ball_bbox
@@ -55,11 +141,24 @@ class ThimblesAnalyzer:
         else:
             # Se a bola acabou de sumir (estava visível antes)
             if not self.is_ball_hidden:
+                 self._emit(BALL_LOST, self.target_cup_index,
+                            last_bbox=list(self.last_ball_bbox) if self.last_ball_bbox else None)
                  self._predict_entry_on_loss()
             
             self.is_ball_hidden = True
-            # Se a bola está escondida, assumimos que ela continua no mesmo copo (target_cup_index)
-            # O rastreador de copos cuida do movimento do copo.
+            # Se a bola está escondida, ela continua no mesmo copo: o alvo é o rastreador
+            # que mais provavelmente segue esse copo (os rastreadores podem ter trocado).
+            self._follow_ball_cup()
+
+    def _follow_ball_cup(self):
+        if self.hypotheses is None or self._ball_cup is None:
+            return
+        probs = self.hypotheses.slot_probabilities(self._ball_cup)
+        slot = int(probs.argmax())
+        if slot != self.target_cup_index:
+            self._log(f"[GAME] Troca de rastreadores detectada: bola segue no copo #{slot+1} "
+                      f"(confiança {probs[slot]:.0%}).")
+            self._set_target(slot, HYPOTHESIS)
 
     def _is_ball_in_cup(self, ball_box, cup_box):
         if not ball_box or not cup_box: return False
@@ -104,10 +203,11 @@ class ThimblesAnalyzer:
              
              # Limite bem generoso para garantir que capture
              if min_dist < cw * 3.5: 
-                 print(f"[GAME] Bola perdida perto do copo #{closest_idx+1}. Assumindo entrada.")
-                 self.target_cup_index = closest_idx
+                 self._log(f"[GAME] Bola perdida perto do copo #{closest_idx+1}. Assumindo entrada.")
+                 self._emit(PREDICTED_ENTRY, closest_idx, distance=float(min_dist))
+                 self._set_target(closest_idx, PREDICTED_ENTRY)
              else:
-                 print(f"[DEBUG] Bola perdida longe dos copos (dist={min_dist:.1f}, cw={cw}). Nenhum alvo.")
+                 self._log(f"[DEBUG] Bola perdida longe dos copos (dist={min_dist:.1f}, cw={cw}). Nenhum alvo.")
 
     def _assign_ball_to_cup(self):
         """
@@ -131,8 +231,9 @@ class ThimblesAnalyzer:
             
             if (cx - margin <= b_center_x <= cx + cw + margin) and (cy - margin <= b_center_y <= cy + ch + margin):
                 if self.target_cup_index != i:
-                    print(f"[GAME] A bola entrou no copo #{i+1}")
-                self.target_cup_index = i
+                    self._log(f"[GAME] A bola entrou no copo #{i+1}")
+                    self._emit(BALL_ENTERED_CUP, i, bbox=list(self.ball_bbox))
+                self._set_target(i, BALL_ENTERED_CUP)
                 return
         
         # Se a bola está visível e NÃO está dentro de nenhum copo (nem perto), 
@@ -164,5 +265,5 @@ class ThimblesAnalyzer:
         Força a definição de qual copo tem a bola (útil se a detecção automática falhar).
         """
         if 0 <= index < len(self.cup_bboxes):
-            self.target_cup_index = index
-            print(f"[GAME] Alvo definido manualmente: Copo #{index+1}")
+            self._set_target(index, "manual")
+            self._log(f"[GAME] Alvo definido manualmente: Copo #{index+1}")
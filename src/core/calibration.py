@@ -0,0 +1,216 @@
+import itertools
+import json
+import os
+
+import cv2
+import numpy as np
+
+from core.detector import cup_contours
+
+def _to_small_gray(frame, scale):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if scale != 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return gray
+
+def _largest_component_bbox(mask, min_fraction):
+    """Bbox (x, y, w, h) do maior componente conexo da máscara, ou None se pequeno demais."""
+    count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    if count <= 1:
+        return None
+    areas = stats[1:, cv2.CC_STAT_AREA]
+    best = 1 + int(np.argmax(areas))
+    x, y, w, h = stats[best, :4]
+    if w * h < min_fraction * mask.shape[0] * mask.shape[1]:
+        return None
+    return int(x), int(y), int(w), int(h)
+
+def find_game_area(frames, work_width=480, motion_threshold=8, min_fraction=0.02):
+    """
+    Estima a área do jogo na tela a partir de alguns frames consecutivos.
+
+    Combina a energia de movimento (diferença absoluta acumulada entre frames), que
+    indica onde o jogo está, com o layout de bordas, que delimita a região de conteúdo
+    em volta do movimento (o canvas do jogo). Sem movimento, usa a maior região de
+    conteúdo. A busca é feita em uma versão reduzida (largura 'work_width').
+
+    Args:
+        frames (list): Frames BGR do mesmo tamanho (ao menos 1).
+
+    Returns:
+        tuple: (x, y, w, h) em coordenadas do frame, ou None se nada foi encontrado.
+    """
+    if not frames:
+        return None
+    h, w = frames[0].shape[:2]
+    scale = min(1.0, work_width / w)
+    grays = [_to_small_gray(f, scale) for f in frames]
+
+    motion_box = None
+    if len(grays) > 1:
+        energy = np.zeros(grays[0].shape, dtype=np.int32)
+        for prev, curr in zip(grays, grays[1:]):
+            energy += cv2.absdiff(curr, prev)
+        motion = (energy > motion_threshold).astype(np.uint8) * 255
+        # Fecha buracos: o movimento do jogo costuma ser espalhado, não contínuo
+        motion = cv2.morphologyEx(motion, cv2.MORPH_CLOSE, np.ones((9, 9), np.uint8), iterations=2)
+        motion_box = _largest_component_bbox(motion, min_fraction / 10)
+
+    # Região de conteúdo: bordas (inclusive fracas) unidas por dilatação
+    edges = cv2.Canny(grays[-1], 20, 60)
+    content = cv2.dilate(edges, np.ones((7, 7), np.uint8), iterations=2)
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(content, connectivity=8)
+
+    def tight_bbox(label):
+        # Bbox justa das bordas do componente (a dilatação infla a região)
+        return cv2.boundingRect(cv2.findNonZero(np.where(labels == label, edges, 0)))
+
+    bbox = motion_box
+    if count > 1 and motion_box is not None:
+        # Componente de conteúdo que mais se sobrepõe ao movimento
+        mx, my, mw, mh = motion_box
+        overlap = np.bincount(labels[my:my+mh, mx:mx+mw].ravel(), minlength=count)
+        overlap[0] = 0
+        best = int(np.argmax(overlap))
+        if overlap[best] > 0:
+            bx, by, bw, bh = tight_bbox(best)
+            # União com o movimento (o conteúdo pode não cobrir tudo que se move)
+            x0, y0 = min(bx, mx), min(by, my)
+            x1, y1 = max(bx + bw, mx + mw), max(by + bh, my + mh)
+            bbox = (x0, y0, x1 - x0, y1 - y0)
+    elif count > 1:
+        bbox = tight_bbox(1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA])))
+
+    if bbox is None or bbox[2] * bbox[3] < min_fraction * grays[0].size:
+        return None
+    x, y, bw, bh = (int(round(v / scale)) for v in bbox)
+    return (x, y, min(bw, w - x), min(bh, h - y))
+
+def _cup_candidates(frame, area, max_candidates=20):
+    """
+    Bboxes candidatas a copo (mesmo pré-processamento do Detector), com um filtro de
+    tamanho mais largo: a área ainda não está recortada em volta dos copos.
+    """
+    ax, ay, aw, ah = area
+    contours = cup_contours(frame, area)
+
+    min_area = aw * ah * 0.002
+    max_area = aw * ah * 0.3
+    boxes = []
+    for cnt in contours:
+        x, y, w, h = cv2.boundingRect(cnt)
+        if min_area < w * h < max_area:
+            boxes.append((x + ax, y + ay, w, h))
+    boxes.sort(key=lambda b: b[2] * b[3], reverse=True)
+    return boxes[:max_candidates]
+
+def _triple_score(triple):
+    """
+    Pontuação de um trio de bboxes como "3 copos lado a lado" (maior é melhor; None = inválido).
+    Exige tamanhos parecidos, mesma altura na tela, sem sobreposição e espaçamento regular.
+    """
+    boxes = sorted(triple, key=lambda b: b[0])
+    widths = np.array([b[2] for b in boxes], dtype=float)
+    heights = np.array([b[3] for b in boxes], dtype=float)
+    centers_x = np.array([b[0] + b[2] / 2 for b in boxes])
+    centers_y = np.array([b[1] + b[3] / 2 for b in boxes])
+
+    if widths.max() > 1.3 * widths.min() or heights.max() > 1.3 * heights.min():
+        return None
+    if np.ptp(centers_y) > 0.3 * heights.mean():
+        return None
+    for left, right in zip(boxes, boxes[1:]):
+        if left[0] + left[2] > right[0]:
+            return None
+    gaps = np.diff(centers_x)
+    if gaps.max() > 1.35 * gaps.min():
+        return None
+
+    uniformity = 1.0 - (np.ptp(widths) / widths.mean() + np.ptp(heights) / heights.mean()) / 2
+    return float(widths.mean() * heights.mean() * uniformity)
+
+def find_cup_region(frame, game_area=None, margin=0.15):
+    """
+    Procura a região dos 3 copos: o trio de contornos mais parecido com copos alinhados.
+
+    Args:
+        frame: Frame BGR.
+        game_area (tuple): (x, y, w, h) onde procurar. Se None, usa o frame inteiro.
+        margin (float): Margem adicionada em volta do trio (fração do tamanho médio do copo).
+
+    Returns:
+        tuple: (x, y, w, h) para Detector.detect_cups_in_area, ou None se não encontrou.
+    """
+    h, w = frame.shape[:2]
+    area = game_area or (0, 0, w, h)
+    candidates = _cup_candidates(frame, area)
+
+    best, best_score = None, 0.0
+    for triple in itertools.combinations(candidates, 3):
+        score = _triple_score(triple)
+        if score is not None and score > best_score:
+            best, best_score = triple, score
+    if best is None:
+        return None
+
+    mean_w = sum(b[2] for b in best) / 3
+    mean_h = sum(b[3] for b in best) / 3
+    x0 = max(0, int(min(b[0] for b in best) - margin * mean_w))
+    y0 = max(0, int(min(b[1] for b in best) - margin * mean_h))
+    x1 = min(w, int(max(b[0] + b[2] for b in best) + margin * mean_w))
+    y1 = min(h, int(max(b[1] + b[3] for b in best) + margin * mean_h))
+    return (x0, y0, x1 - x0, y1 - y0)
+
+class CalibrationCache:
+    """
+    Guarda áreas calibradas (jogo e copos) por geometria de captura em um arquivo JSON,
+    para que reinícios com a mesma janela não precisem recalibrar. Sem geometria de tela
+    (geometry None: arquivos de vídeo) não há cache — gravações diferentes com a mesma
+    resolução não compartilham a área dos copos.
+    """
+    def __init__(self, path=None):
+        if path is None:
+            from offline.cache import default_cache_dir
+            path = os.path.join(default_cache_dir(), "calibration.json")
+        self.path = path
+        self._data = None
+
+    @staticmethod
+    def key(kind, geometry):
+        """Chave de uma área ('game' ou 'cups') para a geometria (x, y, w, h) da captura."""
+        return f"{kind}:" + ",".join(str(int(v)) for v in geometry)
+
+    def _load(self):
+        if self._data is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
+
+    def get(self, kind, geometry):
+        if geometry is None:
+            return None
+        value = self._load().get(self.key(kind, geometry))
+        return tuple(value) if value else None
+
+    def put(self, kind, geometry, bbox):
+        if geometry is None:
+            return
+        data = self._load()
+        data[self.key(kind, geometry)] = [int(v) for v in bbox]
+        self._save()
+
+    def invalidate(self, kind, geometry):
+        if geometry is None:
+            return
+        if self._load().pop(self.key(kind, geometry), None) is not None:
+            self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,105 @@
+class DetectionScheduler:
+    """
+    Decide, a cada frame, se a detecção completa da bola por cor (frame inteiro) é necessária.
+
+    A detecção só é dispensada quando o rastreador da bola está saudável:
+    rastreou neste frame, a caixa não saltou nem mudou muito de tamanho, e o recorte
+    rastreado ainda é majoritariamente vermelho. Bola escondida, copos em casa (fora de
+    rodada) ou rastreador ausente sempre forçam a detecção.
+
+    Limite de erro: mesmo saudável, a detecção roda pelo menos a cada 'max_interval'
+    frames, então uma divergência entre rastreador e cor (ou os copos voltando para casa)
+    é percebida com no máximo 'max_interval' - 1 frames de atraso.
+    """
+    def __init__(self, max_interval=5, min_color_fraction=0.25, max_jump=20.0, max_scale_change=0.3):
+        """
+        Args:
+            max_interval (int): Máximo de frames seguidos sem detecção completa.
+            min_color_fraction (float): Fração mínima de pixels vermelhos na caixa rastreada.
+            max_jump (float): Deslocamento máximo (px) do centro da caixa entre frames.
+            max_scale_change (float): Variação relativa máxima da área da caixa entre frames.
+        """
+        self.max_interval = max_interval
+        self.min_color_fraction = min_color_fraction
+        self.max_jump = max_jump
+        self.max_scale_change = max_scale_change
+
+        self.frames = 0
+        self.detections = 0
+        self.avoided = 0
+        self.longest_skip = 0
+        self.reasons = {}
+        self._since_detection = 0
+        self._last_box = None
+
+    def _box_stable(self, box):
+        previous = self._last_box
+        if previous is None:
+            return False
+        px, py, pw, ph = previous
+        x, y, w, h = box
+        jump = (((x + w/2) - (px + pw/2))**2 + ((y + h/2) - (py + ph/2))**2)**0.5
+        if jump > self.max_jump:
+            return False
+        area, previous_area = w * h, pw * ph
+        return previous_area > 0 and abs(area - previous_area) / previous_area <= self.max_scale_change
+
+    def reason(self, ball_box, color_fraction, is_ball_hidden, round_active):
+        """
+        Motivo para detectar neste frame, ou None se a detecção pode ser dispensada.
+
+        Args:
+            ball_box: Caixa do rastreador da bola neste frame (None se não há/falhou).
+            color_fraction (float): Fração de pixels vermelhos em ball_box (None se não medida).
+            is_ball_hidden (bool): Estado do analyzer.
+            round_active (bool): False enquanto os copos estão em casa (início/fim de rodada).
+        """
+        if ball_box is None:
+            return "no_tracker"
+        if is_ball_hidden:
+            return "hidden"
+        if not round_active:
+            return "idle"
+        if self._since_detection + 1 >= self.max_interval:
+            return "interval"
+        if not self._box_stable(ball_box):
+            return "unstable"
+        if color_fraction is None or color_fraction < self.min_color_fraction:
+            return "appearance"
+        return None
+
+    def should_detect(self, ball_box, color_fraction, is_ball_hidden, round_active):
+        """Decide e contabiliza este frame (ver reason)."""
+        reason = self.reason(ball_box, color_fraction, is_ball_hidden, round_active)
+        self._last_box = ball_box
+        self.frames += 1
+        if reason is None:
+            self.avoided += 1
+            self._since_detection += 1
+            self.longest_skip = max(self.longest_skip, self._since_detection)
+            return False
+        self.detections += 1
+        self.reasons[reason] = self.reasons.get(reason, 0) + 1
+        self._since_detection = 0
+        return True
+
+    def summary(self):
+        """
+        Returns:
+            dict: frames, detections, avoided, avoided_ratio, longest_skip, reasons.
+        """
+        return {
+            "frames": self.frames,
+            "detections": self.detections,
+            "avoided": self.avoided,
+            "avoided_ratio": self.avoided / self.frames if self.frames else 0.0,
+            "longest_skip": self.longest_skip,
+            "reasons": dict(self.reasons),
+        }
+
+    def format(self):
+        s = self.summary()
+        reasons = ", ".join(f"{k}={v}" for k, v in sorted(s["reasons"].items()))
+        return (f"Detecção da bola: {s['detections']}/{s['frames']} frames "
+                f"({s['avoided']} evitadas, {s['avoided_ratio']:.0%}; maior intervalo {s['longest_skip']}) "
+                f"[{reasons}]")
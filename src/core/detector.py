@@ -1,13 +1,50 @@
 import cv2
 import numpy as np
 
+from utils.buffer_pool import ScratchBuffers
+
+# Intervalos de cor para vermelho (HSV)
+LOWER_RED1 = np.array([0, 120, 70])
+UPPER_RED1 = np.array([10, 255, 255])
+LOWER_RED2 = np.array([170, 120, 70])
+UPPER_RED2 = np.array([180, 255, 255])
+KERNEL_3X3 = np.ones((3,3), np.uint8)
+
+def cup_contours(frame, roi_rect):
+    """
+    Pré-processamento dos copos: contornos externos das bordas dentro da área.
+    Usado pelo Detector e pela calibração automática (core.calibration).
+
+    Returns:
+        list: Contornos em coordenadas da área (não do frame).
+    """
+    x_roi, y_roi, w_roi, h_roi = roi_rect
+    roi = frame[y_roi:y_roi+h_roi, x_roi:x_roi+w_roi]
+
+    # Converter para escala de cinza e aplicar threshold
+    gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+
+    # Blur para reduzir ruído
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+
+    # Detecção de bordas ou threshold adaptativo
+    # Thimbles costumam ter bordas bem definidas ou contraste
+    edges = cv2.Canny(blurred, 50, 150)
+
+    # Dilatar para fechar bordas
+    dilated = cv2.dilate(edges, KERNEL_3X3, iterations=2)
+
+    contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return contours
+
 class Detector:
     """
     Responsável por detectar objetos (copos e bolinha) no frame.
     """
     
     def __init__(self):
-        pass
+        # Imagens intermediárias (HSV, máscaras) reutilizadas a cada frame
+        self.scratch = ScratchBuffers()
 
     def select_roi_manually(self, frame, message="Selecione a area (Enter para confirmar)"):
         """
@@ -57,23 +94,35 @@ class Detector:
             list: Lista de 3 tuplas (x, y, w, h) ordenadas da esquerda para a direita.
         """
         x_roi, y_roi, w_roi, h_roi = roi_rect
-        roi = frame[y_roi:y_roi+h_roi, x_roi:x_roi+w_roi]
-        
-        # Converter para escala de cinza e aplicar threshold
-        gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+        top_3 = self.find_cup_candidates(frame, roi_rect)
         
-        # Blur para reduzir ruído
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        # Se não achou 3, tenta usar heurística de divisão da área
+        # IMPORTANTE: Se achou menos que 3, a divisão da área é mais segura que detecção parcial
+        if len(top_3) < 3:
+            print(f"[AVISO] Apenas {len(top_3)} copos detectados por contorno. Usando divisão da área.")
+            # Dividir a ROI em 3 partes iguais horizontalmente
+            cup_w = w_roi // 3
+            top_3 = [
+                (x_roi, y_roi, cup_w, h_roi),
+                (x_roi + cup_w, y_roi, cup_w, h_roi),
+                (x_roi + 2*cup_w, y_roi, cup_w, h_roi)
+            ]
         
-        # Detecção de bordas ou threshold adaptativo
-        # Thimbles costumam ter bordas bem definidas ou contraste
-        edges = cv2.Canny(blurred, 50, 150)
+        # Ordenar final da esquerda para a direita (x crescente)
+        top_3.sort(key=lambda b: b[0])
         
-        # Dilatar para fechar bordas
-        kernel = np.ones((3,3), np.uint8)
-        dilated = cv2.dilate(edges, kernel, iterations=2)
+        return top_3
+
+    def find_cup_candidates(self, frame, roi_rect):
+        """
+        Contornos com cara de copo dentro da área, sem a divisão da área como reserva
+        (pode retornar menos de 3, ex: copos sobrepostos durante o embaralhamento).
         
-        contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        Returns:
+            list: Até 3 tuplas (x, y, w, h), as maiores, ordenadas da esquerda para a direita.
+        """
+        x_roi, y_roi, w_roi, h_roi = roi_rect
+        contours = cup_contours(frame, roi_rect)
         
         # Filtrar contornos que parecem copos
         # Critérios: Área mínima, aspecto (geralmente mais altos que largos ou quadrados)
@@ -112,48 +161,46 @@ class Detector:
         # Ordenar candidatos por área (maior para menor) e pegar os 3 maiores
         final_candidates.sort(key=lambda b: b[2]*b[3], reverse=True)
         top_3 = final_candidates[:3]
-        
-        # Se não achou 3, tenta usar heurística de divisão da área
-        # IMPORTANTE: Se achou menos que 3, a divisão da área é mais segura que detecção parcial
-        if len(top_3) < 3:
-            print(f"[AVISO] Apenas {len(top_3)} copos detectados por contorno. Usando divisão da área.")
-            # Dividir a ROI em 3 partes iguais horizontalmente
-            cup_w = w_roi // 3
-            top_3 = [
-                (x_roi, y_roi, cup_w, h_roi),
-                (x_roi + cup_w, y_roi, cup_w, h_roi),
-                (x_roi + 2*cup_w, y_roi, cup_w, h_roi)
-            ]
-        
-        # Ordenar final da esquerda para a direita (x crescente)
         top_3.sort(key=lambda b: b[0])
-        
         return top_3
 
+    def ball_color_fraction(self, frame, bbox):
+        """
+        Fração de pixels com a cor da bola dentro de 'bbox' (verificação barata, só no recorte).
+
+        Returns:
+            float: Entre 0 e 1 (0 se a caixa estiver fora do frame).
+        """
+        x, y, w, h = (int(v) for v in bbox)
+        x0, y0 = max(0, x), max(0, y)
+        roi = frame[y0:y+h, x0:x+w]
+        if roi.size == 0:
+            return 0.0
+        hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
+        red = cv2.countNonZero(cv2.inRange(hsv, LOWER_RED1, UPPER_RED1)) + \
+              cv2.countNonZero(cv2.inRange(hsv, LOWER_RED2, UPPER_RED2))
+        return red / float(roi.shape[0] * roi.shape[1])
+
     def detect_ball_automatically(self, frame, max_area=None):
         """
         Procura pela bolinha vermelha em todo o frame.
         Filtra por formato e tamanho para evitar falsos positivos (como botões).
         """
-        # Intervalo de cor para vermelho (HSV)
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        # Buffers de trabalho reutilizados (dst=) para não alocar imagens por frame
+        h, w = frame.shape[:2]
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=self.scratch.get("hsv", (h, w, 3)))
         
         # Vermelho baixo
-        lower_red1 = np.array([0, 120, 70])
-        upper_red1 = np.array([10, 255, 255])
-        mask1 = cv2.inRange(hsv, lower_red1, upper_red1)
+        mask1 = cv2.inRange(hsv, LOWER_RED1, UPPER_RED1, dst=self.scratch.get("mask1", (h, w)))
         
         # Vermelho alto
-        lower_red2 = np.array([170, 120, 70])
-        upper_red2 = np.array([180, 255, 255])
-        mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
+        mask2 = cv2.inRange(hsv, LOWER_RED2, UPPER_RED2, dst=self.scratch.get("mask2", (h, w)))
         
-        mask = mask1 + mask2
+        mask = cv2.bitwise_or(mask1, mask2, dst=self.scratch.get("mask", (h, w)))
         
-        # Limpeza
-        kernel = np.ones((3,3), np.uint8)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
-        mask = cv2.dilate(mask, kernel, iterations=2)
+        # Limpeza (máscaras 1 e 2 já foram combinadas: reaproveitadas como saída)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, KERNEL_3X3, dst=mask1)
+        mask = cv2.dilate(mask, KERNEL_3X3, dst=mask2, iterations=2)
         
         contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
@@ -0,0 +1,208 @@
+import json
+import os
+import queue
+import socket
+import threading
+import time
+from collections import deque, namedtuple
+
+# Tipos de evento emitidos pelo ThimblesAnalyzer / TrackingSession
+BALL_ENTERED_CUP = "ball_entered_cup"   # Bola visível entrou (ou está) em um copo
+BALL_LOST = "ball_lost"                 # Bola deixou de ser vista
+BALL_REAPPEARED = "ball_reappeared"     # Bola voltou a aparecer fora do copo alvo
+PREDICTED_ENTRY = "predicted_entry"     # Bola sumiu perto de um copo: entrada presumida
+TARGET_CHANGED = "target_changed"       # O copo alvo mudou (por qualquer motivo)
+ROUND_RESET = "round_reset"             # Copos voltaram às posições iniciais (nova rodada)
+
+EVENT_TYPES = (BALL_ENTERED_CUP, BALL_LOST, BALL_REAPPEARED, PREDICTED_ENTRY, TARGET_CHANGED, ROUND_RESET)
+
+# Evento de jogo.
+# kind: um dos tipos acima; frame_index/timestamp: frame que originou o evento
+# (timestamp de captura, time.monotonic()); cup_index: copo envolvido (-1 se nenhum);
+# data: dicionário com detalhes adicionais serializáveis em JSON.
+GameEvent = namedtuple("GameEvent", ["kind", "frame_index", "timestamp", "cup_index", "data"])
+
+def event_to_dict(event):
+    """Converte um GameEvent em dicionário serializável."""
+    return {
+        "kind": event.kind,
+        "frame_index": event.frame_index,
+        "timestamp": event.timestamp,
+        "cup_index": event.cup_index,
+        "data": event.data,
+    }
+
+class EventBus:
+    """
+    Distribui eventos de jogo para assinantes sem bloquear o loop de rastreamento.
+
+    publish() apenas enfileira o evento (fila limitada; se cheia, o evento é descartado
+    e contabilizado em 'dropped'). Uma thread despacha os eventos aos assinantes e mede
+    a latência entre a captura do frame e o despacho.
+    """
+    def __init__(self, max_queue=1024, latency_window=1000):
+        """
+        Args:
+            max_queue (int): Tamanho máximo da fila de eventos pendentes.
+            latency_window (int): Quantidade de amostras de latência mantidas.
+        """
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=latency_window)
+        self.published = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._dispatch_loop, name="EventBus", daemon=True)
+        self._thread.start()
+
+    def subscribe(self, callback):
+        """
+        Registra um assinante. 'callback(event, latency)' é chamado na thread de despacho;
+        latency é o tempo (s) entre a captura do frame e o despacho (ou None sem timestamp).
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def publish(self, event):
+        """Enfileira um evento. Nunca bloqueia."""
+        try:
+            self._queue.put_nowait(event)
+            self.published += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _dispatch_loop(self):
+        while True:
+            event = self._queue.get()
+            if event is None:
+                self._queue.task_done()
+                return
+            latency = None
+            if event.timestamp is not None:
+                latency = time.monotonic() - event.timestamp
+                self._latencies.append(latency)
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for callback in subscribers:
+                try:
+                    callback(event, latency)
+                except Exception as e:
+                    print(f"[ERRO] Assinante de eventos falhou: {e}")
+            self._queue.task_done()
+
+    def flush(self):
+        """Espera todos os eventos pendentes serem despachados."""
+        self._queue.join()
+
+    def latency_summary(self):
+        """
+        Resumo da latência captura -> despacho das últimas amostras.
+
+        Returns:
+            dict: count, mean_ms, p50_ms, p95_ms, max_ms (vazio se não há amostras).
+        """
+        samples = sorted(self._latencies)
+        if not samples:
+            return {}
+        n = len(samples)
+        return {
+            "count": n,
+            "mean_ms": 1000.0 * sum(samples) / n,
+            "p50_ms": 1000.0 * samples[n // 2],
+            "p95_ms": 1000.0 * samples[min(n - 1, int(n * 0.95))],
+            "max_ms": 1000.0 * samples[-1],
+        }
+
+    def close(self):
+        """Despacha os eventos pendentes e encerra a thread."""
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+class JsonlEventSink:
+    """
+    Grava cada evento como uma linha JSON em um arquivo.
+    """
+    def __init__(self, path):
+        self.file = open(path, "a", encoding="utf-8")
+
+    def __call__(self, event, latency):
+        record = event_to_dict(event)
+        record["latency_ms"] = None if latency is None else round(latency * 1000.0, 3)
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class UnixSocketEventSink:
+    """
+    Publica eventos como linhas JSON para clientes conectados a um socket Unix local.
+    Clientes lentos ou desconectados são descartados; o envio nunca bloqueia.
+    """
+    def __init__(self, path):
+        if not hasattr(socket, "AF_UNIX"):
+            raise ValueError("Sockets Unix não são suportados nesta plataforma.")
+        if os.path.exists(path):
+            os.remove(path)
+        self.path = path
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(path)
+        self.server.listen()
+        self.server.setblocking(False)
+        self.clients = []
+
+    def _accept_pending(self):
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except (BlockingIOError, OSError):
+                return
+            client.setblocking(False)
+            self.clients.append(client)
+
+    def __call__(self, event, latency):
+        self._accept_pending()
+        if not self.clients:
+            return
+        record = event_to_dict(event)
+        record["latency_ms"] = None if latency is None else round(latency * 1000.0, 3)
+        line = (json.dumps(record) + "\n").encode("utf-8")
+        for client in list(self.clients):
+            try:
+                sent = client.send(line)
+            except OSError:
+                sent = 0
+            if sent < len(line):
+                # Cliente lento (buffer cheio) ou desconectado: linha parcial invalida o fluxo
+                client.close()
+                self.clients.remove(client)
+
+    def close(self):
+        for client in self.clients:
+            client.close()
+        self.clients = []
+        self.server.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def create_event_bus(jsonl_path=None, socket_path=None):
+    """
+    Cria um EventBus com os sinks embutidos solicitados.
+
+    Returns:
+        tuple: (bus, sinks) — sinks deve ser fechado após bus.close().
+    """
+    bus = EventBus()
+    sinks = []
+    if jsonl_path:
+        sinks.append(JsonlEventSink(jsonl_path))
+    if socket_path:
+        sinks.append(UnixSocketEventSink(socket_path))
+    for sink in sinks:
+        bus.subscribe(sink)
+    return bus, sinks
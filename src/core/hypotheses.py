@@ -0,0 +1,185 @@
+import itertools
+
+import numpy as np
+
+# Acima disso o número de permutações (n!) deixa de ser pequeno: sem hipóteses
+MAX_CUPS_FOR_HYPOTHESES = 4
+# Peso relativo abaixo do qual uma hipótese é descartada
+MIN_WEIGHT = 1e-4
+
+def _overlaps(boxes):
+    """IoU entre todos os pares de caixas (n, n)."""
+    x0, y0 = boxes[:, 0], boxes[:, 1]
+    x1, y1 = x0 + boxes[:, 2], y0 + boxes[:, 3]
+    iw = np.clip(np.minimum(x1[:, None], x1[None, :]) - np.maximum(x0[:, None], x0[None, :]), 0, None)
+    ih = np.clip(np.minimum(y1[:, None], y1[None, :]) - np.maximum(y0[:, None], y0[None, :]), 0, None)
+    inter = iw * ih
+    area = boxes[:, 2] * boxes[:, 3]
+    union = area[:, None] + area[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+class CupHypotheses:
+    """
+    Hipóteses ponderadas sobre a identidade dos copos por trás dos rastreadores.
+
+    Cada hipótese é uma permutação 'perm': o rastreador (slot) k está seguindo o copo
+    perm[k]. A cada frame considera-se que os rastreadores podem ter trocado de copo:
+    para cada troca candidata 'swap' (o slot k passa a seguir o copo que o slot swap[k]
+    seguia), o custo compara as caixas observadas com a previsão de posição e com o
+    tamanho anterior (aparência). A probabilidade a priori de uma troca cresce com a
+    sobreposição das caixas envolvidas, já que os rastreadores só trocam de copo em
+    cruzamentos e oclusões.
+
+    Cada hipótese tem seu próprio filtro alfa-beta (posição e velocidade por slot), com
+    predição de velocidade constante: depois de um cruzamento ambíguo, a hipótese errada
+    continua prevendo o movimento do outro copo e acumula erro nos frames seguintes.
+
+    Todas as trocas de todas as hipóteses são pontuadas de uma vez com NumPy, e só as
+    'max_hypotheses' mais prováveis são mantidas. Custo por frame: O(hipóteses x trocas
+    x copos), limitado por max_hypotheses e pelo número de trocas candidatas (todas as
+    permutações para até 4 copos).
+    """
+    def __init__(self, cup_bboxes, max_hypotheses=6, motion_sigma=0.15, size_sigma=0.25, swap_prior=0.001,
+                 crossing_prior=0.3, position_gain=0.5, velocity_gain=0.1):
+        """
+        Args:
+            cup_bboxes: Caixas iniciais dos copos (identidade inicial: slot k = copo k).
+            max_hypotheses (int): Máximo de hipóteses com peso não nulo.
+            motion_sigma (float): Desvio aceito da previsão de posição, em larguras de copo.
+            size_sigma (float): Desvio aceito na largura/altura, em larguras de copo.
+            swap_prior (float): Probabilidade por frame de uma troca entre caixas separadas.
+            crossing_prior (float): Probabilidade por frame de uma troca entre caixas
+                                    totalmente sobrepostas (escala com a IoU).
+            position_gain, velocity_gain (float): Ganhos alfa e beta do filtro de cada hipótese.
+        """
+        n = len(cup_bboxes)
+        self.num_cups = n
+        self.max_hypotheses = max_hypotheses
+        self.motion_sigma = motion_sigma
+        self.size_sigma = size_sigma
+        self.swap_prior = swap_prior
+        self.crossing_prior = crossing_prior
+        self.position_gain = position_gain
+        self.velocity_gain = velocity_gain
+
+        self.perms = np.array(list(itertools.permutations(range(n))), dtype=np.intp) # (P, n)
+        index = {tuple(p): i for i, p in enumerate(self.perms)}
+        # compose[i, j]: hipótese resultante de aplicar a troca j à hipótese i (perm_i[swap_j])
+        self.compose = np.array([[index[tuple(p[s])] for s in self.perms] for p in self.perms], dtype=np.intp)
+        self._identity = index[tuple(range(n))]
+        self._moved = self.perms != np.arange(n)[None, :]
+
+        self.frames = 0
+        self.swaps_detected = 0
+        self.reset(cup_bboxes)
+
+    def reset(self, cup_bboxes):
+        """Volta à certeza: slot k segue o copo k, nas caixas fornecidas."""
+        self.weights = np.zeros(len(self.perms))
+        self.weights[self._identity] = 1.0
+        boxes = self._as_array(cup_bboxes)
+        self.boxes = boxes
+        # Estado do filtro por hipótese e slot: posição do centro e velocidade (P, n, 2)
+        centers = boxes[:, :2] + boxes[:, 2:] / 2.0
+        self.position = np.broadcast_to(centers, (len(self.perms), self.num_cups, 2)).copy()
+        self.velocity = np.zeros((len(self.perms), self.num_cups, 2))
+        valid = boxes[:, 2] > 0
+        self.cup_width = float(np.mean(boxes[valid, 2])) if valid.any() else 1.0
+
+    def _as_array(self, cup_bboxes):
+        boxes = np.full((self.num_cups, 4), np.nan)
+        for k, box in enumerate(cup_bboxes[:self.num_cups]):
+            if box is not None:
+                boxes[k] = box
+        return boxes
+
+    def _log_prior(self):
+        """Log-probabilidade a priori de cada troca, pela sobreposição das caixas anteriores."""
+        iou = _overlaps(np.nan_to_num(self.boxes))
+        pair = np.where(self._moved, iou[np.arange(self.num_cups)[None, :], self.perms], np.inf)
+        overlap = pair.min(axis=1)
+        log_prior = np.log(self.swap_prior + self.crossing_prior * np.minimum(overlap, 1.0))
+        log_prior[self._identity] = 0.0
+        return log_prior
+
+    def update(self, cup_bboxes):
+        """
+        Incorpora as caixas dos rastreadores do frame atual (None para copos perdidos).
+        """
+        boxes = self._as_array(cup_bboxes)
+        active = np.flatnonzero(self.weights)
+        predicted = self.position[active] + self.velocity[active] # (H, n, 2)
+        # Copos sem observação seguem a previsão da hipótese mais provável
+        missing = np.isnan(boxes[:, 0])
+        if missing.any():
+            best = int(np.argmax(self.weights[active]))
+            boxes[missing, 2:] = self.boxes[missing, 2:]
+            boxes[missing, :2] = predicted[best, missing] - boxes[missing, 2:] / 2.0
+        if np.isnan(boxes).any():
+            return
+
+        centers = boxes[:, :2] + boxes[:, 2:] / 2.0
+        scale = self.cup_width
+        observed = ~missing
+
+        # Custo de cada (hipótese, troca): slot k comparado com a previsão do que o
+        # slot swap[k] seguia naquela hipótese. (H, S, n)
+        pred = predicted[:, self.perms]
+        residual = (centers[None, None, :, :] - pred) * observed[None, None, :, None]
+        motion = np.sum(residual ** 2, axis=-1)
+        size = np.sum((boxes[None, :, 2:] - self.boxes[self.perms][..., 2:]) ** 2, axis=-1)
+        cost = np.sum(motion / (self.motion_sigma * scale) ** 2 +
+                      observed * size[None] / (self.size_sigma * scale) ** 2, axis=-1)
+        log_joint = np.log(self.weights[active])[:, None] + self._log_prior()[None, :] - 0.5 * cost
+        joint = np.exp(log_joint - log_joint.max()).ravel()
+
+        # Peso de cada hipótese resultante = soma das (hipótese, troca) que levam a ela;
+        # o estado do filtro vem da combinação que mais contribui
+        targets = self.compose[active].ravel()
+        weights = np.zeros_like(self.weights)
+        np.add.at(weights, targets, joint)
+        strongest = np.zeros_like(self.weights)
+        np.maximum.at(strongest, targets, joint)
+        is_strongest = joint == strongest[targets]
+        source = np.zeros(len(self.weights), dtype=np.intp)
+        source[targets[is_strongest]] = np.flatnonzero(is_strongest)
+
+        if np.count_nonzero(weights) > self.max_hypotheses:
+            cutoff = np.partition(weights, -self.max_hypotheses)[-self.max_hypotheses]
+            weights[weights < cutoff] = 0.0
+        total = weights.sum()
+        if total <= 0:
+            return
+        # Hipóteses desprezíveis saem do conjunto ativo (custo do próximo frame)
+        weights[weights < total * MIN_WEIGHT] = 0.0
+        best_before = int(np.argmax(self.weights))
+
+        kept = np.flatnonzero(weights)
+        h, s = np.divmod(source[kept], len(self.perms))
+        swap = self.perms[s]                                  # (K, n)
+        prior_velocity = self.velocity[active[h][:, None], swap]
+        innovation = residual.reshape(-1, self.num_cups, 2)[source[kept]]
+        self.position[kept] = pred[h, s] + self.position_gain * innovation
+        self.velocity[kept] = prior_velocity + self.velocity_gain * innovation
+
+        self.weights = weights / weights.sum()
+        if int(np.argmax(self.weights)) != best_before:
+            self.swaps_detected += 1
+        self.boxes = boxes
+        self.frames += 1
+
+    def cup_of_slot(self, slot):
+        """Copo (identidade) mais provável seguido pelo rastreador 'slot'."""
+        probs = np.bincount(self.perms[:, slot], weights=self.weights, minlength=self.num_cups)
+        return int(np.argmax(probs))
+
+    def slot_probabilities(self, cup):
+        """
+        Returns:
+            numpy.ndarray: Probabilidade de cada slot estar seguindo o copo 'cup'.
+        """
+        return (self.weights[:, None] * (self.perms == cup)).sum(axis=0)
+
+    @property
+    def active_hypotheses(self):
+        return int(np.count_nonzero(self.weights))
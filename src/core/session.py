@@ -0,0 +1,269 @@
+from collections import namedtuple
+
+from core.detection_scheduler import DetectionScheduler
+from core.detector import Detector
+from core.tracker import MultiObjectTracker
+from core.analyzer import ThimblesAnalyzer
+
+# Resultado do processamento de um frame.
+# cups_boxes: bboxes atuais dos copos; ball_box: bbox da bola (ou None);
+# target_idx: índice do copo alvo (-1 se nenhum); is_ball_hidden: estado do analyzer;
+# tracking_ball: True se há rastreador de bola ativo;
+# waiting_ball: True se ainda não há bola rastreada e nenhuma foi detectada neste frame.
+TrackingState = namedtuple(
+    "TrackingState",
+    ["cups_boxes", "ball_box", "target_idx", "is_ball_hidden", "tracking_ball", "waiting_ball"],
+)
+
+class TrackingSession:
+    """
+    Lógica de rastreamento quadro a quadro (copos, bola e análise do jogo),
+    independente de exibição e de interação com o usuário.
+    """
+    def __init__(self, detector=None, tracker_type='CSRT', events=None, tracer=None, verbose=True,
+                 adaptive_detection=True):
+        """
+        Args:
+            detector (Detector): Detector a ser usado. Se None, cria um novo.
+            tracker_type (str): Tipo de rastreador para copos e bola.
+            events (EventBus): Barramento para os eventos de jogo do analyzer (opcional).
+            tracer (LatencyTracer): Se fornecido, recebe uma marca ao fim de cada etapa do frame.
+            verbose (bool): Se False, o analyzer não imprime as mensagens de jogo.
+            adaptive_detection (bool): Se True, um DetectionScheduler dispensa a detecção da
+                bola por cor nos frames em que o rastreador da bola está saudável.
+                Se False, detecta em todos os frames.
+        """
+        self.detector = detector or Detector()
+        self.tracker_type = tracker_type
+        self.events = events
+        self.tracer = tracer
+        self.verbose = verbose
+        self.tracker_cups = MultiObjectTracker(tracker_type=tracker_type)
+        self.tracker_ball = None
+        self.analyzer = ThimblesAnalyzer(events=events, verbose=verbose)
+        self.initial_cups_bboxes = []
+        self.max_ball_area = None
+        self._cups_were_home = False
+        self.scheduler = DetectionScheduler() if adaptive_detection else None
+
+    def start(self, frame, cup_bboxes):
+        """
+        Inicializa o rastreamento a partir das posições iniciais (HOME) dos copos.
+
+        Args:
+            frame: Frame em que os copos foram detectados.
+            cup_bboxes: Lista de (x, y, w, h) dos copos.
+        """
+        # SALVAR POSIÇÕES INICIAIS (HOME) para resetar em novos jogos
+        self.initial_cups_bboxes = list(cup_bboxes)
+
+        # Inicializar rastreador de copos
+        self.tracker_cups.initialize(frame, cup_bboxes)
+
+        # Bola começa como None (será detectada automaticamente)
+        self.tracker_ball = None
+        self._cups_were_home = False
+        self.analyzer = ThimblesAnalyzer(events=self.events, verbose=self.verbose)
+        self.analyzer.initialize(None, cup_bboxes)
+
+        # Calcular área média dos copos para servir de referência para a bola
+        # A bola deve ser menor que um copo (ex: 50% da área)
+        avg_cup_area = 0
+        if len(cup_bboxes) > 0:
+            total_area = sum([w*h for (_,_,w,h) in cup_bboxes])
+            avg_cup_area = total_area / len(cup_bboxes)
+
+        # Limite máximo para a bola (Aumentei para 120% para ser mais tolerante)
+        self.max_ball_area = avg_cup_area * 1.2 if avg_cup_area > 0 else None
+
+    def stop(self):
+        """
+        Libera os rastreadores e o estado do jogo atuais (ex: antes de reconfigurar),
+        mantendo o detector, os contadores e a configuração da sessão.
+        """
+        self.tracker_cups.release()
+        if self.tracker_ball is not None:
+            self.tracker_ball.release()
+        self.tracker_ball = None
+        self.initial_cups_bboxes = []
+        self._cups_were_home = False
+
+    def _cups_at_home(self, cups_boxes):
+        """
+        Verifica se existe UM copo atual perto de CADA copo inicial (HOME).
+        """
+        matched_count = 0
+        for init_box in self.initial_cups_bboxes:
+            if not init_box: continue
+            ix, iy, iw, ih = init_box
+            icx, icy = ix + iw/2, iy + ih/2
+
+            found_match = False
+            for curr_box in cups_boxes:
+                if not curr_box: continue
+                cx, cy, cw, ch = curr_box
+                ccx, ccy = cx + cw/2, cy + ch/2
+
+                # Distância < 50 pixels
+                if ((icx - ccx)**2 + (icy - ccy)**2)**0.5 < 50:
+                    found_match = True
+                    break
+            if found_match:
+                matched_count += 1
+
+        return matched_count == len(self.initial_cups_bboxes) and len(self.initial_cups_bboxes) > 0
+
+    def _filter_ball_detection(self, found_ball_color, cups_boxes):
+        """
+        Descarta detecções de bola fora da zona de jogo ou dentro de copos enquanto
+        a bola está escondida. Retorna a bbox filtrada (ou None).
+        """
+        # FILTRO DE ZONA DE JOGO (NOVO):
+        # Ignorar detecções muito longe dos copos (verticalmente) para evitar botões
+        if found_ball_color:
+            bx, by, bw, bh = found_ball_color
+            b_center_y = by + bh/2
+
+            min_y = float('inf')
+            max_y = float('-inf')
+            has_cups = False
+
+            for c_box in cups_boxes:
+                if c_box:
+                    cx, cy, cw, ch = c_box
+                    if cy < min_y: min_y = cy
+                    if cy + ch > max_y: max_y = cy + ch
+                    has_cups = True
+
+            if has_cups:
+                # Aumentei a margem para 300px para garantir que pegue a bola em qualquer posição inicial
+                margin_top = 300
+                margin_bottom = 300
+
+                if not ((min_y - margin_top) < b_center_y < (max_y + margin_bottom)):
+                    # print(f"[DEBUG] Bola ignorada (fora da zona Y): {b_center_y}")
+                    found_ball_color = None
+
+        # Filtrar falsos positivos da bola se ela estiver "escondida"
+        if self.analyzer.is_ball_hidden and found_ball_color:
+            bx, by, bw, bh = found_ball_color
+            b_center = (bx + bw/2, by + bh/2)
+
+            for c_box in cups_boxes:
+                if not c_box: continue
+                cx, cy, cw, ch = c_box
+                # Se o centro da "bola" estiver dentro de um copo, é provável que seja o próprio copo
+                # (reflexo, detalhe vermelho, etc)
+                if (cx < b_center[0] < cx+cw) and (cy < b_center[1] < cy+ch):
+                    # print("[DEBUG] Ignorando detecção de bola dentro do copo (falso positivo)")
+                    found_ball_color = None
+                    break
+
+        return found_ball_color
+
+    def process(self, frame, frame_index=None, timestamp=None):
+        """
+        Processa um frame: atualiza copos, detecta/rastreia a bola e atualiza o analyzer.
+
+        Args:
+            frame: Frame BGR atual.
+            frame_index: Índice do frame na fonte (opcional, repassado aos eventos).
+            timestamp: Timestamp de captura do frame (opcional, repassado aos eventos).
+
+        Returns:
+            TrackingState: Estado resultante do frame.
+        """
+        analyzer = self.analyzer
+        tracer = self.tracer
+
+        # 1. Atualizar rastreadores dos COPOS primeiro (Referência)
+        ok_cups, cups_boxes = self.tracker_cups.update(frame)
+        if tracer: tracer.mark("cups")
+
+        # 2. Atualizar o rastreador da bola (se houver)
+        current_tracker_box = None
+        if self.tracker_ball is not None:
+            ok_ball, ball_boxes = self.tracker_ball.update(frame)
+            # Caixa atual do tracker
+            current_tracker_box = ball_boxes[0] if (ok_ball and len(ball_boxes) > 0) else None
+        if tracer: tracer.mark("ball_track")
+
+        # 3. Detectar a bola por cor se ainda não estiver rastreando
+        # OU para corrigir o tracker (Ressincronização). Com o scheduler, a detecção
+        # é dispensada enquanto o rastreador estiver saudável (até max_interval frames).
+        found_ball_color = None
+        detect = True
+        if self.scheduler is not None:
+            color_fraction = None
+            if current_tracker_box is not None:
+                color_fraction = self.detector.ball_color_fraction(frame, current_tracker_box)
+            detect = self.scheduler.should_detect(current_tracker_box, color_fraction,
+                                                  analyzer.is_ball_hidden, not self._cups_were_home)
+        if detect:
+            found_ball_color = self.detector.detect_ball_automatically(frame, max_area=self.max_ball_area)
+        if tracer: tracer.mark("ball_detect")
+
+        # LÓGICA DE RESET DOS COPOS (AUTO-CORREÇÃO DE DRIFT/SWAP)
+        # Se a bola está visível (provável início/fim de jogo) e os copos estão PERTO das posições iniciais,
+        # o jogo resetou visualmente. MAS os trackers podem estar trocados (swap).
+        # Então forçamos um RESET COMPLETO dos trackers para garantir IDs corretos.
+        cups_home = bool(found_ball_color and self.initial_cups_bboxes and self._cups_at_home(cups_boxes))
+        if cups_home:
+            # print("[DEBUG] Cenário resetado detectado. Reiniciando rastreadores de copos para corrigir trocas.")
+            self.tracker_cups.initialize(frame, self.initial_cups_bboxes)
+            cups_boxes = list(self.initial_cups_bboxes) # Atualiza boxes para o frame atual
+            ok_cups = True
+            if not self._cups_were_home:
+                analyzer.reset_round(frame_index, timestamp, cups_boxes)
+        self._cups_were_home = cups_home
+
+        found_ball_color = self._filter_ball_detection(found_ball_color, cups_boxes)
+
+        ball_box_curr = None
+        waiting_ball = False
+
+        if self.tracker_ball is None:
+            if found_ball_color:
+                print("[INFO] BOLA DETECTADA! Iniciando rastreamento.")
+                self.tracker_ball = MultiObjectTracker(tracker_type=self.tracker_type)
+                self.tracker_ball.initialize(frame, [found_ball_color])
+                analyzer.initialize(found_ball_color, cups_boxes, frame_index, timestamp) # Reinicia analyzer com a bola
+                ball_box_curr = found_ball_color
+            else:
+                waiting_ball = True
+        else:
+            # Se já estamos rastreando, verificamos se a detecção por cor diverge muito do tracker
+            should_reset = False
+
+            if found_ball_color:
+                if current_tracker_box is None:
+                    should_reset = True
+                else:
+                    # Calcular distância entre centro do tracker e centro da cor
+                    tx, ty, tw, th = current_tracker_box
+                    cx, cy, cw, ch = found_ball_color
+
+                    dist = ((tx+tw/2) - (cx+cw/2))**2 + ((ty+th/2) - (cy+ch/2))**2
+                    # Se a distância for grande (ex: mais que 50 pixels), o tracker está errado ou é um novo jogo
+                    if dist > 2500: # 50^2
+                         print("[INFO] Ressincronizando tracker com detecção de cor...")
+                         should_reset = True
+
+            if should_reset and found_ball_color:
+                self.tracker_ball = MultiObjectTracker(tracker_type=self.tracker_type)
+                self.tracker_ball.initialize(frame, [found_ball_color])
+                analyzer.update(found_ball_color, cups_boxes, frame_index, timestamp) # Atualiza analyzer forçadamente
+                ball_box_curr = found_ball_color
+            else:
+                ball_box_curr = current_tracker_box
+
+            # Se perdemos o tracker e não achamos cor, o ball_box_curr fica None, o que é correto (bola oculta ou perdida)
+            if ball_box_curr is None and not found_ball_color:
+                 self.tracker_ball = None # Encerra tracker se perdeu tudo
+
+        analyzer.update(ball_box_curr, cups_boxes, frame_index, timestamp)
+        target_idx, _ = analyzer.get_target_cup()
+        if tracer: tracer.mark("analyzer")
+
+        return TrackingState(cups_boxes, ball_box_curr, target_idx, analyzer.is_ball_hidden,
+                             self.tracker_ball is not None, waiting_ball)
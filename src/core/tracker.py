@@ -1,5 +1,8 @@
 import cv2
 
+# Rastreadores suportados por MultiObjectTracker
+TRACKER_TYPES = ("CSRT", "KCF", "MIL")
+
 class MultiObjectTracker:
     """
     Gerencia múltiplos rastreadores de objetos para acompanhar os copos e a bolinha.
@@ -61,6 +64,10 @@ class MultiObjectTracker:
             self.trackers.append(tracker)
         print(f"[INFO] {len(self.trackers)} rastreadores inicializados.")
 
+    def release(self):
+        """Descarta os rastreadores (e os modelos internos que eles mantêm)."""
+        self.trackers = []
+
     def update(self, frame):
         """
         Atualiza a posição de todos os objetos rastreados.
@@ -0,0 +1,92 @@
+from input.registry import create_source
+
+def union_rect(regions):
+    """Menor retângulo (x, y, w, h) que contém todas as regiões."""
+    x0 = min(x for x, _, _, _ in regions)
+    y0 = min(y for _, y, _, _ in regions)
+    x1 = max(x + w for x, _, w, _ in regions)
+    y1 = max(y + h for _, y, _, h in regions)
+    return (x0, y0, x1 - x0, y1 - y0)
+
+def regions_outside(regions, bounds):
+    """Índices das regiões vazias ou que não cabem inteiras em 'bounds' (x, y, w, h)."""
+    bx, by, bw, bh = bounds
+    return [i for i, (x, y, w, h) in enumerate(regions)
+            if w <= 0 or h <= 0 or x < bx or y < by or x + w > bx + bw or y + h > by + bh]
+
+def screen_bounds():
+    """Retângulo (x, y, w, h) da tela virtual (todos os monitores), em coordenadas globais."""
+    import mss
+    with mss.mss() as sct:
+        m = sct.monitors[0]
+    return (m["left"], m["top"], m["width"], m["height"])
+
+class MultiRegionSource:
+    """
+    Várias regiões de análise a partir de uma única captura: a fonte captura apenas o
+    retângulo que une todas as regiões (uma captura e uma conversão de cor por frame,
+    independente do número de regiões) e cada região recebe uma view sem cópia do frame.
+
+    As views compartilham o buffer do frame capturado: são válidas até a próxima leitura
+    (ou enquanto o buffer do FramePool da fonte não for reutilizado).
+    """
+    def __init__(self, regions, source=None, monitor_index=1, target_fps=30.0, pool=None):
+        """
+        Args:
+            regions (list): Regiões (x, y, w, h) em coordenadas de tela (ou do frame de 'source').
+            source (VideoSource): Fonte já aberta (ex: arquivo). Se None, cria uma captura de
+                                  tela restrita à união das regiões.
+            monitor_index, target_fps, pool: Repassados à ScreenVideoSource criada.
+
+        Raises:
+            ValueError: Se alguma região (captura de tela) sai da tela.
+        """
+        self.regions = [tuple(int(v) for v in r) for r in regions]
+        self.union = union_rect(self.regions)
+        if source is None:
+            bounds = screen_bounds()
+            outside = regions_outside(self.regions, bounds)
+            if outside:
+                raise ValueError(f"Região(ões) {', '.join(str(i + 1) for i in outside)} fora da tela {bounds}.")
+            source = create_source("screen", monitor_index=monitor_index, bbox=self.union,
+                                   target_fps=target_fps, pool=pool)
+        self.source = source
+        # Origem do frame da fonte (captura de tela: canto da área capturada)
+        origin = source.geometry[:2] if source.geometry is not None else (0, 0)
+        self.offsets = [(x - origin[0], y - origin[1], w, h) for x, y, w, h in self.regions]
+
+    def invalid_regions(self, frame_shape):
+        """Índices das regiões que não cabem inteiras em um frame da fonte com 'frame_shape'."""
+        h, w = frame_shape[:2]
+        return regions_outside(self.offsets, (0, 0, w, h))
+
+    def views(self, frame, scale_factor=1.0):
+        """
+        Views (sem cópia) de cada região em 'frame'. Com 'scale_factor', 'frame' é uma
+        versão redimensionada do frame capturado (ex: frame de exibição).
+        """
+        views = []
+        for x, y, w, h in self.offsets:
+            if scale_factor != 1.0:
+                x, y, w, h = (int(v * scale_factor) for v in (x, y, w, h))
+            views.append(frame[y:y+h, x:x+w])
+        return views
+
+    def read(self):
+        """
+        Captura o próximo frame da união.
+
+        Returns:
+            tuple: (CapturedFrame, lista de views por região), ou None se a fonte acabou.
+        """
+        captured = self.source.read()
+        if captured is None:
+            return None
+        return captured, self.views(captured.image)
+
+    def release(self):
+        self.source.release()
+
+    @property
+    def fps(self):
+        return self.source.fps
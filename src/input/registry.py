@@ -0,0 +1,31 @@
+import importlib
+
+# Registro de fontes de vídeo: nome -> (módulo, classe).
+# As classes são importadas apenas quando selecionadas, de modo que o caminho
+# de processamento de arquivo não carrega dependências de captura de tela.
+SOURCES = {
+    "file": ("input.video_source", "FileVideoSource"),
+    "screen": ("input.video_source", "ScreenVideoSource"),
+}
+
+def get_source_class(kind):
+    """
+    Retorna a classe de fonte de vídeo registrada com o nome 'kind'.
+    """
+    if kind not in SOURCES:
+        raise ValueError(f"Fonte de vídeo desconhecida: {kind}. Opções: {', '.join(SOURCES)}")
+    module_name, class_name = SOURCES[kind]
+    return getattr(importlib.import_module(module_name), class_name)
+
+def create_source(kind, *args, **kwargs):
+    """
+    Instancia a fonte de vídeo registrada com o nome 'kind'.
+
+    Args:
+        kind (str): Nome registrado em SOURCES ('file', 'screen', ...).
+        *args, **kwargs: Repassados ao construtor da fonte.
+
+    Returns:
+        VideoSource: A fonte criada.
+    """
+    return get_source_class(kind)(*args, **kwargs)
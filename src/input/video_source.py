@@ -1,15 +1,79 @@
-import mss
 import cv2
 import time
 from abc import ABC, abstractmethod
+from collections import namedtuple
 import numpy as np
 
+# Frame com metadados de captura.
+# image: numpy.ndarray BGR; index: contador sequencial (0, 1, 2...);
+# timestamp: instante da captura em segundos (time.monotonic()).
+CapturedFrame = namedtuple("CapturedFrame", ["image", "index", "timestamp"])
+
+class RateMeter:
+    """
+    Mede a taxa real (eventos por segundo) usando média móvel exponencial
+    dos intervalos entre eventos.
+    """
+    def __init__(self, smoothing=0.1):
+        """
+        Args:
+            smoothing (float): Peso da amostra mais recente (0 < smoothing <= 1).
+        """
+        self.smoothing = smoothing
+        self._last = None
+        self._avg_interval = None
+
+    def tick(self, timestamp):
+        """Registra um evento ocorrido em 'timestamp' (segundos, relógio monotônico)."""
+        if self._last is not None:
+            interval = timestamp - self._last
+            if interval > 0:
+                if self._avg_interval is None:
+                    self._avg_interval = interval
+                else:
+                    self._avg_interval += self.smoothing * (interval - self._avg_interval)
+        self._last = timestamp
+
+    @property
+    def rate(self):
+        """Taxa medida em eventos por segundo, ou None se ainda não há amostras suficientes."""
+        if not self._avg_interval:
+            return None
+        return 1.0 / self._avg_interval
+
 class VideoSource(ABC):
     """
     Classe base abstrata para fontes de vídeo.
     Define a interface que todas as fontes de vídeo devem implementar.
+
+    Toda fonte numera os frames e registra o instante monotônico da captura.
+    Use read() para obter o frame junto com esses metadados.
     """
-    
+
+    frame_index = -1        # Índice do último frame capturado (-1 = nenhum)
+    last_timestamp = None   # time.monotonic() da última captura
+    geometry = None         # (x, y, w, h) da área capturada na tela, se for uma captura de tela
+
+    def _stamp(self, timestamp=None):
+        """
+        Registra a captura de um novo frame. Deve ser chamado pelas subclasses
+        em get_frame() assim que o frame é obtido.
+        """
+        self.frame_index += 1
+        self.last_timestamp = time.monotonic() if timestamp is None else timestamp
+
+    def read(self):
+        """
+        Captura o próximo frame junto com o índice e o timestamp de captura.
+
+        Returns:
+            CapturedFrame: (image, index, timestamp), ou None se o vídeo acabou.
+        """
+        frame = self.get_frame()
+        if frame is None:
+            return None
+        return CapturedFrame(frame, self.frame_index, self.last_timestamp)
+
     @abstractmethod
     def get_frame(self):
         """
@@ -40,22 +104,113 @@ class FileVideoSource(VideoSource):
     Implementação de fonte de vídeo a partir de um arquivo de vídeo.
     """
     
-    def __init__(self, file_path):
+    def __init__(self, file_path, realtime=False, pool=None):
         """
         Inicializa a fonte de vídeo a partir de um arquivo.
         
         Args:
             file_path (str): Caminho para o arquivo de vídeo.
+            realtime (bool): Reproduz o arquivo no ritmo real (como uma captura ao vivo):
+                             espera quando o consumidor está adiantado e descarta frames
+                             quando está atrasado. O timestamp de cada frame é o instante
+                             em que ele "seria capturado", de forma que a latência sob
+                             carga pode ser medida de forma reproduzível.
+            pool (FramePool): Se fornecido, os frames são decodificados em buffers do pool
+                              (sem alocação por frame). Cada frame só é válido por
+                              pool.size - 1 leituras seguintes.
         """
+        self.file_path = file_path
         self.cap = cv2.VideoCapture(file_path)
         if not self.cap.isOpened():
             raise ValueError(f"Não foi possível abrir o arquivo de vídeo: {file_path}")
         self._fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.realtime = realtime
+        self.pool = pool
+        self._frame_shape = None
+        self.dropped_frames = 0
+        self._position = 0 # Índice do próximo frame do arquivo
+        self._start_time = None
+
+    def _realtime_frame(self):
+        """Lê o frame correspondente ao instante atual da reprodução em tempo real."""
+        fps = self._fps if self._fps and self._fps > 0 else 30.0
+        now = time.monotonic()
+        if self._start_time is None:
+            self._start_time = now
+
+        due_index = int((now - self._start_time) * fps)
+        if due_index < self._position:
+            # Consumidor adiantado: espera o frame "chegar"
+            time.sleep(self._start_time + self._position / fps - now)
+            due_index = self._position
+
+        # Consumidor atrasado: frames que já "passaram" são descartados (grab, sem retrieve)
+        while self._position < due_index:
+            if not self.cap.grab():
+                return None
+            self._position += 1
+            self.dropped_frames += 1
+
+        ret, frame = self._read()
+        if not ret:
+            return None
+        capture_time = self._start_time + self._position / fps
+        self._position += 1
+        self._stamp(capture_time)
+        self.frame_index = self._position - 1
+        return frame
+
+    def _read(self):
+        """cap.read(), decodificando direto em um buffer do pool quando houver."""
+        if self.pool is None or self._frame_shape is None:
+            ret, frame = self.cap.read()
+            if ret:
+                self._frame_shape = frame.shape
+            return ret, frame
+        buf = self.pool.acquire(self._frame_shape)
+        ret, frame = self.cap.read(buf)
+        if ret and frame.shape != self._frame_shape:
+            self._frame_shape = frame.shape
+        return ret, frame
+
+    @property
+    def frame_count(self):
+        """Número de frames informado pelo container (pode ser aproximado; <= 0 se desconhecido)."""
+        return int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    def seek(self, frame_index):
+        """
+        Posiciona a leitura no frame 'frame_index' (o próximo get_frame() o retorna).
+        Em streams sem índice (ex: MJPEG bruto) o seek do OpenCV não tem efeito: nesse
+        caso o arquivo é reaberto e avançado frame a frame (grab).
+        """
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+        if int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)) != frame_index:
+            self.cap.release()
+            self.cap = cv2.VideoCapture(self.file_path)
+            for _ in range(frame_index):
+                if not self.cap.grab():
+                    break
+        self._position = frame_index
+        self._start_time = None
+        # O próximo _stamp() numera o frame lido como 'frame_index'
+        self.frame_index = frame_index - 1
+
+    def skip(self):
+        """Avança um frame sem convertê-lo (cap.grab()). Retorna False no fim do vídeo."""
+        if not self.cap.grab():
+            return False
+        self._position += 1
+        self.frame_index += 1
+        return True
 
     def get_frame(self):
-        ret, frame = self.cap.read()
+        if self.realtime:
+            return self._realtime_frame()
+        ret, frame = self._read()
         if not ret:
             return None
+        self._stamp()
         return frame
 
     def release(self):
@@ -70,14 +225,21 @@ class ScreenVideoSource(VideoSource):
     Implementação de fonte de vídeo a partir de captura de tela.
     """
     
-    def __init__(self, monitor_index=1, bbox=None):
+    def __init__(self, monitor_index=1, bbox=None, target_fps=30.0, pool=None):
         """
         Inicializa a captura de tela.
         
         Args:
             monitor_index (int): Índice do monitor (1, 2, etc.).
             bbox (tuple): Área de captura (top, left, width, height). Se None, captura o monitor inteiro.
+            target_fps (float): Taxa alvo de captura. get_frame() dorme o necessário para não
+                                capturar mais rápido que isso. None desativa o controle de ritmo.
+            pool (FramePool): Se fornecido, a conversão BGRA->BGR escreve em buffers do pool
+                              (sem alocação por frame). Cada frame só é válido por
+                              pool.size - 1 leituras seguintes.
         """
+        # Importação tardia: mss só é necessário para captura de tela
+        import mss
         self.sct = mss.mss()
         # mss monitors: 0 é "todos", 1 é o primeiro, etc.
         print(f"[DEBUG] Monitores detectados: {len(self.sct.monitors)-1}")
@@ -96,15 +258,42 @@ class ScreenVideoSource(VideoSource):
         if bbox:
             # bbox: (x, y, w, h)
             self.monitor = {"top": bbox[1], "left": bbox[0], "width": bbox[2], "height": bbox[3]}
+        self.geometry = (self.monitor["left"], self.monitor["top"], self.monitor["width"], self.monitor["height"])
         
-        self._fps = 30.0 # Valor estimado/alvo
+        self.pool = pool
+        self.target_fps = target_fps
+        self._frame_interval = 1.0 / target_fps if target_fps else 0.0
+        self._next_grab = None
+        self._rate = RateMeter()
+
+    def _pace(self):
+        """Dorme até o horário da próxima captura, se houver taxa alvo."""
+        if not self._frame_interval:
+            return
+        now = time.monotonic()
+        if self._next_grab is not None and now < self._next_grab:
+            time.sleep(self._next_grab - now)
+            now = time.monotonic()
+        # Se atrasamos (pipeline mais lento que o alvo), não acumulamos "dívida":
+        # a próxima captura é agendada a partir de agora.
+        if self._next_grab is None or now - self._next_grab > self._frame_interval:
+            self._next_grab = now + self._frame_interval
+        else:
+            self._next_grab += self._frame_interval
 
     def get_frame(self):
+        self._pace()
         try:
             # grab retorna BGRA
-            img = np.array(self.sct.grab(self.monitor))
+            timestamp = time.monotonic()
+            shot = self.sct.grab(self.monitor)
+            self._stamp(timestamp)
+            self._rate.tick(timestamp)
+            # View sobre os bytes do mss (sem cópia intermediária)
+            img = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
             # Remove canal alpha
-            return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+            dst = self.pool.acquire((shot.height, shot.width, 3)) if self.pool is not None else None
+            return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR, dst=dst)
         except Exception as e:
             print(f"[ERRO] Falha na captura de tela: {e}")
             return None
@@ -112,6 +301,15 @@ class ScreenVideoSource(VideoSource):
     def release(self):
         self.sct.close()
 
+    @property
+    def measured_fps(self):
+        """Taxa real de captura medida (frames/s), ou None antes do segundo frame."""
+        return self._rate.rate
+
     @property
     def fps(self):
-        return self._fps
+        # Prefere a taxa medida; antes de haver medição usa o alvo (ou 30.0 sem alvo)
+        measured = self._rate.rate
+        if measured is not None:
+            return measured
+        return self.target_fps or 30.0
@@ -1,24 +1,95 @@
 import cv2
+import numpy as np
 import sys
 import os
 
 # Adiciona o diretório atual ao path para importações funcionarem
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from input.video_source import FileVideoSource, ScreenVideoSource
+from input.registry import create_source
 from core.detector import Detector
-from core.tracker import MultiObjectTracker
-from core.analyzer import ThimblesAnalyzer
-from utils.visualizer import Visualizer
+from core.session import TrackingSession, TrackingState
+from core.tracker import TRACKER_TYPES
+from utils.visualizer import Visualizer, draw_text
 from utils.window_utils import get_window_rect
+from utils.latency import LatencyTracer
+from utils.buffer_pool import FramePool
+from offline.analyze import default_cup_area
+
+# Opções de linha de comando no formato --nome ou --nome=valor
+DEFAULT_OPTIONS = {
+    "multiprocess": False,   # --multiprocess: captura e análise em processos separados
+    "events_jsonl": None,    # --events-jsonl=ARQUIVO: grava eventos de jogo em JSONL
+    "events_socket": None,   # --events-socket=CAMINHO: publica eventos em um socket Unix
+    "trace_latency": False,  # --trace-latency: histograma de latência captura->decisão ao final
+    "realtime": False,       # --realtime: reproduz arquivos no ritmo real (descarta frames atrasados)
+    "benchmark": False,      # --benchmark: mede latência reproduzindo o arquivo em tempo real, sem janela
+    "cup_area": None,        # --cup-area=x,y,w,h: área dos copos nos modos sem janela (padrão: calibração automática)
+    "headless": False,       # --headless: analisa o arquivo inteiro sem janela (com cache de resultados)
+    "output": None,          # --output=ARQUIVO.npz: grava os tracks por frame do modo headless
+    "cache_dir": None,       # --cache-dir=DIR: diretório do cache de resultados (padrão ~/.cache/thimbles)
+    "cache_max_mb": 2048,    # --cache-max-mb=N: tamanho máximo do cache (remoção LRU)
+    "no_cache": False,       # --no-cache: ignora o cache de resultados
+    "auto": False,           # --auto: calibra área do jogo e dos copos automaticamente (sem selectROI)
+    "calibration_cache": None, # --calibration-cache=ARQUIVO: cache das calibrações por geometria
+    "index_rounds": False,   # --index-rounds: indexa as rodadas do arquivo (passada rápida, sem rastreadores)
+    "round_index": None,     # --round-index=ARQUIVO: índice de rodadas (padrão VIDEO.rounds.json)
+    "round": None,           # --round=N: analisa apenas a rodada N do índice (modo headless)
+    "by_round": False,       # --by-round: analisa as rodadas do índice em paralelo (modo headless)
+    "processes": None,       # --processes=N: processos usados por --by-round/--chunked/--two-pass (padrão: nº de CPUs)
+    "chunked": False,        # --chunked: divide um vídeo longo em trechos analisados em paralelo (modo headless)
+    "chunk_overlap": 30,     # --chunk-overlap=N: frames de sobreposição entre trechos sem índice de rodadas
+    "preview": None,         # --preview[=PORTA]: transmite o monitoramento como MJPEG em http://127.0.0.1:PORTA/ (padrão 8080)
+    "preview_fps": 10,       # --preview-fps=N: taxa máxima do preview HTTP
+    "preview_width": 960,    # --preview-width=N: largura máxima do preview HTTP
+    "no_window": False,      # --no-window: não abre janelas (implica --auto; use com --preview)
+    "detect_every_frame": False, # --detect-every-frame: desliga o agendamento da detecção da bola por cor
+    "two_pass": False,       # --two-pass: análise headless em duas passadas (detecção paralela + suavização)
+    "regions": None,         # --regions=x,y,w,h;x,y,w,h: várias mesas a partir de uma única captura
+    "workers": None,         # --workers=N: threads que processam as regiões (padrão: uma por região)
+    "tracker": "CSRT",       # --tracker=CSRT|KCF|MIL: rastreador dos copos (KCF/MIL: mais baratos; as hipóteses de identidade compensam trocas)
+}
+
+def parse_options(argv):
+    """
+    Separa as opções (--nome[=valor]) dos argumentos posicionais.
+
+    Returns:
+        tuple: (lista de argumentos posicionais, dicionário de opções)
+    """
+    options = dict(DEFAULT_OPTIONS)
+    positional = []
+    for arg in argv:
+        if not arg.startswith("--"):
+            positional.append(arg)
+            continue
+        name, _, value = arg[2:].partition("=")
+        name = name.replace("-", "_")
+        if name not in options:
+            print(f"[AVISO] Opção desconhecida ignorada: {arg}")
+            continue
+        options[name] = value if value else True
+
+    # Validado aqui: um nome errado só falharia dentro dos workers, ao criar o rastreador
+    tracker = str(options["tracker"]).upper()
+    if tracker not in TRACKER_TYPES:
+        print(f"[ERRO] Rastreador inválido: --tracker={options['tracker']}. Opções: {', '.join(TRACKER_TYPES)}.")
+        sys.exit(2)
+    options["tracker"] = tracker
+    return positional, options
 
 def main():
     use_screen = False
     video_path = None
+
+    args, options = parse_options(sys.argv[1:])
+    if options["no_window"]:
+        # Sem janelas não há selectROI: a configuração precisa ser automática
+        options["auto"] = True
     
     # Argumentos
-    if len(sys.argv) > 1:
-        arg = sys.argv[1]
+    if len(args) > 0:
+        arg = args[0]
         if arg.lower() == "screen":
             use_screen = True
         elif os.path.exists(arg):
@@ -30,7 +101,7 @@ def main():
             if found_rect:
                 print(f"[INFO] Janela encontrada! Área: {found_rect}")
                 # Inicia direto com a área da janela
-                start_live_tracking(found_rect)
+                start_live_tracking(found_rect, options)
                 return
             else:
                 print(f"[AVISO] Arquivo ou janela '{arg}' não encontrado. Usando modo seleção manual.")
@@ -54,16 +125,41 @@ def main():
 
     # 1. Inicialização (Modo Manual ou Arquivo)
     try:
-        if use_screen:
-            start_live_tracking(None)
+        if options["regions"]:
+            run_multi_region(video_path, options)
+        elif use_screen:
+            start_live_tracking(None, options)
         else:
             print(f"[INFO] Processando arquivo de vídeo: {video_path}")
-            run_tracker(FileVideoSource(video_path))
+            if options["benchmark"]:
+                run_latency_benchmark(video_path, options)
+            elif options["index_rounds"]:
+                run_round_indexing(video_path, options)
+            elif options["headless"] and (options["round"] or options["by_round"]):
+                run_headless_rounds(video_path, options)
+            elif options["headless"] and options["chunked"]:
+                run_headless_chunked(video_path, options)
+            elif options["headless"]:
+                run_headless(video_path, options)
+            else:
+                start_tracking(options, "file", video_path, realtime=bool(options["realtime"]))
             
     except ValueError as e:
         print(e)
 
-def start_live_tracking(bbox):
+def start_tracking(options, source_kind, *source_args, **source_kwargs):
+    """
+    Cria a fonte registrada como 'source_kind' e inicia o rastreamento,
+    no mesmo processo ou no pipeline multiprocesso.
+    """
+    if options["multiprocess"]:
+        run_tracker_multiprocess(options, source_kind, *source_args, **source_kwargs)
+    else:
+        # Frames decodificados/capturados em buffers reutilizados (sem alocação por frame)
+        source_kwargs.setdefault("pool", FramePool())
+        run_tracker(create_source(source_kind, *source_args, **source_kwargs), options)
+
+def start_live_tracking(bbox, options=DEFAULT_OPTIONS):
     """
     Inicia o rastreamento em tempo real da tela.
     Se bbox for None, pede seleção manual.
@@ -71,11 +167,22 @@ def start_live_tracking(bbox):
     if bbox:
         # Ajuste fino: mss precisa de inteiros
         bbox = tuple(map(int, bbox))
-        source = ScreenVideoSource(monitor_index=1, bbox=bbox)
+        start_tracking(options, "screen", monitor_index=1, bbox=bbox)
     else:
+        if options["auto"]:
+            game_bbox = auto_game_area(options)
+            if game_bbox:
+                print(f"[INFO] Área do jogo calibrada automaticamente: {game_bbox}")
+                start_tracking(options, "screen", monitor_index=1, bbox=game_bbox)
+                return
+            if options["no_window"]:
+                print("[ERRO] Calibração automática da área do jogo falhou (sem janela para seleção manual).")
+                return
+            print("[AVISO] Calibração automática da área do jogo falhou. Usando seleção manual.")
+
         # Captura inicial para seleção
         print("[INFO] Inicializando Modo AO VIVO...")
-        temp_source = ScreenVideoSource(monitor_index=1)
+        temp_source = create_source("screen", monitor_index=1)
         frame_full = temp_source.get_frame()
         temp_source.release()
         
@@ -118,300 +225,679 @@ def start_live_tracking(bbox):
             print(f"[INFO] Área definida: {final_bbox}")
             
             # Inicia captura restrita à área selecionada
-            source = ScreenVideoSource(monitor_index=1, bbox=final_bbox)
-            run_tracker(source)
+            start_tracking(options, "screen", monitor_index=1, bbox=final_bbox)
 
-def run_tracker(source):
-    """Loop principal de rastreamento"""
-    detector = Detector()
-    tracker_cups = MultiObjectTracker(tracker_type='CSRT')
-    analyzer = ThimblesAnalyzer()
-    visualizer = Visualizer()
+def open_calibration(options):
+    """CalibrationCache das opções, ou None se a calibração automática está desligada."""
+    if not options["auto"]:
+        return None
+    from core.calibration import CalibrationCache
+    return CalibrationCache(options["calibration_cache"])
+
+def auto_game_area(options, num_frames=8):
+    """
+    Calibração automática da área do jogo no monitor inteiro: usa o cache pela geometria
+    do monitor ou analisa alguns frames (movimento + layout de bordas).
+
+    Returns:
+        tuple: (x, y, w, h) em coordenadas globais da tela, ou None.
+    """
+    from core.calibration import find_game_area
+
+    calibration = open_calibration(options)
+    source = create_source("screen", monitor_index=1)
+    try:
+        geometry = source.geometry
+        cached = calibration.get("game", geometry)
+        if cached:
+            return cached
+        frames = []
+        for _ in range(num_frames):
+            frame = source.get_frame()
+            if frame is None:
+                break
+            frames.append(frame.copy())
+    finally:
+        source.release()
 
-    print("[INFO] Iniciando Preview AO VIVO...")
-    print(">>> Pressione 'S' para iniciar a configuração (Seleção de Objetos) <<<")
+    area = find_game_area(frames)
+    if area is None:
+        return None
+    # Coordenadas relativas ao monitor -> globais (como espera o mss)
+    game_bbox = (area[0] + geometry[0], area[1] + geometry[1], area[2], area[3])
+    calibration.put("game", geometry, game_bbox)
+    return game_bbox
+
+def auto_configure_cups(source, detector, calibration):
+    """
+    Configuração sem interação: encontra a região dos 3 copos (ou usa a do cache para
+    esta geometria de captura) e detecta os copos nela.
+
+    Returns:
+        tuple: (first_frame, cup_bboxes, scale_factor) ou None se a calibração falhou.
+    """
+    from core.calibration import find_cup_region
+
+    first_frame = source.get_frame()
+    if first_frame is None:
+        return None
+    # Fontes sem geometria de tela (arquivos, ring do multiprocesso) não usam o cache
+    geometry = source.geometry
+    cup_area = calibration.get("cups", geometry)
+    if cup_area is None:
+        cup_area = find_cup_region(first_frame)
+        if cup_area is None:
+            return None
+        calibration.put("cups", geometry, cup_area)
+
+    print(f"[INFO] Área dos copos calibrada automaticamente: {cup_area}")
+    cup_bboxes = detector.detect_cups_in_area(first_frame, cup_area)
+    print(f"[INFO] {len(cup_bboxes)} copos identificados.")
+    return first_frame, cup_bboxes, display_scale(first_frame)
+
+def scale_bbox(bbox, factor):
+    """Converte uma bbox da escala de exibição de volta para a escala original."""
+    if not bbox: return None
+    return tuple(int(v / factor) for v in bbox)
+
+def display_scale(frame):
+    """Fator de escala usado para exibir o frame com no máximo 1280px de largura."""
+    width = frame.shape[1]
+    return 1280 / width if width > 1280 else 1.0
+
+def make_display_frame(frame, scale_factor, pool=None):
+    """
+    Cria a cópia (ou versão reduzida) do frame usada para exibição.
+    Com um FramePool, escreve em um buffer reutilizado em vez de alocar.
+    """
+    if scale_factor != 1.0:
+        orig_height = frame.shape[0]
+        size = (1280, int(orig_height * scale_factor))
+        dst = pool.acquire((size[1], size[0], frame.shape[2])) if pool is not None else None
+        return cv2.resize(frame, size, dst=dst)
+    if pool is not None:
+        dst = pool.acquire(frame.shape)
+        np.copyto(dst, frame)
+        return dst
+    return frame.copy()
+
+# Frames tentados pela calibração automática dos copos antes de desistir (modo sem janela)
+AUTO_CONFIGURE_ATTEMPTS = 150
+
+def configure_cups(source, detector, calibration=None, interactive=True):
+    """
+    Fases 1 e 2: preview ao vivo até o usuário pressionar 'S' e seleção da área dos copos.
+    Se a seleção for cancelada, volta ao preview.
+    Com um CalibrationCache, tenta antes a configuração automática (sem interação).
+
+    Returns:
+        tuple: (first_frame, cup_bboxes, scale_factor) ou None se o usuário saiu (ESC),
+               a fonte parou de entregar frames ou a calibração falhou sem 'interactive'.
+    """
+    if calibration is not None:
+        # Sem janela não há alternativa manual: tenta de novo nos próximos frames
+        # (ex: copos em movimento no frame atual)
+        attempts = 1 if interactive else AUTO_CONFIGURE_ATTEMPTS
+        for _ in range(attempts):
+            config = auto_configure_cups(source, detector, calibration)
+            if config is not None:
+                return config
+        if not interactive:
+            print("[ERRO] Calibração automática dos copos falhou (sem janela para seleção manual).")
+            return None
+        print("[AVISO] Calibração automática dos copos falhou. Usando seleção manual.")
 
-    # --- FASE 1: LIVE PREVIEW ---
-    # Mostra o vídeo ao vivo até o usuário decidir configurar
-    first_frame = None
     while True:
-        frame = source.get_frame()
-        if frame is None:
-            print("[ERRO] Falha ao ler frame.")
-            return
+        print("[INFO] Iniciando Preview AO VIVO...")
+        print(">>> Pressione 'S' para iniciar a configuração (Seleção de Objetos) <<<")
 
-        # Redimensionar para visualização
-        orig_height, orig_width = frame.shape[:2]
-        scale_factor = 1.0
-        if orig_width > 1280:
-            scale_factor = 1280 / orig_width
-            frame_disp = cv2.resize(frame, (1280, int(orig_height * scale_factor)))
-        else:
-            frame_disp = frame.copy()
+        # --- FASE 1: LIVE PREVIEW ---
+        # Mostra o vídeo ao vivo até o usuário decidir configurar
+        first_frame = None
+        while True:
+            frame = source.get_frame()
+            if frame is None:
+                print("[ERRO] Falha ao ler frame.")
+                return None
 
-        # Overlay de Instrução
-        cv2.putText(frame_disp, "MODO PREVIEW - AGUARDANDO JOGO", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        cv2.putText(frame_disp, "Pressione 'S' para Configurar Objetos", (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-        
-        cv2.imshow("Thimbles AI - MONITORAMENTO AO VIVO", frame_disp)
-        
-        key = cv2.waitKey(1) & 0xFF
-        if key == 27: # ESC
-            print("[INFO] Encerrando.")
-            source.release()
-            cv2.destroyAllWindows()
-            return
-        elif key == ord('s') or key == ord('S'):
-            # Captura o frame ATUAL para usar na configuração
-            first_frame = frame
-            break
-    
-    # --- FASE 2: CONFIGURAÇÃO SIMPLIFICADA ---
-    
-    # Redimensionar frame de seleção também se necessário
+            # Redimensionar para visualização
+            scale_factor = display_scale(frame)
+            frame_disp = make_display_frame(frame, scale_factor)
+
+            # Overlay de Instrução
+            draw_text(frame_disp, "MODO PREVIEW - AGUARDANDO JOGO", (10, 30), 0.7, (0, 255, 0), 2)
+            draw_text(frame_disp, "Pressione 'S' para Configurar Objetos", (10, 70), 0.7, (255, 255, 255), 2)
+
+            cv2.imshow("Thimbles AI - MONITORAMENTO AO VIVO", frame_disp)
+
+            key = cv2.waitKey(1) & 0xFF
+            if key == 27: # ESC
+                print("[INFO] Encerrando.")
+                return None
+            elif key == ord('s') or key == ord('S'):
+                # Captura o frame ATUAL para usar na configuração
+                first_frame = frame
+                break
+
+        # --- FASE 2: CONFIGURAÇÃO SIMPLIFICADA ---
+
+        # Redimensionar frame de seleção também se necessário
+        first_frame_disp = make_display_frame(first_frame, scale_factor)
+
+        print("\n--- CONFIGURAÇÃO AUTOMÁTICA ---")
+        print("Selecione a ÁREA RETANGULAR que engloba os 3 COPOS.")
+
+        # Adiciona instrução visual
+        cv2.putText(first_frame_disp, "PASSO 2: ARRASTE SOBRE OS 3 COPOS", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 255), 3)
+        cv2.putText(first_frame_disp, "Pressione ENTER apos desenhar", (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+
+        # Seleção de área única para os copos usando selectROI (singular)
+        # Isso evita o bug de criar múltiplas telas ou travar esperando ESC
+        roi_rect_disp = detector.select_roi_manually(first_frame_disp, "2. Selecione a AREA DOS 3 COPOS (Enter)")
+
+        if roi_rect_disp is None:
+            print("[ERRO] Seleção cancelada. Voltando...")
+            continue
+
+        # Converter coordenadas de volta para escala original
+        roi_rect_orig = scale_bbox(roi_rect_disp, scale_factor)
+
+        # Detecção Automática dos 3 Copos na Área
+        print("[INFO] Detectando copos automaticamente na área...")
+        cup_bboxes = detector.detect_cups_in_area(first_frame, roi_rect_orig)
+
+        print(f"[INFO] {len(cup_bboxes)} copos identificados.")
+        return first_frame, cup_bboxes, scale_factor
+
+def draw_state(frame_disp, state, scale_factor, visualizer):
+    """
+    Desenha o estado de rastreamento (copos, bola, alvo e status) no frame de exibição.
+    """
+    # Desenhar no frame de exibição (escalando as coordenadas)
     if scale_factor != 1.0:
-        first_frame_disp = cv2.resize(first_frame, (1280, int(orig_height * scale_factor)))
+        cups_boxes_disp = []
+        for box in state.cups_boxes:
+            if box: cups_boxes_disp.append(tuple(int(v * scale_factor) for v in box))
+            else: cups_boxes_disp.append(None)
+
+        ball_box_disp = tuple(int(v * scale_factor) for v in state.ball_box) if state.ball_box else None
     else:
-        first_frame_disp = first_frame.copy()
-        
-    print("\n--- CONFIGURAÇÃO AUTOMÁTICA ---")
-    print("Selecione a ÁREA RETANGULAR que engloba os 3 COPOS.")
-    
-    # Adiciona instrução visual
-    cv2.putText(first_frame_disp, "PASSO 2: ARRASTE SOBRE OS 3 COPOS", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 255), 3)
-    cv2.putText(first_frame_disp, "Pressione ENTER apos desenhar", (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-    
-    # Seleção de área única para os copos usando selectROI (singular)
-    # Isso evita o bug de criar múltiplas telas ou travar esperando ESC
-    roi_rect_disp = detector.select_roi_manually(first_frame_disp, "2. Selecione a AREA DOS 3 COPOS (Enter)")
-    
-    if roi_rect_disp is None:
-        print("[ERRO] Seleção cancelada. Voltando...")
-        run_tracker(source)
+        cups_boxes_disp = state.cups_boxes
+        ball_box_disp = state.ball_box
+
+    visualizer.draw_tracking(frame_disp, cups_boxes_disp, ball_box_disp, state.target_idx, state.is_ball_hidden)
+
+    # Overlay de Status
+    visualizer.draw_status(frame_disp, state.tracking_ball, state.waiting_ball)
+    return frame_disp
+
+def open_preview(options):
+    """PreviewServer das opções, ou None se o preview HTTP está desligado."""
+    if not options["preview"]:
+        return None
+    from utils.preview_server import PreviewServer
+    port = 8080 if options["preview"] is True else int(options["preview"])
+    try:
+        preview = PreviewServer(port, max_fps=float(options["preview_fps"]), max_width=int(options["preview_width"]))
+    except OSError as e:
+        import errno
+        reason = "em uso" if e.errno == errno.EADDRINUSE else f"indisponível ({e.strerror or e})"
+        print(f"[ERRO] Porta {port} {reason}: preview HTTP desativado. Escolha outra com --preview=PORTA.")
+        return None
+    print(f"[INFO] Preview HTTP em {preview.url}")
+    return preview
+
+def close_preview(preview):
+    if preview is None:
         return
+    preview.close()
+    print(f"[INFO] Preview: {preview.encoded} frames enviados, {preview.skipped} ignorados.")
 
-    # Converter coordenadas de volta para escala original
-    def scale_bbox(bbox, factor):
-        if not bbox: return None
-        return tuple(int(v / factor) for v in bbox)
-        
-    roi_rect_orig = scale_bbox(roi_rect_disp, scale_factor)
-    
-    # Detecção Automática dos 3 Copos na Área
-    print("[INFO] Detectando copos automaticamente na área...")
-    cup_bboxes = detector.detect_cups_in_area(first_frame, roi_rect_orig)
-    
-    # SALVAR POSIÇÕES INICIAIS (HOME) para resetar em novos jogos
-    initial_cups_bboxes = list(cup_bboxes)
-    
-    print(f"[INFO] {len(cup_bboxes)} copos identificados.")
-    
-    # Inicializar rastreador de copos
-    tracker_cups.initialize(first_frame, cup_bboxes)
-    
-    # Bola começa como None (será detectada automaticamente)
-    tracker_ball = None
-    ball_bbox = None
-    analyzer.initialize(None, cup_bboxes)
-
-    # Calcular área média dos copos para servir de referência para a bola
-    # A bola deve ser menor que um copo (ex: 50% da área)
-    avg_cup_area = 0
-    if len(cup_bboxes) > 0:
-        total_area = sum([w*h for (_,_,w,h) in cup_bboxes])
-        avg_cup_area = total_area / len(cup_bboxes)
-    
-    # Limite máximo para a bola (Aumentei para 120% para ser mais tolerante)
-    max_ball_area = avg_cup_area * 1.2 if avg_cup_area > 0 else None
+def show_frame(frame_disp, options, preview=None):
+    """
+    Entrega o frame de monitoramento à janela e/ou ao preview HTTP.
 
-    print("\n[INFO] RASTREAMENTO INICIADO! Aguardando detecção da bola...")
-    
-    # --- FASE 3: LOOP DE RASTREAMENTO ---
-    while True:
-        frame = source.get_frame()
-        if frame is None:
-            break
+    Returns:
+        int: Tecla pressionada (waitKey), ou -1 sem janela.
+    """
+    if preview is not None:
+        preview.submit(frame_disp)
+    if options["no_window"]:
+        return -1
+    cv2.imshow("Thimbles AI - MONITORAMENTO AO VIVO", frame_disp)
+    return cv2.waitKey(1) & 0xFF
 
-        if scale_factor != 1.0:
-             frame_disp = cv2.resize(frame, (1280, int(orig_height * scale_factor)))
-        else:
-             frame_disp = frame.copy() 
+def open_event_bus(options):
+    """
+    Cria o EventBus com os sinks pedidos nas opções, ou (None, []) se nenhum.
+    """
+    if not (options["events_jsonl"] or options["events_socket"]):
+        return None, []
+    from core.events import create_event_bus
+    return create_event_bus(options["events_jsonl"], options["events_socket"])
 
-        # 1. Atualizar rastreadores dos COPOS primeiro (Referência)
-        ok_cups, cups_boxes = tracker_cups.update(frame)
+def close_event_bus(bus, sinks):
+    """Despacha eventos pendentes, fecha os sinks e mostra a latência captura -> evento."""
+    if bus is None:
+        return
+    bus.close()
+    for sink in sinks:
+        sink.close()
+    summary = bus.latency_summary()
+    if summary:
+        print(f"[INFO] Latência captura->evento: {summary['count']} eventos, "
+              f"média {summary['mean_ms']:.1f} ms, p95 {summary['p95_ms']:.1f} ms, "
+              f"máx {summary['max_ms']:.1f} ms (descartados: {bus.dropped})")
 
-        # 2. Tentar detectar a bola se ainda não estiver rastreando
-        # OU periodicamente para corrigir o tracker (Ressincronização)
-        found_ball_color = detector.detect_ball_automatically(frame, max_area=max_ball_area)
-        
-        # LÓGICA DE RESET DOS COPOS (AUTO-CORREÇÃO DE DRIFT/SWAP)
-        # Se a bola está visível (provável início/fim de jogo) e os copos estão PERTO das posições iniciais...
-        if found_ball_color and initial_cups_bboxes:
-             # Verificar se os copos atuais estão próximos das posições iniciais (HOME)
-             is_at_home = True
-             total_displacement = 0
-             
-             # Comparar box atual com box inicial (assumindo mesma ordem, mas verificando proximidade espacial geral)
-             # Na verdade, precisamos saber se o "cenário" voltou ao normal.
-             # Vamos checar se existe UM copo atual perto de CADA copo inicial.
-             
-             matched_count = 0
-             for init_box in initial_cups_bboxes:
-                 if not init_box: continue
-                 ix, iy, iw, ih = init_box
-                 icx, icy = ix + iw/2, iy + ih/2
-                 
-                 found_match = False
-                 for curr_box in cups_boxes:
-                     if not curr_box: continue
-                     cx, cy, cw, ch = curr_box
-                     ccx, ccy = cx + cw/2, cy + ch/2
-                     
-                     # Distância < 50 pixels
-                     if ((icx - ccx)**2 + (icy - ccy)**2)**0.5 < 50:
-                         found_match = True
-                         break
-                 if found_match:
-                     matched_count += 1
-             
-             # Se todos os copos iniciais têm um correspondente atual próximo, o jogo resetou visualmente.
-             # MAS os trackers podem estar trocados (swap).
-             # Então forçamos um RESET COMPLETO dos trackers para garantir IDs corretos.
-             if matched_count == len(initial_cups_bboxes) and len(initial_cups_bboxes) > 0:
-                  # print("[DEBUG] Cenário resetado detectado. Reiniciando rastreadores de copos para corrigir trocas.")
-                  tracker_cups.initialize(frame, initial_cups_bboxes)
-                  cups_boxes = list(initial_cups_bboxes) # Atualiza boxes para o frame atual
-                  ok_cups = True
-
-        # FILTRO DE ZONA DE JOGO (NOVO): 
-        # Ignorar detecções muito longe dos copos (verticalmente) para evitar botões
-        if found_ball_color:
-            bx, by, bw, bh = found_ball_color
-            b_center_y = by + bh/2
-            
-            min_y = float('inf')
-            max_y = float('-inf')
-            has_cups = False
-            
-            for c_box in cups_boxes:
-                if c_box:
-                    cx, cy, cw, ch = c_box
-                    if cy < min_y: min_y = cy
-                    if cy + ch > max_y: max_y = cy + ch
-                    has_cups = True
-            
-            if has_cups:
-                # Aumentei a margem para 300px para garantir que pegue a bola em qualquer posição inicial
-                margin_top = 300
-                margin_bottom = 300
-                
-                if not ((min_y - margin_top) < b_center_y < (max_y + margin_bottom)):
-                    # print(f"[DEBUG] Bola ignorada (fora da zona Y): {b_center_y}")
-                    found_ball_color = None
-
-        # Filtrar falsos positivos da bola se ela estiver "escondida"
-        if analyzer.is_ball_hidden and found_ball_color:
-            bx, by, bw, bh = found_ball_color
-            b_center = (bx + bw/2, by + bh/2)
-            
-            is_noise = False
-            for c_box in cups_boxes:
-                if not c_box: continue
-                cx, cy, cw, ch = c_box
-                # Se o centro da "bola" estiver dentro de um copo, é provável que seja o próprio copo
-                # (reflexo, detalhe vermelho, etc)
-                if (cx < b_center[0] < cx+cw) and (cy < b_center[1] < cy+ch):
-                    is_noise = True
-                    break
-            
-            if is_noise:
-                # print("[DEBUG] Ignorando detecção de bola dentro do copo (falso positivo)")
-                found_ball_color = None
-
-        ball_box_curr = None
-
-        if tracker_ball is None:
-            if found_ball_color:
-                print("[INFO] BOLA DETECTADA! Iniciando rastreamento.")
-                ball_bbox = found_ball_color
-                tracker_ball = MultiObjectTracker(tracker_type='CSRT')
-                tracker_ball.initialize(frame, [ball_bbox])
-                analyzer.initialize(ball_bbox, cups_boxes) # Reinicia analyzer com a bola
-                ball_box_curr = ball_bbox
-            else:
-                # Mensagem mais clara para o usuário
-                cv2.putText(frame_disp, "JOGUE PARA REVELAR A BOLA", (10, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-        else:
-            # Se já estamos rastreando, verificamos se a detecção por cor diverge muito do tracker
-            ok_ball, ball_boxes = tracker_ball.update(frame)
-            
-            # Caixa atual do tracker
-            current_tracker_box = ball_boxes[0] if (ok_ball and len(ball_boxes) > 0) else None
-            
-            should_reset = False
-            
-            if found_ball_color:
-                if current_tracker_box is None:
-                    should_reset = True
-                else:
-                    t_box = current_tracker_box
-                    # Calcular distância entre centro do tracker e centro da cor
-                    tx, ty, tw, th = t_box
-                    cx, cy, cw, ch = found_ball_color
-                    
-                    dist = ((tx+tw/2) - (cx+cw/2))**2 + ((ty+th/2) - (cy+ch/2))**2
-                    # Se a distância for grande (ex: mais que 50 pixels), o tracker está errado ou é um novo jogo
-                    if dist > 2500: # 50^2
-                         print("[INFO] Ressincronizando tracker com detecção de cor...")
-                         should_reset = True
-            
-            if should_reset and found_ball_color:
-                ball_bbox = found_ball_color
-                tracker_ball = MultiObjectTracker(tracker_type='CSRT')
-                tracker_ball.initialize(frame, [ball_bbox])
-                analyzer.update(ball_bbox, cups_boxes) # Atualiza analyzer forçadamente
-                ball_box_curr = ball_bbox
-            else:
-                ball_box_curr = current_tracker_box
+def run_tracker(source, options=DEFAULT_OPTIONS):
+    """Loop principal de rastreamento"""
+    bus, sinks = open_event_bus(options)
+    preview = open_preview(options)
+    try:
+        _run_tracker(source, options, bus, preview)
+    finally:
+        close_preview(preview)
+        close_event_bus(bus, sinks)
 
-            # Se perdemos o tracker e não achamos cor, o ball_box_curr fica None, o que é correto (bola oculta ou perdida)
-            if ball_box_curr is None and not found_ball_color:
-                 tracker_ball = None # Encerra tracker se perdeu tudo 
-        
-        analyzer.update(ball_box_curr, cups_boxes)
-        target_idx, _ = analyzer.get_target_cup()
-        
-        # Desenhar no frame de exibição (escalando as coordenadas)
-        if scale_factor != 1.0:
-            cups_boxes_disp = []
-            for box in cups_boxes:
-                if box: cups_boxes_disp.append(tuple(int(v * scale_factor) for v in box))
-                else: cups_boxes_disp.append(None)
-            
-            ball_box_disp = tuple(int(v * scale_factor) for v in ball_box_curr) if ball_box_curr else None
-        else:
-            cups_boxes_disp = cups_boxes
-            ball_box_disp = ball_box_curr
+# Estados do loop de rastreamento ao vivo
+STATE_CONFIGURE = "configure"
+STATE_TRACKING = "tracking"
+STATE_EXIT = "exit"
 
-        visualizer.draw_tracking(frame_disp, cups_boxes_disp, ball_box_disp, target_idx, analyzer.is_ball_hidden)
-        
-        # Overlay de Status
-        status_color = (0, 255, 0) if tracker_ball else (0, 255, 255)
-        status_text = "EM JOGO" if tracker_ball else "AGUARDANDO BOLA"
-        cv2.putText(frame_disp, f"STATUS: {status_text}", (10, orig_height - 20 if scale_factor == 1.0 else frame_disp.shape[0]-20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, status_color, 2)
+def _run_tracker(source, options, bus, preview=None, on_frame=None):
+    """
+    Máquina de estados do rastreamento: CONFIGURE -> TRACKING -> (reset 'r') CONFIGURE ... -> EXIT.
+    A fonte, o detector, a sessão e os buffers de exibição são reaproveitados entre
+    reinícios; os rastreadores da configuração anterior são liberados antes da próxima.
+
+    Args:
+        on_frame: Função (frame_disp) -> tecla. Padrão: show_frame (janela e/ou preview).
+    """
+    if on_frame is None:
+        on_frame = lambda frame_disp: show_frame(frame_disp, options, preview)
+    detector = Detector()
+    session = TrackingSession(detector=detector, tracker_type=options["tracker"], events=bus,
+                              adaptive_detection=not options["detect_every_frame"])
+    visualizer = Visualizer()
+    display_pool = FramePool(size=1)
+    calibration = open_calibration(options)
+    tracer = None
+    scale_factor = 1.0
+    state = STATE_CONFIGURE
 
-        cv2.imshow("Thimbles AI - MONITORAMENTO AO VIVO", frame_disp)
+    while state != STATE_EXIT:
+        if state == STATE_CONFIGURE:
+            session.stop()
+            config = configure_cups(source, detector, calibration, interactive=not options["no_window"])
+            if config is None:
+                state = STATE_EXIT
+                continue
+            first_frame, cup_bboxes, scale_factor = config
+            tracer = LatencyTracer() if options["trace_latency"] else None
+            session.tracer = tracer
+            session.start(first_frame, cup_bboxes)
+            print("\n[INFO] RASTREAMENTO INICIADO! Aguardando detecção da bola...")
+            state = STATE_TRACKING
+            continue
+
+        # --- FASE 3: LOOP DE RASTREAMENTO ---
+        captured = source.read()
+        if captured is None:
+            state = STATE_EXIT
+            continue
+        frame = captured.image
+        if tracer: tracer.begin(captured.index, captured.timestamp)
+
+        frame_disp = make_display_frame(frame, scale_factor, display_pool)
+        if tracer: tracer.mark("display_copy")
+
+        tracking_state = session.process(frame, captured.index, captured.timestamp)
+        draw_state(frame_disp, tracking_state, scale_factor, visualizer)
+        if tracer: tracer.mark("draw")
+
+        key = on_frame(frame_disp)
+        if tracer:
+            tracer.mark("display")
+            tracer.end()
         
-        key = cv2.waitKey(1) & 0xFF
         if key == 27: # ESC
-            break
+            state = STATE_EXIT
         elif key == ord('r'): # Reset
             print("[INFO] Reiniciando configuração...")
-            run_tracker(source)
+            if tracer: print(tracer.report())
+            if calibration is not None:
+                # Reset manual: a calibração salva pode estar errada, recalibra
+                calibration.invalidate("cups", source.geometry)
+            state = STATE_CONFIGURE
+
+    if tracer: print(tracer.report())
+    if session.scheduler is not None: print(f"[INFO] {session.scheduler.format()}")
+    session.stop()
+    source.release()
+    if not options["no_window"]: cv2.destroyAllWindows()
+
+def parse_bbox(text):
+    """Converte 'x,y,w,h' em tupla de inteiros."""
+    values = tuple(int(v) for v in text.split(","))
+    if len(values) != 4:
+        raise ValueError(f"Área inválida (esperado x,y,w,h): {text}")
+    return values
+
+def warn_no_latency_trace(options, mode):
+    """Avisa que --trace-latency não é suportado em 'mode' (a opção é ignorada)."""
+    if options["trace_latency"]:
+        print(f"[AVISO] --trace-latency não é suportado {mode}; opção ignorada.")
+
+def run_headless(video_path, options):
+    """
+    Análise offline sem janela nem interação. Resultados repetidos (mesmo vídeo,
+    configuração e código) voltam direto do cache.
+    """
+    import time
+    from offline.analyze import analyze_file
+    from offline.cache import ResultCache
+
+    cache = None
+    if not options["no_cache"]:
+        cache = ResultCache(options["cache_dir"], max_bytes=int(options["cache_max_mb"]) * 1024**2)
+    cup_area = parse_bbox(options["cup_area"]) if options["cup_area"] else None
+    tracer = None
+    if options["two_pass"]:
+        warn_no_latency_trace(options, "com --two-pass")
+    elif options["trace_latency"]:
+        tracer = LatencyTracer()
+
+    bus, sinks = open_event_bus(options)
+    start = time.monotonic()
+    try:
+        log, from_cache = analyze_file(video_path, cup_area, tracker_type=options["tracker"], cache=cache, events=bus,
+                                       adaptive_detection=not options["detect_every_frame"],
+                                       two_pass=bool(options["two_pass"]),
+                                       processes=int(options["processes"]) if options["processes"] else None,
+                                       tracer=tracer)
+    finally:
+        close_event_bus(bus, sinks)
+    elapsed = time.monotonic() - start
+
+    origin = "cache" if from_cache else "análise"
+    print(f"[INFO] {len(log)} frames ({origin}) em {elapsed:.2f} s.")
+    if tracer and from_cache:
+        print("[AVISO] Resultado do cache: latência não medida (use --no-cache).")
+    elif tracer:
+        print(tracer.report())
+    if options["output"]:
+        log.save(options["output"])
+        print(f"[INFO] Tracks salvos em {options['output']}")
+
+def run_round_indexing(video_path, options):
+    """Passada rápida que localiza as rodadas do vídeo e grava o índice em JSON."""
+    warn_no_latency_trace(options, "com --index-rounds")
+    import time
+    from offline.rounds import build_round_index, default_index_path, save_round_index
+
+    cup_area = parse_bbox(options["cup_area"]) if options["cup_area"] else None
+    start = time.monotonic()
+    index = build_round_index(video_path, cup_area)
+    elapsed = time.monotonic() - start
+
+    path = options["round_index"] or default_index_path(video_path)
+    save_round_index(index, path)
+    print(f"[INFO] {len(index['rounds'])} rodadas em {index['frame_count']} frames ({elapsed:.2f} s).")
+    for r in index["rounds"]:
+        print(f"  Rodada {r['number']}: frames {r['start']}-{r['end']} "
+              f"(embaralha em {r['shuffle_start']}, revela em {r['reveal']})")
+    print(f"[INFO] Índice salvo em {path}")
+
+def run_headless_rounds(video_path, options):
+    """
+    Análise headless usando o índice de rodadas: uma rodada específica (--round=N),
+    posicionando o vídeo direto nela, ou todas as rodadas em paralelo (--by-round).
+    """
+    warn_no_latency_trace(options, "com --round/--by-round")
+    import os
+    import time
+    from offline.rounds import (analyze_round, analyze_rounds_parallel, build_round_index,
+                                default_index_path, load_round_index, save_round_index)
+
+    path = options["round_index"] or default_index_path(video_path)
+    if os.path.exists(path):
+        index = load_round_index(path)
+    else:
+        print("[INFO] Índice de rodadas não encontrado. Indexando...")
+        index = build_round_index(video_path, parse_bbox(options["cup_area"]) if options["cup_area"] else None)
+        save_round_index(index, path)
+
+    start = time.monotonic()
+    if options["round"]:
+        number = int(options["round"])
+        matches = [r for r in index["rounds"] if r["number"] == number]
+        if not matches:
+            print(f"[ERRO] Rodada {number} não existe no índice ({len(index['rounds'])} rodadas).")
             return
+        log = analyze_round(video_path, matches[0], index.get("cup_area"), options["tracker"])
+    else:
+        processes = int(options["processes"]) if options["processes"] else None
+        log = analyze_rounds_parallel(video_path, index, processes=processes, tracker_type=options["tracker"])
+    elapsed = time.monotonic() - start
+
+    print(f"[INFO] {len(log)} frames analisados em {elapsed:.2f} s.")
+    if options["output"]:
+        log.save(options["output"])
+        print(f"[INFO] Tracks salvos em {options['output']}")
+
+def run_headless_chunked(video_path, options):
+    """
+    Análise headless de um único vídeo em trechos paralelos. Se existir um índice de
+    rodadas (--round-index ou VIDEO.rounds.json), os trechos são alinhados às rodadas.
+    """
+    warn_no_latency_trace(options, "com --chunked")
+    import os
+    import time
+    from offline.chunks import analyze_chunked
+    from offline.rounds import default_index_path, load_round_index
+
+    path = options["round_index"] or default_index_path(video_path)
+    index = load_round_index(path) if os.path.exists(path) else None
+    cup_area = parse_bbox(options["cup_area"]) if options["cup_area"] else None
+    processes = int(options["processes"]) if options["processes"] else None
+
+    start = time.monotonic()
+    log = analyze_chunked(video_path, processes=processes, overlap=int(options["chunk_overlap"]),
+                          index=index, cup_area=cup_area, tracker_type=options["tracker"])
+    elapsed = time.monotonic() - start
+
+    aligned = "alinhados às rodadas" if index else "com sobreposição"
+    print(f"[INFO] {len(log)} frames analisados em trechos {aligned} em {elapsed:.2f} s.")
+    if options["output"]:
+        log.save(options["output"])
+        print(f"[INFO] Tracks salvos em {options['output']}")
+
+def run_latency_benchmark(video_path, options):
+    """
+    Modo benchmark: reproduz o arquivo no ritmo real, sem janela nem interação, e
+    mede a latência captura->decisão de cada frame (incluindo o desenho do overlay).
+    Frames que chegam enquanto o pipeline está ocupado são descartados, como ao vivo.
+    """
+    source = create_source("file", video_path, realtime=True, pool=FramePool())
+    display_pool = FramePool(size=1)
+    tracer = LatencyTracer()
+    session = TrackingSession(tracker_type=options["tracker"], tracer=tracer, verbose=False,
+                              adaptive_detection=not options["detect_every_frame"])
+    visualizer = Visualizer()
+
+    captured = source.read()
+    if captured is None:
+        print("[ERRO] Vídeo vazio.")
+        source.release()
+        return
+    first_frame = captured.image
+    cup_area = parse_bbox(options["cup_area"]) if options["cup_area"] else default_cup_area(first_frame)
+    cup_bboxes = session.detector.detect_cups_in_area(first_frame, cup_area)
+    session.start(first_frame, cup_bboxes)
+    scale_factor = display_scale(first_frame)
+
+    print(f"[INFO] Benchmark de latência em tempo real ({source.fps:.1f} fps)...")
+    while True:
+        captured = source.read()
+        if captured is None:
+            break
+        tracer.begin(captured.index, captured.timestamp)
+        frame_disp = make_display_frame(captured.image, scale_factor, display_pool)
+        tracer.mark("display_copy")
+        state = session.process(captured.image, captured.index, captured.timestamp)
+        draw_state(frame_disp, state, scale_factor, visualizer)
+        tracer.mark("draw")
+        tracer.end()
 
     source.release()
-    cv2.destroyAllWindows()
+    print(tracer.report())
+    if session.scheduler is not None: print(f"[INFO] {session.scheduler.format()}")
+    print(f"[INFO] Frames descartados por atraso: {source.dropped_frames}")
+
+def run_multi_region(video_path, options):
+    """
+    Várias mesas na mesma tela (ou no mesmo vídeo): uma única captura da união das
+    regiões por frame, com uma sessão de rastreamento por região em um pool de threads.
+    As regiões são calibradas automaticamente; 'r' recalibra todas.
+    """
+    warn_no_latency_trace(options, "com --regions")
+    from input.multi_region import MultiRegionSource
+    from pipeline.multi_region import MultiRegionPipeline
+
+    regions = [parse_bbox(text) for text in options["regions"].split(";") if text]
+    if video_path:
+        source = create_source("file", video_path, realtime=bool(options["realtime"]), pool=FramePool())
+        capture = MultiRegionSource(regions, source=source)
+    else:
+        try:
+            capture = MultiRegionSource(regions, pool=FramePool())
+        except ValueError as e:
+            print(f"[ERRO] {e}")
+            return
+    pipeline = MultiRegionPipeline(len(regions), workers=int(options["workers"]) if options["workers"] else None,
+                                   tracker_type=options["tracker"],
+                                   adaptive_detection=not options["detect_every_frame"])
+    visualizer = Visualizer()
+    display_pool = FramePool(size=1)
+    preview = open_preview(options)
+    print(f"[INFO] {len(regions)} regiões, captura única de {capture.union}.")
+
+    try:
+        scale_factor = None
+        while True:
+            result = capture.read()
+            if result is None:
+                break
+            captured, views = result
+            if scale_factor is None:
+                outside = capture.invalid_regions(captured.image.shape)
+                if outside:
+                    h, w = captured.image.shape[:2]
+                    print(f"[ERRO] Região(ões) {', '.join(str(i + 1) for i in outside)} fora do frame ({w}x{h}).")
+                    break
+            if not all(pipeline.active):
+                active = pipeline.configure(views)
+                if all(pipeline.active):
+                    print(f"[INFO] {active} regiões calibradas. Rastreando...")
+            states = pipeline.process(views, captured.index, captured.timestamp)
+
+            if scale_factor is None:
+                scale_factor = display_scale(captured.image)
+            frame_disp = make_display_frame(captured.image, scale_factor, display_pool)
+            for view_disp, state in zip(capture.views(frame_disp, scale_factor), states):
+                if state is not None:
+                    draw_state(view_disp, state, scale_factor, visualizer)
+
+            key = show_frame(frame_disp, options, preview)
+            if key == 27: # ESC
+                break
+            elif key == ord('r'): # Reset
+                print("[INFO] Recalibrando regiões...")
+                pipeline.reset()
+    finally:
+        pipeline.close()
+        close_preview(preview)
+        capture.release()
+        if not options["no_window"]: cv2.destroyAllWindows()
+
+def run_tracker_multiprocess(options, source_kind, *source_args, **source_kwargs):
+    """
+    Loop de rastreamento com captura e análise em processos separados.
+    Este processo só exibe: lê frames do ring compartilhado e recebe o estado de cada frame.
+    """
+    warn_no_latency_trace(options, "no modo multiprocesso")
+    # Importação tardia: só o modo multiprocesso precisa de shared_memory
+    from pipeline.multiprocess import MultiprocessPipeline
+    from pipeline.shared_ring import RingVideoSource
+
+    pipeline = MultiprocessPipeline(source_kind, *source_args,
+                                    events_jsonl=options["events_jsonl"],
+                                    events_socket=options["events_socket"],
+                                    tracker_type=options["tracker"],
+                                    adaptive_detection=not options["detect_every_frame"],
+                                    **source_kwargs)
+    if not pipeline.start():
+        print("[ERRO] Falha ao iniciar o processo de captura.")
+        return
+
+    source = RingVideoSource(pipeline.ring, fps=pipeline.fps, is_alive=lambda: pipeline.capture_alive)
+    # A captura acontece em outro processo: a chave da calibração é a área pedida à fonte
+    source.geometry = source_kwargs.get("bbox")
+    detector = Detector()
+    visualizer = Visualizer()
+    calibration = open_calibration(options)
+    preview = open_preview(options)
+
+    try:
+        while True:
+            config = configure_cups(source, detector, calibration, interactive=not options["no_window"])
+            if config is None:
+                break
+            first_frame, cup_bboxes, scale_factor = config
+
+            pipeline.begin_tracking(first_frame, cup_bboxes)
+            print("\n[INFO] RASTREAMENTO INICIADO (multiprocesso)! Aguardando detecção da bola...")
+
+            restart = False
+            while True:
+                message = pipeline.poll(timeout=0.1)
+                if message is None:
+                    if pipeline.finished or (not options["no_window"] and (cv2.waitKey(1) & 0xFF) == 27):
+                        break
+                    continue
+                message = pipeline.poll_latest() or message
+                seq, _, _, fields = message
+                state = TrackingState(*fields)
+
+                # Exibe o frame que gerou o estado (se ainda estiver no ring)
+                captured = pipeline.ring.read(seq)
+                if captured is None:
+                    seq, captured = pipeline.ring.read_latest()
+                if captured is None:
+                    continue
+                frame_disp = make_display_frame(captured.image, scale_factor)
+                # O frame de exibição é uma cópia: só vale se o slot não foi sobrescrito durante ela
+                if not pipeline.ring.is_valid(seq):
+                    continue
+                draw_state(frame_disp, state, scale_factor, visualizer)
+
+                key = show_frame(frame_disp, options, preview)
+                if key == 27: # ESC
+                    break
+                elif key == ord('r'): # Reset
+                    print("[INFO] Reiniciando configuração...")
+                    if calibration is not None:
+                        calibration.invalidate("cups", source.geometry)
+                    pipeline.reset()
+                    restart = True
+                    break
+
+            if not restart:
+                break
+    finally:
+        close_preview(preview)
+        pipeline.stop()
+        if not options["no_window"]: cv2.destroyAllWindows()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,96 @@
+from core.session import TrackingSession
+from input.registry import create_source
+from offline.tracks import TrackLog
+from utils.buffer_pool import FramePool
+
+def default_cup_area(frame):
+    """
+    Área dos copos quando nenhuma é informada: calibração automática, ou o frame inteiro
+    se ela falhar.
+    """
+    from core.calibration import find_cup_region
+    area = find_cup_region(frame)
+    if area is None:
+        h, w = frame.shape[:2]
+        area = (0, 0, w, h)
+    return area
+
+def analysis_config(cup_area=None, tracker_type='CSRT', adaptive_detection=True, two_pass=False):
+    """Configuração da análise offline (entra na chave do cache)."""
+    return {
+        "cup_area": list(cup_area) if cup_area else None,
+        "tracker_type": tracker_type,
+        "adaptive_detection": adaptive_detection,
+        "two_pass": two_pass,
+    }
+
+def analyze_source(source, cup_area=None, tracker_type='CSRT', events=None, tracer=None, max_frames=None,
+                   adaptive_detection=True):
+    """
+    Analisa todos os frames de uma fonte sem interface: detecta os copos no primeiro
+    frame (dentro de 'cup_area', ou na área calibrada automaticamente) e rastreia até o fim
+    (ou até 'max_frames' frames, contando o primeiro).
+
+    O primeiro frame também é processado e registrado, para que análises que começam no
+    meio do vídeo (rodadas, trechos) não percam o frame inicial.
+
+    Returns:
+        TrackLog: Estado de cada frame lido, a partir do primeiro.
+    """
+    session = TrackingSession(tracker_type=tracker_type, events=events, tracer=tracer, verbose=False,
+                              adaptive_detection=adaptive_detection)
+
+    captured = source.read()
+    if captured is None:
+        return TrackLog()
+    first_frame = captured.image
+    cup_bboxes = session.detector.detect_cups_in_area(first_frame, cup_area or default_cup_area(first_frame))
+    session.start(first_frame, cup_bboxes)
+
+    log = TrackLog(num_cups=len(cup_bboxes))
+    while True:
+        if tracer: tracer.begin(captured.index, captured.timestamp)
+        state = session.process(captured.image, captured.index, captured.timestamp)
+        if tracer: tracer.end()
+        log.append(captured.index, state)
+        if max_frames is not None and len(log) >= max_frames:
+            break
+        captured = source.read()
+        if captured is None:
+            break
+    return log
+
+def analyze_file(video_path, cup_area=None, tracker_type='CSRT', cache=None, events=None, adaptive_detection=True,
+                 two_pass=False, processes=None, tracer=None):
+    """
+    Análise offline de um arquivo de vídeo, usando o ResultCache quando fornecido.
+    Resultados vindos do cache não reemitem eventos de jogo nem passam pelo 'tracer'.
+    Com 'two_pass', usa a análise em duas passadas (offline.two_pass) com 'processes' processos
+    ('tracer' não é usado: a detecção roda em outros processos).
+
+    Returns:
+        tuple: (TrackLog, from_cache)
+    """
+    key = None
+    if cache is not None:
+        from offline.cache import cache_key
+        key = cache_key(video_path, analysis_config(cup_area, tracker_type, adaptive_detection, two_pass),
+                        cache.hash_index)
+        log = cache.get(key)
+        if log is not None:
+            return log, True
+
+    if two_pass:
+        from offline.two_pass import analyze_two_pass
+        log = analyze_two_pass(video_path, cup_area, processes, tracker_type, events=events)
+    else:
+        source = create_source("file", video_path, pool=FramePool())
+        try:
+            log = analyze_source(source, cup_area, tracker_type, events=events, tracer=tracer,
+                                 adaptive_detection=adaptive_detection)
+        finally:
+            source.release()
+
+    if cache is not None:
+        cache.put(key, log)
+    return log, False
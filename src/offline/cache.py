@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+
+from offline.tracks import TrackLog
+
+# Módulos cujo código determina o resultado da análise (entram na chave do cache)
+ANALYSIS_MODULES = ("core/detector.py", "core/tracker.py", "core/analyzer.py", "core/session.py",
+                    "core/calibration.py", "core/detection_scheduler.py", "core/hypotheses.py",
+                    "offline/analyze.py", "offline/two_pass.py", "offline/tracks.py")
+
+_SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def hash_file(path, chunk_size=1 << 20):
+    """Hash (BLAKE2b) do conteúdo do arquivo."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def content_hash(video_path, index_path=None):
+    """
+    Hash do conteúdo do vídeo. Com 'index_path', o hash fica memorizado nesse JSON por
+    (caminho real, tamanho, mtime_ns) e o arquivo só é relido quando um deles muda:
+    vídeos longos não são lidos inteiros a cada execução só para achar a chave.
+    """
+    if index_path is None:
+        return hash_file(video_path)
+    real = os.path.realpath(video_path)
+    st = os.stat(real)
+    stamp = [st.st_size, st.st_mtime_ns]
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    entry = index.get(real)
+    if isinstance(entry, dict) and entry.get("stamp") == stamp:
+        return entry["hash"]
+
+    digest = hash_file(real)
+    index[real] = {"stamp": stamp, "hash": digest}
+    try:
+        fd, tmp_path = tempfile.mkstemp(suffix=".json.tmp", dir=os.path.dirname(index_path) or ".")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, index_path)
+    except OSError:
+        pass # Sem o índice, o hash só é recalculado na próxima execução
+    return digest
+
+def code_version():
+    """Hash do código-fonte dos módulos de análise."""
+    digest = hashlib.blake2b(digest_size=20)
+    for module in ANALYSIS_MODULES:
+        path = os.path.join(_SRC_DIR, module)
+        digest.update(module.encode("utf-8"))
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+def cache_key(video_path, config, hash_index=None):
+    """
+    Chave do resultado: conteúdo do vídeo + configuração + versão do código.
+
+    Args:
+        video_path (str): Vídeo analisado.
+        config (dict): Configuração serializável em JSON (detector, rastreador, área...).
+        hash_index (str): JSON onde o hash do vídeo é memorizado (ver content_hash).
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(content_hash(video_path, hash_index).encode("ascii"))
+    digest.update(json.dumps(config, sort_keys=True).encode("utf-8"))
+    digest.update(code_version().encode("ascii"))
+    return digest.hexdigest()
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "thimbles")
+
+class ResultCache:
+    """
+    Cache em disco de TrackLogs endereçado por conteúdo, com remoção LRU pelo tamanho total.
+
+    Cada entrada é um arquivo <chave>.npz; o mtime marca o último acesso. Os hashes dos
+    vídeos ficam memorizados em 'hash_index' (video_hashes.json no mesmo diretório).
+    """
+    def __init__(self, directory=None, max_bytes=2 * 1024**3):
+        """
+        Args:
+            directory (str): Diretório do cache. Se None, usa ~/.cache/thimbles.
+            max_bytes (int): Tamanho total máximo; as entradas menos usadas são removidas.
+        """
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hash_index = os.path.join(self.directory, "video_hashes.json")
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key):
+        """
+        Returns:
+            TrackLog: O resultado armazenado, ou None se não estiver no cache (ou se a
+                      entrada estiver corrompida; nesse caso ela é removida).
+        """
+        path = self._path(key)
+        try:
+            log = TrackLog.load(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        os.utime(path) # Marca como usado recentemente
+        return log
+
+    def put(self, key, log):
+        """Armazena o resultado (escrita atômica) e aplica o limite de tamanho."""
+        fd, tmp_path = tempfile.mkstemp(suffix=".npz.tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                log.save(f)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def entries(self):
+        """Lista (mtime, tamanho, caminho) das entradas, da menos para a mais recente."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".npz"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+        return entries
+
+    def total_bytes(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Remove as entradas menos usadas até o total caber em max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
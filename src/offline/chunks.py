@@ -0,0 +1,188 @@
+import itertools
+from collections import namedtuple
+
+import numpy as np
+
+from offline.tracks import MISSING, TrackLog
+
+# Trecho do vídeo analisado por um processo.
+# decode_start: primeiro frame decodificado (rastreadores são inicializados aqui);
+# start/end: frames que o trecho contribui para o resultado final (inclusive);
+# end None: até o fim do arquivo (último trecho, o total do container pode estar errado).
+# Os frames entre decode_start e start (sobreposição) servem só para alinhar os copos
+# com o trecho anterior.
+Chunk = namedtuple("Chunk", ["decode_start", "start", "end"])
+
+def plan_chunks(frame_count, chunks, overlap=30, rounds=None):
+    """
+    Divide o vídeo em 'chunks' trechos. Com um índice de rodadas, os cortes caem no
+    início das rodadas (onde os rastreadores já seriam reiniciados) e não precisam de
+    sobreposição; sem índice, os cortes são uniformes com 'overlap' frames de sobreposição.
+
+    Returns:
+        list: Lista de Chunk, em ordem.
+    """
+    chunks = max(1, min(chunks, frame_count))
+    if rounds:
+        starts = [r["start"] if isinstance(r, dict) else r.start for r in rounds]
+        # Agrupa rodadas consecutivas em trechos com quantidade parecida de frames
+        target = frame_count / chunks
+        cuts = [0]
+        for s in starts[1:]:
+            if s - cuts[-1] >= target and len(cuts) < chunks:
+                cuts.append(s)
+        return [Chunk(c, c, (cuts[i + 1] if i + 1 < len(cuts) else frame_count) - 1)
+                for i, c in enumerate(cuts)]
+
+    bounds = np.linspace(0, frame_count, chunks + 1).astype(int)
+    return [Chunk(max(0, int(bounds[i]) - (overlap if i else 0)), int(bounds[i]), int(bounds[i + 1]) - 1)
+            for i in range(chunks)]
+
+def analyze_chunk(video_path, chunk, cup_area=None, tracker_type='CSRT'):
+    """Analisa um trecho em uma fonte própria, detectando os copos no primeiro frame."""
+    max_frames = None if chunk.end is None else chunk.end - chunk.decode_start + 1
+    from input.video_source import FileVideoSource
+    from offline.analyze import analyze_source
+
+    source = FileVideoSource(video_path)
+    try:
+        source.seek(chunk.decode_start)
+        return analyze_source(source, tuple(cup_area) if cup_area else None, tracker_type,
+                              max_frames=max_frames)
+    finally:
+        source.release()
+
+def _analyze_chunk_job(args):
+    video_path, chunk, cup_area, tracker_type = args
+    return analyze_chunk(video_path, Chunk(*chunk), cup_area, tracker_type)
+
+def match_cups(previous, current):
+    """
+    Permutação que leva os índices de copo de 'current' aos de 'previous', usando os
+    frames em comum (sobreposição): minimiza a distância média entre os centros.
+
+    Args:
+        previous, current (dict): Colunas (TrackLog.to_arrays) restritas aos mesmos frames.
+
+    Returns:
+        tuple: perm, onde o copo k de 'current' corresponde ao copo perm[k] de 'previous',
+               ou None se não houver frames em comum com copos válidos.
+    """
+    a, b = previous["cups"], current["cups"]
+    if len(a) == 0 or a.shape[1] != b.shape[1]:
+        return None
+    centers_a = a[..., :2] + a[..., 2:] / 2.0
+    centers_b = b[..., :2] + b[..., 2:] / 2.0
+    valid_a = a[..., 2] != MISSING
+    valid_b = b[..., 2] != MISSING
+
+    c = a.shape[1]
+    # cost[j, k]: distância média entre o copo j anterior e o copo k atual
+    dist = np.linalg.norm(centers_a[:, :, None, :] - centers_b[:, None, :, :], axis=-1)
+    valid = valid_a[:, :, None] & valid_b[:, None, :]
+    counts = valid.sum(axis=0)
+    if not counts.any():
+        return None
+    cost = np.where(counts > 0, (dist * valid).sum(axis=0) / np.maximum(counts, 1), np.inf)
+
+    best, best_cost = None, np.inf
+    for perm in itertools.permutations(range(c)):
+        total = sum(cost[perm[k], k] for k in range(c))
+        if total < best_cost:
+            best, best_cost = perm, total
+    return best
+
+def _apply_permutation(arrays, perm):
+    """Reordena os copos e o alvo de um trecho para a numeração do trecho anterior."""
+    cups = np.full_like(arrays["cups"], MISSING)
+    target = arrays["target"].copy()
+    for k, j in enumerate(perm):
+        cups[:, j] = arrays["cups"][:, k]
+        target[arrays["target"] == k] = j
+    return dict(arrays, cups=cups, target=target)
+
+def stitch_chunks(chunks, logs):
+    """
+    Junta os resultados dos trechos numa única linha do tempo com identidade de copos
+    consistente: cada trecho é renumerado para casar com o anterior na sobreposição, e os
+    frames de sobreposição ficam com o trecho anterior. Enquanto um trecho ainda não tem alvo
+    próprio, herda o alvo do fim do trecho anterior.
+
+    Returns:
+        TrackLog
+    """
+    parts = []
+    previous = None
+    for chunk, log in zip(chunks, logs):
+        arrays = log.to_arrays()
+        if not len(arrays["frame_index"]):
+            continue
+        if previous is not None:
+            common, idx_prev, idx_cur = np.intersect1d(previous["frame_index"], arrays["frame_index"],
+                                                       return_indices=True)
+            if len(common):
+                perm = match_cups({"cups": previous["cups"][idx_prev]}, {"cups": arrays["cups"][idx_cur]})
+                if perm is not None:
+                    arrays = _apply_permutation(arrays, perm)
+
+            own = arrays["frame_index"] >= chunk.start
+            arrays = {name: column[own] for name, column in arrays.items()}
+
+            carried = int(previous["target"][-1]) if len(previous["target"]) else MISSING
+            if carried != MISSING and chunk.decode_start != chunk.start:
+                decided = np.flatnonzero(arrays["target"] != MISSING)
+                until = decided[0] if len(decided) else len(arrays["target"])
+                arrays["target"][:until] = carried
+        parts.append(arrays)
+        previous = arrays
+
+    if not parts:
+        return TrackLog()
+    return TrackLog.from_arrays({name: np.concatenate([p[name] for p in parts]) for name in TrackLog.COLUMNS})
+
+def analyze_chunked(video_path, processes=None, overlap=30, index=None, cup_area=None, tracker_type='CSRT'):
+    """
+    Análise de um único vídeo longo em paralelo: o vídeo é dividido em trechos
+    (alinhados às rodadas quando há 'index'), cada um decodificado e analisado em
+    seu próprio processo, e os resultados são costurados com stitch_chunks.
+
+    Sem 'cup_area' (nem no índice), a área dos copos é calibrada uma única vez no
+    frame 0 e usada por todos os trechos: o primeiro frame de um trecho costuma estar
+    no meio do embaralhamento.
+
+    O total de frames do container pode faltar ou estar errado: sem ele, os frames são
+    contados decodificando o vídeo; em qualquer caso o último trecho vai até o fim do
+    arquivo, e trechos que começam depois do fim real saem vazios.
+
+    Returns:
+        TrackLog
+    """
+    import multiprocessing as mp
+    import os
+    from input.video_source import FileVideoSource
+    from offline.analyze import default_cup_area
+    from offline.two_pass import count_frames
+
+    if index is not None:
+        cup_area = cup_area or index.get("cup_area")
+    source = FileVideoSource(video_path)
+    try:
+        frame_count = index["frame_count"] if index is not None else source.frame_count
+        if not cup_area:
+            first_frame = source.get_frame()
+            if first_frame is None:
+                return TrackLog()
+            cup_area = tuple(int(v) for v in default_cup_area(first_frame))
+    finally:
+        source.release()
+    if frame_count <= 0:
+        frame_count = count_frames(video_path)
+        print(f"[AVISO] O container não informa o número de frames; contados {frame_count}.")
+
+    processes = processes or os.cpu_count() or 1
+    chunks = plan_chunks(frame_count, processes, overlap, index["rounds"] if index else None)
+    chunks[-1] = chunks[-1]._replace(end=None)
+    jobs = [(video_path, tuple(c), cup_area, tracker_type) for c in chunks]
+    with mp.get_context("spawn").Pool(processes=min(processes, len(chunks))) as pool:
+        logs = pool.map(_analyze_chunk_job, jobs)
+    return stitch_chunks(chunks, logs)
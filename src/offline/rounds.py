@@ -0,0 +1,174 @@
+import json
+import os
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from core.detector import Detector
+from input.video_source import FileVideoSource
+
+# Uma rodada do jogo em frames da fonte.
+# start: primeiro frame com a bola visível e os copos em casa;
+# shuffle_start: primeiro frame com os copos fora de casa (None se o vídeo acabou antes);
+# reveal: primeiro frame com a bola visível depois do embaralhamento (None se não houve);
+# end: último frame da rodada (inclusive).
+Round = namedtuple("Round", ["number", "start", "shuffle_start", "reveal", "end"])
+
+def _patch(frame, area, work_width):
+    """Recorte da área dos copos em cinza, reduzido para comparação barata."""
+    x, y, w, h = area
+    gray = cv2.cvtColor(frame[y:y+h, x:x+w], cv2.COLOR_BGR2GRAY)
+    scale = min(1.0, work_width / max(1, w))
+    if scale != 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return gray
+
+def segment_rounds(samples, last_frame):
+    """
+    Segmenta rodadas a partir de amostras (frame, bola_visível, copos_em_casa).
+
+    Uma rodada começa no primeiro frame de um trecho "bola visível + copos em casa"
+    (a mesma condição que reinicia os rastreadores em TrackingSession) que vem depois
+    de um embaralhamento, ou no primeiro trecho do vídeo. Ela termina no frame anterior
+    ao início da próxima.
+
+    Returns:
+        list: Lista de Round.
+    """
+    rounds = []
+    current = None # [start, shuffle_start, reveal]
+    for frame, ball, home in samples:
+        if current is None:
+            if ball and home:
+                current = [frame, None, None]
+            continue
+        start, shuffle_start, reveal = current
+        if shuffle_start is None:
+            if not home:
+                current[1] = frame
+        elif ball and home:
+            # Copos voltaram para casa com a bola à vista: nova rodada
+            rounds.append(Round(len(rounds) + 1, start, shuffle_start, reveal if reveal is not None else frame, frame - 1))
+            current = [frame, None, None]
+            continue
+        if current[1] is not None and current[2] is None and ball and frame > current[1]:
+            current[2] = frame
+    if current is not None:
+        rounds.append(Round(len(rounds) + 1, current[0], current[1], current[2], last_frame))
+    return rounds
+
+def build_round_index(video_path, cup_area=None, stride=2, home_threshold=12.0, work_width=160):
+    """
+    Passada rápida de indexação: sem rastreadores, apenas detecção de cor da bola e
+    comparação da área dos copos com a aparência "em casa" (primeiro frame com a bola visível).
+    Frames fora do passo 'stride' são pulados com grab() (sem conversão).
+
+    Args:
+        video_path (str): Vídeo a indexar.
+        cup_area (tuple): (x, y, w, h) dos copos. Se None, usa a calibração automática.
+        stride (int): Analisa 1 a cada 'stride' frames.
+        home_threshold (float): Diferença média (níveis de cinza) máxima para "copos em casa".
+
+    Returns:
+        dict: Índice serializável (ver save_round_index).
+    """
+    from offline.analyze import default_cup_area
+
+    source = FileVideoSource(video_path)
+    detector = Detector()
+    samples = []
+    reference = None
+    max_ball_area = None
+    last_frame = -1
+    try:
+        while True:
+            frame = source.get_frame()
+            if frame is None:
+                break
+            frame_index = source.frame_index
+            last_frame = frame_index
+
+            if cup_area is None:
+                cup_area = tuple(int(v) for v in default_cup_area(frame))
+                # Bola deve ser menor que um copo (mesma regra do rastreamento ao vivo)
+                max_ball_area = cup_area[2] * cup_area[3] / 3 * 1.2
+            elif max_ball_area is None:
+                max_ball_area = cup_area[2] * cup_area[3] / 3 * 1.2
+
+            ball = detector.detect_ball_automatically(frame, max_area=max_ball_area) is not None
+            patch = _patch(frame, cup_area, work_width)
+            if reference is None and ball:
+                reference = patch
+            home = reference is not None and float(np.mean(cv2.absdiff(patch, reference))) < home_threshold
+            samples.append((frame_index, ball, home))
+
+            for _ in range(stride - 1):
+                if not source.skip():
+                    break
+                last_frame = source.frame_index
+    finally:
+        fps = source.fps
+        source.release()
+
+    return {
+        "video": os.path.abspath(video_path),
+        "fps": fps,
+        "frame_count": last_frame + 1,
+        "stride": stride,
+        "cup_area": list(cup_area) if cup_area else None,
+        "rounds": [r._asdict() for r in segment_rounds(samples, last_frame)],
+    }
+
+def default_index_path(video_path):
+    return video_path + ".rounds.json"
+
+def save_round_index(index, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+
+def load_round_index(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def index_rounds(index):
+    """Lista de Round a partir do índice carregado."""
+    return [Round(**r) for r in index["rounds"]]
+
+def analyze_round(video_path, round_info, cup_area=None, tracker_type='CSRT'):
+    """
+    Analisa uma única rodada: posiciona o vídeo no início dela e rastreia até o fim.
+    Os copos são detectados no primeiro frame (copos em casa, por construção do índice).
+
+    Returns:
+        TrackLog: Estado dos frames da rodada.
+    """
+    from offline.analyze import analyze_source
+
+    if isinstance(round_info, dict):
+        round_info = Round(**round_info)
+    source = FileVideoSource(video_path)
+    try:
+        source.seek(round_info.start)
+        return analyze_source(source, tuple(cup_area) if cup_area else None, tracker_type,
+                              max_frames=round_info.end - round_info.start + 1)
+    finally:
+        source.release()
+
+def _analyze_round_job(args):
+    return analyze_round(*args)
+
+def analyze_rounds_parallel(video_path, index, processes=None, tracker_type='CSRT'):
+    """
+    Analisa todas as rodadas do índice em paralelo (um processo por rodada, em pool).
+
+    Returns:
+        TrackLog: Resultados de todas as rodadas, em ordem.
+    """
+    import multiprocessing as mp
+    from offline.tracks import TrackLog
+
+    jobs = [(video_path, r, index.get("cup_area"), tracker_type) for r in index["rounds"]]
+    with mp.get_context("spawn").Pool(processes=processes) as pool:
+        logs = pool.map(_analyze_round_job, jobs)
+    return TrackLog.concatenate(logs)
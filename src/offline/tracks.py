@@ -0,0 +1,99 @@
+import numpy as np
+
+from core.session import TrackingState
+
+# Valor usado nas colunas inteiras para "ausente" (bbox None, sem alvo)
+MISSING = -1
+
+class TrackLog:
+    """
+    Resultado por frame de uma análise, em forma colunar (um array NumPy por campo).
+
+    Colunas:
+        frame_index (N,)     int64  índice do frame na fonte
+        cups        (N, C, 4) int32 bboxes dos copos (linha toda -1 se perdido; largura -1 marca ausência)
+        ball        (N, 4)   int32  bbox da bola (-1 se ausente)
+        target      (N,)     int8   índice do copo alvo (-1 se nenhum)
+        hidden      (N,)     bool   bola escondida
+        tracking    (N,)     bool   rastreador de bola ativo
+    """
+    COLUMNS = ("frame_index", "cups", "ball", "target", "hidden", "tracking")
+
+    def __init__(self, num_cups=3):
+        self.num_cups = num_cups
+        self._rows = []
+        self._arrays = None
+
+    def append(self, frame_index, state):
+        """Adiciona o TrackingState do frame 'frame_index'."""
+        self._rows.append((frame_index, state))
+        self._arrays = None
+
+    def __len__(self):
+        if self._arrays is not None:
+            return len(self._arrays["frame_index"])
+        return len(self._rows)
+
+    @staticmethod
+    def _box(box):
+        return box if box is not None else (MISSING,) * 4
+
+    def to_arrays(self):
+        """
+        Returns:
+            dict: Colunas NumPy (ver docstring da classe).
+        """
+        if self._arrays is not None:
+            return self._arrays
+        n, c = len(self._rows), self.num_cups
+        arrays = {
+            "frame_index": np.empty(n, dtype=np.int64),
+            "cups": np.full((n, c, 4), MISSING, dtype=np.int32),
+            "ball": np.full((n, 4), MISSING, dtype=np.int32),
+            "target": np.full(n, MISSING, dtype=np.int8),
+            "hidden": np.zeros(n, dtype=bool),
+            "tracking": np.zeros(n, dtype=bool),
+        }
+        for i, (frame_index, state) in enumerate(self._rows):
+            arrays["frame_index"][i] = frame_index
+            for k, box in enumerate(state.cups_boxes[:c]):
+                arrays["cups"][i, k] = self._box(box)
+            arrays["ball"][i] = self._box(state.ball_box)
+            arrays["target"][i] = state.target_idx
+            arrays["hidden"][i] = state.is_ball_hidden
+            arrays["tracking"][i] = state.tracking_ball
+        self._arrays = arrays
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Reconstrói um TrackLog a partir das colunas (ex: carregadas do cache)."""
+        log = cls(num_cups=arrays["cups"].shape[1])
+        log._arrays = {name: np.asarray(arrays[name]) for name in cls.COLUMNS}
+        return log
+
+    @classmethod
+    def concatenate(cls, logs):
+        """Junta vários TrackLogs (ex: um por rodada) em ordem."""
+        logs = [log for log in logs if len(log)]
+        if not logs:
+            return cls()
+        parts = [log.to_arrays() for log in logs]
+        return cls.from_arrays({name: np.concatenate([p[name] for p in parts]) for name in cls.COLUMNS})
+
+    def state_at(self, row):
+        """Reconstrói o TrackingState da linha 'row'."""
+        a = self.to_arrays()
+        cups = [None if b[2] == MISSING else tuple(int(v) for v in b) for b in a["cups"][row]]
+        ball = None if a["ball"][row][2] == MISSING else tuple(int(v) for v in a["ball"][row])
+        return TrackingState(cups, ball, int(a["target"][row]), bool(a["hidden"][row]),
+                             bool(a["tracking"][row]), False)
+
+    def save(self, path):
+        """Grava as colunas em um arquivo .npz comprimido."""
+        np.savez_compressed(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls.from_arrays({name: data[name] for name in cls.COLUMNS})
@@ -0,0 +1,402 @@
+import itertools
+
+import numpy as np
+
+from core.analyzer import ThimblesAnalyzer
+from core.detector import Detector
+from core.events import GameEvent, TARGET_CHANGED
+from core.tracker import MultiObjectTracker
+from input.video_source import FileVideoSource
+from offline.tracks import MISSING, TrackLog
+
+NUM_CUPS = 3
+# Mesma zona de jogo vertical usada por TrackingSession._filter_ball_detection
+BALL_ZONE_MARGIN = 300
+# Margem de "bola dentro do copo" usada por ThimblesAnalyzer._assign_ball_to_cup
+OWNERSHIP_MARGIN = 30
+# Distância (px) de cada copo à posição inicial para considerar os copos "em casa"
+HOME_DISTANCE = 50
+# Falhas da detecção por cor (em frames) que o rastreador da bola cobriria no modo ao vivo
+BALL_COAST_FRAMES = 5
+# Motivo das mudanças de alvo feitas pela passada para trás
+REVEALED = "revealed"
+
+# --- Passada 1: detecção barata e paralela ---
+
+def detect_range(video_path, start, count, cup_area, max_ball_area):
+    """
+    Detecção por cor da bola e por contorno dos copos em 'count' frames a partir de 'start'.
+    A bola só é procurada na faixa da zona de jogo (área dos copos +- BALL_ZONE_MARGIN).
+
+    Returns:
+        dict: frame_index (n,), ball (n, 4), cups (n, 3, 4), cup_count (n,) — ausentes = -1.
+    """
+    detector = Detector()
+    source = FileVideoSource(video_path)
+    x, y, w, h = cup_area
+    frame_index = np.full(count, MISSING, dtype=np.int64)
+    ball = np.full((count, 4), MISSING, dtype=np.int32)
+    cups = np.full((count, NUM_CUPS, 4), MISSING, dtype=np.int32)
+    cup_count = np.zeros(count, dtype=np.int8)
+    n = 0
+    try:
+        source.seek(start)
+        while n < count:
+            frame = source.get_frame()
+            if frame is None:
+                break
+            band_top = max(0, y - BALL_ZONE_MARGIN)
+            band = frame[band_top:y + h + BALL_ZONE_MARGIN]
+            found = detector.detect_ball_automatically(band, max_area=max_ball_area)
+            if found is not None:
+                bx, by, bw, bh = found
+                ball[n] = (bx, by + band_top, bw, bh)
+            candidates = detector.find_cup_candidates(frame, cup_area)
+            cup_count[n] = len(candidates)
+            for k, box in enumerate(candidates):
+                cups[n, k] = box
+            frame_index[n] = source.frame_index
+            n += 1
+    finally:
+        source.release()
+    return {"frame_index": frame_index[:n], "ball": ball[:n], "cups": cups[:n], "cup_count": cup_count[:n]}
+
+def count_frames(video_path):
+    """
+    Conta os frames decodificando o vídeo inteiro (grab, sem converter os pixels).
+    Usado quando o container não informa o total (CAP_PROP_FRAME_COUNT == 0).
+    """
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    count = 0
+    try:
+        while cap.grab():
+            count += 1
+    finally:
+        cap.release()
+    return count
+
+def _detect_range_job(args):
+    return detect_range(*args)
+
+def detection_pass(video_path, frame_count, cup_area, max_ball_area, processes=None, chunk=300):
+    """
+    Passada 1 em paralelo: o vídeo é dividido em blocos de 'chunk' frames, cada bloco
+    decodificado e detectado por um processo do pool.
+
+    Returns:
+        dict: Colunas de detect_range concatenadas em ordem.
+    """
+    import multiprocessing as mp
+
+    jobs = [(video_path, start, min(chunk, frame_count - start), tuple(cup_area), max_ball_area)
+            for start in range(0, frame_count, chunk)]
+    if not jobs:
+        return {"frame_index": np.zeros(0, dtype=np.int64), "ball": np.zeros((0, 4), dtype=np.int32),
+                "cups": np.zeros((0, NUM_CUPS, 4), dtype=np.int32), "cup_count": np.zeros(0, dtype=np.int8)}
+    with mp.get_context("spawn").Pool(processes=processes) as pool:
+        parts = pool.map(_detect_range_job, jobs)
+    return {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
+
+# --- Passada 2: identidade dos copos, suavização e posse da bola ---
+
+def _centers(boxes):
+    boxes = np.asarray(boxes, dtype=np.float64)
+    return boxes[..., :2] + boxes[..., 2:] / 2.0
+
+def clean_frames(detections):
+    """
+    Frames em que as detecções dos copos são inequívocas: 3 copos bem separados
+    (centros mais distantes que a largura de um copo). Os demais (copos sobrepostos,
+    contornos fundidos ou perdidos) são resolvidos com o rastreador na passada 2.
+
+    Returns:
+        numpy.ndarray: Máscara booleana (n,).
+    """
+    cups = detections["cups"]
+    centers = _centers(cups)
+    dist = np.linalg.norm(centers[:, :, None, :] - centers[:, None, :, :], axis=-1)
+    dist[:, np.arange(NUM_CUPS), np.arange(NUM_CUPS)] = np.inf
+    widths = cups[..., 2].max(axis=1)
+    return (detections["cup_count"] == NUM_CUPS) & (dist.min(axis=(1, 2)) > widths)
+
+def _match(previous, boxes):
+    """Permutação perm (boxes[k] -> copo perm[k]) que minimiza o deslocamento dos centros."""
+    prev_c, cur_c = _centers(previous), _centers(boxes)
+    cost = np.linalg.norm(prev_c[:, None, :] - cur_c[None, :, :], axis=-1)
+    best, best_cost = None, np.inf
+    for perm in itertools.permutations(range(NUM_CUPS)):
+        total = cost[list(perm), range(NUM_CUPS)].sum()
+        if total < best_cost:
+            best, best_cost = perm, total
+    return best
+
+def _at_home(boxes, home):
+    return bool(np.all(np.linalg.norm(_centers(boxes) - _centers(home), axis=-1) < HOME_DISTANCE))
+
+def link_cups(video_path, detections, home, tracker_type='CSRT'):
+    """
+    Identidade dos copos ao longo do vídeo. Em frames inequívocos, cada detecção é
+    associada ao copo mais próximo do frame anterior; com os copos em casa a numeração
+    volta a ser posicional (como o reset de TrackingSession). Trechos ambíguos são
+    rastreados com 'tracker_type' a partir do último frame resolvido — o único uso do
+    rastreador caro nesta análise.
+
+    Returns:
+        tuple: (cups (n, 3, 4) float, número de frames rastreados, frames em que a
+               numeração posicional trocou os rótulos dos copos)
+    """
+    clean = clean_frames(detections)
+    raw = detections["cups"]
+    frame_index = detections["frame_index"]
+    n = len(raw)
+    cups = np.full((n, NUM_CUPS, 4), np.nan)
+    cups[0] = home
+
+    source = None
+    tracked = 0
+    relabels = []
+    t = 1
+    try:
+        while t < n:
+            if clean[t]:
+                boxes = raw[t]
+                perm = _match(cups[t - 1], boxes)
+                if _at_home(boxes, home):
+                    cups[t] = boxes
+                    if perm != tuple(range(NUM_CUPS)):
+                        relabels.append(t)
+                else:
+                    cups[t, list(perm)] = boxes
+                t += 1
+                continue
+
+            # Trecho ambíguo [t, end): rastreia a partir do frame t-1
+            end = t
+            while end < n and not clean[end]:
+                end += 1
+            if source is None:
+                source = FileVideoSource(video_path)
+            source.seek(int(frame_index[t - 1]))
+            frame = source.get_frame()
+            tracker = MultiObjectTracker(tracker_type=tracker_type)
+            tracker.initialize(frame, [tuple(int(v) for v in b) for b in cups[t - 1]])
+            for i in range(t, end):
+                frame = source.get_frame()
+                if frame is None:
+                    # Vídeo acabou antes do previsto: o resto do trecho fica na última posição
+                    cups[i:end] = cups[i - 1]
+                    break
+                _, boxes = tracker.update(frame)
+                for k, box in enumerate(boxes):
+                    cups[i, k] = box if box is not None else cups[i - 1, k]
+                tracked += 1
+            t = end
+    finally:
+        if source is not None:
+            source.release()
+    return cups, tracked, np.array(relabels, dtype=np.int64)
+
+def smooth_tracks(cups, alpha=0.5, breaks=()):
+    """
+    Suavização de fase zero das trajetórias dos copos: média exponencial para frente e
+    depois para trás (não causal, só para gravações). Cada trecho entre 'breaks'
+    (frames em que os rótulos dos copos foram trocados) é suavizado separadamente,
+    para não misturar as trajetórias de copos diferentes.
+    """
+    smoothed = np.empty_like(cups)
+    bounds = [0, *sorted(int(b) for b in breaks if 0 < b < len(cups)), len(cups)]
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        segment = cups[start:end]
+        forward = segment.copy()
+        for t in range(1, len(forward)):
+            forward[t] = alpha * segment[t] + (1 - alpha) * forward[t - 1]
+        backward = forward.copy()
+        for t in range(len(backward) - 2, -1, -1):
+            backward[t] = alpha * forward[t] + (1 - alpha) * backward[t + 1]
+        smoothed[start:end] = backward
+    return smoothed
+
+def _containing_cup(ball, cups, margin=OWNERSHIP_MARGIN):
+    """
+    Para cada frame, índice do copo que contém o centro da bola (com 'margin'), ou -1.
+    Vetorizado sobre todos os frames.
+    """
+    center = _centers(ball)[:, None, :]
+    inside = ((cups[..., 0] - margin <= center[..., 0]) & (center[..., 0] <= cups[..., 0] + cups[..., 2] + margin) &
+              (cups[..., 1] - margin <= center[..., 1]) & (center[..., 1] <= cups[..., 1] + cups[..., 3] + margin))
+    inside &= (ball[:, 2] != MISSING)[:, None]
+    return np.where(inside.any(axis=1), inside.argmax(axis=1), MISSING)
+
+def bridge_ball_gaps(ball, cups, max_gap=BALL_COAST_FRAMES):
+    """
+    Preenche, por interpolação, falhas curtas da detecção da bola longe dos copos —
+    as que o rastreador da bola cobre no modo ao vivo (TrackingSession mantém a caixa
+    do rastreador quando a cor não é encontrada). Falhas que começam ou terminam com a
+    bola em um copo são mantidas: a bola pode ter sido escondida.
+
+    Returns:
+        tuple: (ball (n, 4) com as falhas preenchidas, nº de frames preenchidos)
+    """
+    ball = ball.copy()
+    owner = _containing_cup(ball, cups)
+    seen = np.flatnonzero(ball[:, 2] != MISSING)
+    filled = 0
+    for before, after in zip(seen[:-1], seen[1:]):
+        gap = after - before - 1
+        if gap == 0 or gap > max_gap or owner[before] != MISSING or owner[after] != MISSING:
+            continue
+        weights = (np.arange(1, gap + 1) / (gap + 1))[:, None]
+        ball[before + 1:after] = np.rint((1 - weights) * ball[before] + weights * ball[after])
+        filled += gap
+    return ball, filled
+
+def resolve_ownership(cups, ball, home, events=None, frame_index=None):
+    """
+    Posse da bola em duas direções. Para frente, roda a lógica de ThimblesAnalyzer
+    frame a frame (entrada no copo, previsão na perda, alvo carregado pelo copo).
+    Para trás, cada trecho com a bola escondida recebe o copo de onde ela reaparece,
+    corrigindo as previsões feitas no momento da perda.
+
+    Os eventos só são publicados em 'events' depois das duas passadas: os TARGET_CHANGED
+    são refeitos a partir do alvo corrigido; os demais (ex: PREDICTED_ENTRY) registram o
+    que a passada para frente concluiu naquele frame.
+
+    'tracking' tem o sentido de TrackingSession.tracking_ball (rastreador da bola ativo):
+    há caixa da bola no frame, depois da filtragem.
+
+    Returns:
+        tuple: (target (n,), hidden (n,), ball filtrada (n, 4), tracking (n,), nº de frames corrigidos)
+    """
+    n = len(cups)
+    recorder = _EventRecorder() if events is not None else None
+    analyzer = ThimblesAnalyzer(events=recorder, verbose=False)
+    analyzer.initialize(None, [tuple(b) for b in home])
+    target = np.full(n, MISSING, dtype=np.int8)
+    hidden = np.zeros(n, dtype=bool)
+    tracking = np.zeros(n, dtype=bool)
+    ball = ball.copy()
+    was_home = False
+
+    for t in range(n):
+        boxes = [tuple(int(v) for v in b) for b in cups[t]]
+        box = None if ball[t, 2] == MISSING else tuple(int(v) for v in ball[t])
+        index = int(frame_index[t]) if frame_index is not None else t
+        if box is not None and analyzer.is_ball_hidden:
+            # Mesma regra de TrackingSession: "bola" dentro de um copo com a bola escondida é o próprio copo
+            cx, cy = box[0] + box[2] / 2, box[1] + box[3] / 2
+            if any(x < cx < x + w and y < cy < y + h for (x, y, w, h) in boxes):
+                box = None
+                ball[t] = MISSING
+        home_now = box is not None and _at_home(cups[t], home)
+        if home_now and not was_home:
+            analyzer.reset_round(index, None, boxes)
+        was_home = home_now
+        analyzer.update(box, boxes, index)
+        target[t] = analyzer.target_cup_index
+        hidden[t] = analyzer.is_ball_hidden
+        tracking[t] = box is not None
+
+    # Passada para trás: o reaparecimento revela onde a bola estava
+    owner = _containing_cup(ball, cups)
+    corrected = 0
+    t = n - 1
+    while t >= 0:
+        if not hidden[t]:
+            t -= 1
+            continue
+        end = t
+        while t >= 0 and hidden[t]:
+            t -= 1
+        start = t + 1
+        if end + 1 < n and owner[end + 1] != MISSING:
+            revealed = owner[end + 1]
+            corrected += int(np.count_nonzero(target[start:end + 1] != revealed))
+            target[start:end + 1] = revealed
+
+    if events is not None:
+        for event in _corrected_events(recorder.events, target, frame_index):
+            events.publish(event)
+    return target, hidden, ball, tracking, corrected
+
+class _EventRecorder:
+    """Guarda os eventos da passada para frente (mesma interface de EventBus.publish)."""
+    def __init__(self):
+        self.events = []
+
+    def publish(self, event):
+        self.events.append(event)
+
+def _corrected_events(recorded, target, frame_index=None):
+    """
+    Eventos da passada para frente com os TARGET_CHANGED refeitos a partir da coluna
+    'target' corrigida. Mudanças que a passada para frente já tinha feito mantêm o motivo
+    e a posição entre os eventos do frame; as novas têm o motivo REVEALED.
+
+    Returns:
+        list: GameEvents em ordem de frame.
+    """
+    frames = frame_index if frame_index is not None else np.arange(len(target))
+    forward = {(e.frame_index, e.cup_index): (i, e.data.get("reason"))
+               for i, e in enumerate(recorded) if e.kind == TARGET_CHANGED}
+    ordered = [(e.frame_index, i, e) for i, e in enumerate(recorded) if e.kind != TARGET_CHANGED]
+    for t in np.flatnonzero(np.diff(target, prepend=MISSING)):
+        index, cup = int(frames[t]), int(target[t])
+        previous = int(target[t - 1]) if t > 0 else MISSING
+        position, reason = forward.get((index, cup), (len(recorded), REVEALED))
+        ordered.append((index, position, GameEvent(TARGET_CHANGED, index, None, cup,
+                                                   {"previous": previous, "reason": reason})))
+    ordered.sort(key=lambda item: item[:2])
+    return [event for _, _, event in ordered]
+
+def analyze_two_pass(video_path, cup_area=None, processes=None, tracker_type='CSRT', events=None, verbose=True):
+    """
+    Análise offline em duas passadas (não causal, só para gravações):
+    1. detecção barata da bola e dos copos em todos os frames, em paralelo;
+    2. identidade dos copos (rastreador só nos trechos ambíguos), suavização para
+       frente/para trás entre trocas de rótulo, falhas curtas da bola preenchidas e
+       posse da bola com correção pelo reaparecimento.
+
+    Returns:
+        TrackLog: Mesmo formato da análise quadro a quadro (a partir do 1º frame).
+    """
+    from offline.analyze import default_cup_area
+
+    source = FileVideoSource(video_path)
+    first_frame = source.get_frame()
+    frame_count = source.frame_count
+    source.release()
+    if first_frame is None:
+        return TrackLog()
+    if frame_count <= 0:
+        frame_count = count_frames(video_path)
+        if verbose:
+            print(f"[AVISO] O container não informa o número de frames; contados {frame_count}.")
+
+    detector = Detector()
+    cup_area = tuple(cup_area) if cup_area else tuple(int(v) for v in default_cup_area(first_frame))
+    home = np.array(detector.detect_cups_in_area(first_frame, cup_area), dtype=np.float64)
+    # Bola deve ser menor que um copo (mesmo limite de TrackingSession.start)
+    max_ball_area = float(np.mean(home[:, 2] * home[:, 3])) * 1.2
+
+    detections = detection_pass(video_path, frame_count, cup_area, max_ball_area, processes)
+    cups, tracked, relabels = link_cups(video_path, detections, home, tracker_type)
+    cups = smooth_tracks(cups, breaks=relabels)
+    ball, bridged = bridge_ball_gaps(detections["ball"], cups)
+    target, hidden, ball, tracking, corrected = resolve_ownership(cups, ball, home, events,
+                                                                  detections["frame_index"])
+    if verbose:
+        n = len(cups)
+        print(f"[INFO] Duas passadas: {n} frames, {tracked} rastreados ({tracked / max(1, n):.0%}), "
+              f"{bridged} com a bola interpolada, "
+              f"{corrected} frames com alvo corrigido pela passada para trás.")
+
+    arrays = {
+        "frame_index": detections["frame_index"],
+        "cups": np.rint(cups).astype(np.int32),
+        "ball": ball,
+        "target": target,
+        "hidden": hidden,
+        "tracking": tracking,
+    }
+    return TrackLog.from_arrays(arrays)
@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from core.session import TrackingSession
+
+class MultiRegionPipeline:
+    """
+    Uma TrackingSession independente (detector, rastreadores e analyzer) por região,
+    executadas em um pool de threads compartilhado. As funções do OpenCV liberam o GIL,
+    então as regiões de um mesmo frame são processadas em paralelo.
+    """
+    def __init__(self, num_regions, workers=None, tracker_type='CSRT', adaptive_detection=True):
+        """
+        Args:
+            num_regions (int): Número de regiões (uma sessão por região).
+            workers (int): Threads do pool. Se None, uma por região.
+        """
+        self.sessions = [TrackingSession(tracker_type=tracker_type, verbose=False,
+                                         adaptive_detection=adaptive_detection)
+                         for _ in range(num_regions)]
+        self.active = [False] * num_regions
+        self.executor = ThreadPoolExecutor(max_workers=workers or num_regions,
+                                           thread_name_prefix="RegionWorker")
+
+    def _configure_one(self, i, view):
+        from core.calibration import find_cup_region
+        area = find_cup_region(view)
+        if area is None:
+            return False
+        session = self.sessions[i]
+        session.stop()
+        session.start(view, session.detector.detect_cups_in_area(view, area))
+        return True
+
+    def configure(self, views):
+        """
+        Calibra automaticamente as regiões ainda inativas (copos detectados na view).
+
+        Returns:
+            int: Número de regiões ativas.
+        """
+        pending = [i for i, active in enumerate(self.active) if not active]
+        results = self.executor.map(lambda i: self._configure_one(i, views[i]), pending)
+        for i, ok in zip(pending, results):
+            self.active[i] = ok
+        return sum(self.active)
+
+    def reset(self):
+        """Descarta os rastreadores de todas as regiões (reconfiguração no próximo configure)."""
+        for session in self.sessions:
+            session.stop()
+        self.active = [False] * len(self.sessions)
+
+    def process(self, views, frame_index=None, timestamp=None):
+        """
+        Processa as views de um frame em paralelo.
+
+        Returns:
+            list: TrackingState por região (None para regiões inativas).
+        """
+        futures = [self.executor.submit(session.process, view, frame_index, timestamp) if active else None
+                   for session, view, active in zip(self.sessions, views, self.active)]
+        return [f.result() if f is not None else None for f in futures]
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        for session in self.sessions:
+            session.stop()
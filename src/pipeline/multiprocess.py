@@ -0,0 +1,245 @@
+import multiprocessing as mp
+import queue
+import time
+
+from pipeline.shared_ring import SharedFrameRing
+
+def capture_worker(source_kind, source_args, source_kwargs, slots, lossless, info_queue, done_event, stop_event):
+    """
+    Processo de captura: lê frames da fonte e os publica no ring compartilhado.
+    Em modo lossless, espera o leitor em vez de sobrescrever frames não processados.
+
+    O ring é criado a partir do primeiro frame (formato) e só é removido quando
+    stop_event é sinalizado, para que os leitores possam anexar com segurança.
+    """
+    from input.registry import create_source
+    from utils.buffer_pool import FramePool
+
+    # Cada frame é copiado para o ring logo após a leitura: um pool pequeno basta
+    source_kwargs = dict(source_kwargs)
+    source_kwargs.setdefault("pool", FramePool(size=2))
+    source = create_source(source_kind, *source_args, **source_kwargs)
+    captured = source.read()
+    if captured is None:
+        print("[ERRO] Fonte de vídeo não entregou nenhum frame.")
+        info_queue.put(None)
+        source.release()
+        return
+
+    ring = SharedFrameRing(captured.image.shape, slots=slots)
+    info_queue.put((ring.name, captured.image.shape, source.fps))
+
+    try:
+        while captured is not None and not stop_event.is_set():
+            if captured.image.shape != ring.shape:
+                print(f"[WARN] Frame com formato {captured.image.shape} ignorado (esperado {ring.shape}).")
+            else:
+                ring.write(captured.image, captured.index, captured.timestamp,
+                           block=lossless, should_stop=stop_event.is_set)
+            captured = source.read()
+    finally:
+        source.release()
+        done_event.set()
+        stop_event.wait()
+        ring.close()
+
+def analysis_worker(ring_name, shape, slots, tracker_type, lossless, events_config, command_queue, result_queue, stop_event,
+                    adaptive_detection=True):
+    """
+    Processo de análise: detecção e rastreamento sobre views sem cópia do ring.
+    Ao vivo processa sempre o frame mais novo; em modo lossless processa todos em ordem.
+
+    Recebe comandos pequenos ('start' com o frame de configuração e as bboxes dos copos,
+    'reset') e publica apenas o estado resultante de cada frame em result_queue.
+    Se events_config (jsonl_path, socket_path) tiver algum destino, os eventos de jogo
+    são publicados por este processo.
+    """
+    from core.session import TrackingSession
+    from core.events import create_event_bus
+
+    ring = SharedFrameRing(shape, slots=slots, name=ring_name, create=False)
+    bus, sinks = create_event_bus(*events_config) if any(events_config) else (None, [])
+    session = None
+    last_seq = -1
+
+    try:
+        while not stop_event.is_set():
+            try:
+                command = command_queue.get_nowait()
+            except queue.Empty:
+                command = None
+
+            if command is not None:
+                if command[0] == "start":
+                    _, first_frame, cup_bboxes = command
+                    session = TrackingSession(tracker_type=tracker_type, events=bus,
+                                              adaptive_detection=adaptive_detection)
+                    session.start(first_frame, cup_bboxes)
+                    last_seq = ring.latest_seq
+                    # Frames anteriores à configuração não serão analisados: libera o escritor
+                    ring.mark_consumed(last_seq)
+                elif command[0] == "reset":
+                    session = None
+
+            if session is None:
+                time.sleep(0.005)
+                continue
+
+            if lossless:
+                seq = last_seq + 1
+                captured = ring.read(seq) if seq <= ring.latest_seq else None
+            else:
+                # Ao vivo processamos sempre o frame mais novo (frames antigos são descartados)
+                seq, captured = ring.read_latest()
+            if captured is None or seq <= last_seq:
+                time.sleep(0.001)
+                continue
+            last_seq = seq
+
+            state = session.process(captured.image, captured.index, captured.timestamp)
+            if not ring.is_valid(seq):
+                # O escritor sobrescreveu o slot durante o processamento: resultado não confiável
+                print("[WARN] Frame sobrescrito durante a análise. Aumente o número de slots do ring.")
+                continue
+            ring.mark_consumed(seq)
+
+            message = (seq, captured.index, captured.timestamp, tuple(state))
+            try:
+                result_queue.put_nowait(message)
+            except queue.Full:
+                pass
+    finally:
+        ring.close()
+        if bus is not None:
+            bus.close()
+            for sink in sinks:
+                sink.close()
+
+class MultiprocessPipeline:
+    """
+    Pipeline em dois processos: captura -> ring em memória compartilhada -> análise.
+
+    O processo chamador (exibição) lê frames do ring e recebe apenas mensagens de estado,
+    sem serializar frames completos no regime permanente.
+    """
+    def __init__(self, source_kind, *source_args, slots=8, tracker_type='CSRT', lossless=None,
+                 events_jsonl=None, events_socket=None, adaptive_detection=True, **source_kwargs):
+        """
+        Args:
+            source_kind (str): Nome da fonte em input.registry.SOURCES.
+            *source_args, **source_kwargs: Repassados ao construtor da fonte.
+            slots (int): Número de slots do ring compartilhado.
+            tracker_type (str): Tipo de rastreador usado no processo de análise.
+            lossless (bool): Processar todos os frames (captura espera a análise).
+                             Se None, usa True para arquivos e False para fontes ao vivo.
+            events_jsonl (str): Arquivo JSONL para os eventos de jogo (opcional).
+            events_socket (str): Socket Unix para os eventos de jogo (opcional).
+            adaptive_detection (bool): Repassado à TrackingSession do processo de análise.
+        """
+        self.source_kind = source_kind
+        self.source_args = source_args
+        self.source_kwargs = source_kwargs
+        self.slots = slots
+        self.tracker_type = tracker_type
+        self.lossless = (source_kind == "file") if lossless is None else lossless
+        self.events_config = (events_jsonl, events_socket)
+        self.adaptive_detection = adaptive_detection
+
+        self.ring = None
+        self.fps = None
+        self._ctx = mp.get_context("spawn")
+        self._stop = self._ctx.Event()
+        self._capture_done = self._ctx.Event()
+        self._commands = self._ctx.Queue()
+        self._results = self._ctx.Queue(maxsize=64)
+        self._capture = None
+        self._analysis = None
+
+    def start(self, timeout=10.0):
+        """
+        Inicia os processos e anexa o ring no processo atual.
+
+        Returns:
+            bool: False se a captura falhou antes do primeiro frame.
+        """
+        info_queue = self._ctx.Queue()
+        self._capture = self._ctx.Process(
+            target=capture_worker,
+            args=(self.source_kind, self.source_args, self.source_kwargs, self.slots, self.lossless,
+                  info_queue, self._capture_done, self._stop),
+            daemon=True,
+        )
+        self._capture.start()
+
+        try:
+            info = info_queue.get(timeout=timeout)
+        except queue.Empty:
+            info = None
+        if info is None:
+            self.stop()
+            return False
+
+        ring_name, shape, self.fps = info
+        self.ring = SharedFrameRing(shape, slots=self.slots, name=ring_name, create=False)
+
+        self._analysis = self._ctx.Process(
+            target=analysis_worker,
+            args=(ring_name, shape, self.slots, self.tracker_type, self.lossless, self.events_config,
+                  self._commands, self._results, self._stop, self.adaptive_detection),
+            daemon=True,
+        )
+        self._analysis.start()
+        return True
+
+    @property
+    def capture_alive(self):
+        """True enquanto a fonte ainda está entregando frames."""
+        return not self._capture_done.is_set()
+
+    @property
+    def finished(self):
+        """True quando a fonte acabou e todo frame publicado já foi consumido."""
+        return not self.capture_alive and self.ring.consumed_seq >= self.ring.latest_seq
+
+    def begin_tracking(self, first_frame, cup_bboxes):
+        """Envia a configuração inicial (uma única vez por rodada de configuração)."""
+        self._commands.put(("start", first_frame, list(cup_bboxes)))
+
+    def reset(self):
+        """Interrompe o rastreamento até a próxima chamada de begin_tracking."""
+        self._commands.put(("reset",))
+        # Descarta estados antigos ainda na fila
+        while self.poll(timeout=0) is not None:
+            pass
+
+    def poll(self, timeout=0):
+        """
+        Retorna a próxima mensagem de estado (seq, index, timestamp, state) ou None.
+        """
+        try:
+            if timeout:
+                return self._results.get(timeout=timeout)
+            return self._results.get_nowait()
+        except queue.Empty:
+            return None
+
+    def poll_latest(self):
+        """Esvazia a fila e retorna apenas a mensagem de estado mais recente (ou None)."""
+        latest = None
+        while True:
+            message = self.poll()
+            if message is None:
+                return latest
+            latest = message
+
+    def stop(self):
+        """Encerra os processos e libera o ring."""
+        self._stop.set()
+        for process in (self._analysis, self._capture):
+            if process is not None:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
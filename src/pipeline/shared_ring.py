@@ -0,0 +1,205 @@
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from input.video_source import VideoSource, CapturedFrame
+
+class SharedFrameRing:
+    """
+    Ring buffer de frames em memória compartilhada (multiprocessing.shared_memory).
+
+    Um único processo escritor publica frames em slots circulares; leitores em outros
+    processos obtêm views NumPy sem cópia. Cada slot guarda um número de sequência
+    que permite ao leitor detectar se o frame foi sobrescrito enquanto era usado.
+
+    Para fontes que não podem perder frames (arquivos), o escritor pode esperar o
+    leitor: o leitor registra o progresso com mark_consumed() e write(block=True)
+    não ultrapassa o ring.
+
+    Layout: [cabeçalho int64: última seq publicada, última seq consumida]
+            [seq por slot (int64)] [índice por slot (int64)] [timestamp por slot (float64)]
+            [dados dos frames: slots x altura x largura x canais (uint8)]
+    """
+    def __init__(self, shape, slots=8, name=None, create=True):
+        """
+        Args:
+            shape (tuple): Formato dos frames (altura, largura, canais).
+            slots (int): Número de slots do ring. Deve cobrir a latência do leitor mais lento.
+            name (str): Nome do segmento compartilhado. Obrigatório para anexar (create=False).
+            create (bool): True no processo escritor (cria o segmento), False nos leitores.
+        """
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.frame_bytes = int(np.prod(self.shape))
+        self._meta_bytes = 8 * (2 + 3 * slots)
+        size = self._meta_bytes + self.frame_bytes * slots
+
+        self.owner = create
+        if create:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            # Os processos do pipeline compartilham o resource_tracker do processo pai,
+            # então só o dono (create=True) remove o segmento com unlink().
+            self.shm = shared_memory.SharedMemory(name=name)
+
+        buf = self.shm.buf
+        self._latest = np.ndarray((1,), dtype=np.int64, buffer=buf, offset=0)
+        self._consumed = np.ndarray((1,), dtype=np.int64, buffer=buf, offset=8)
+        self._seqs = np.ndarray((slots,), dtype=np.int64, buffer=buf, offset=16)
+        self._indices = np.ndarray((slots,), dtype=np.int64, buffer=buf, offset=16 + 8 * slots)
+        self._timestamps = np.ndarray((slots,), dtype=np.float64, buffer=buf, offset=16 + 16 * slots)
+        self._frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=buf, offset=self._meta_bytes)
+
+        if create:
+            self._latest[0] = -1
+            self._consumed[0] = -1
+            self._seqs[:] = -1
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def latest_seq(self):
+        """Sequência do último frame publicado (-1 se nenhum)."""
+        return int(self._latest[0])
+
+    def mark_consumed(self, seq):
+        """Registra que o leitor terminou de usar os frames até 'seq'."""
+        if seq > self._consumed[0]:
+            self._consumed[0] = seq
+
+    def write(self, image, index, timestamp, block=False, should_stop=None):
+        """
+        Publica um frame no próximo slot. Apenas um processo pode escrever.
+
+        Args:
+            image: Frame BGR com o formato do ring.
+            index (int): Índice do frame na fonte.
+            timestamp (float): Instante de captura (time.monotonic()).
+            block (bool): Se True, espera o leitor liberar espaço (nenhum frame é perdido).
+            should_stop (callable): Opcional. Interrompe a espera quando retornar True.
+
+        Returns:
+            int: Número de sequência atribuído ao frame, ou -1 se a espera foi interrompida.
+        """
+        seq = int(self._latest[0]) + 1
+        if block:
+            # Mantém um slot livre entre o escritor e o frame em uso pelo leitor
+            while seq - self._consumed[0] >= self.slots - 1:
+                if should_stop is not None and should_stop():
+                    return -1
+                time.sleep(0.001)
+        slot = seq % self.slots
+        # Marca o slot como "em escrita" antes de copiar os pixels
+        self._seqs[slot] = -1
+        np.copyto(self._frames[slot], image)
+        self._indices[slot] = index
+        self._timestamps[slot] = timestamp
+        self._seqs[slot] = seq
+        self._latest[0] = seq
+        return seq
+
+    def read(self, seq):
+        """
+        Retorna o frame de sequência 'seq' como view sem cópia.
+
+        A view não protege contra o escritor: quem a usa deve copiar (ou processar) os
+        pixels e só então conferir is_valid(seq); se o slot foi sobrescrito nesse meio
+        tempo, o resultado deve ser descartado.
+
+        Returns:
+            CapturedFrame: (image, index, timestamp) ou None se o frame já foi sobrescrito.
+        """
+        if seq < 0:
+            return None
+        slot = seq % self.slots
+        if self._seqs[slot] != seq:
+            return None
+        return CapturedFrame(self._frames[slot], int(self._indices[slot]), float(self._timestamps[slot]))
+
+    def read_latest(self):
+        """
+        Retorna (seq, CapturedFrame) do frame mais recente, ou (-1, None) se não houver.
+        """
+        seq = self.latest_seq
+        return seq, self.read(seq)
+
+    @property
+    def consumed_seq(self):
+        """Última sequência registrada pelo leitor com mark_consumed() (-1 se nenhuma)."""
+        return int(self._consumed[0])
+
+    def is_valid(self, seq):
+        """True se o slot de 'seq' ainda contém esse frame."""
+        return seq >= 0 and self._seqs[seq % self.slots] == seq
+
+    def close(self):
+        """Desanexa o segmento; o processo dono também o remove do sistema."""
+        # Views NumPy precisam ser liberadas antes de fechar o buffer
+        self._latest = self._consumed = self._seqs = self._indices = self._timestamps = self._frames = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+class RingVideoSource(VideoSource):
+    """
+    Fonte de vídeo que lê os frames publicados em um SharedFrameRing.
+    Permite que o processo de exibição use o mesmo fluxo de preview/configuração
+    de uma fonte comum, sem capturar a tela novamente.
+    """
+    def __init__(self, ring, fps=30.0, timeout=2.0, is_alive=None):
+        """
+        Args:
+            ring (SharedFrameRing): Ring já anexado.
+            fps (float): Taxa nominal reportada.
+            timeout (float): Tempo máximo (s) esperando um frame novo antes de retornar None.
+            is_alive (callable): Opcional. Retorna False quando o escritor terminou.
+        """
+        self.ring = ring
+        self._fps = fps
+        self.timeout = timeout
+        self.is_alive = is_alive
+        self.last_seq = -1
+
+    def read_next(self):
+        """
+        Espera um frame mais novo que o último lido.
+
+        Returns:
+            tuple: (seq, CapturedFrame) ou (-1, None) se o escritor parou.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            seq, captured = self.ring.read_latest()
+            if captured is not None and seq > self.last_seq:
+                self.last_seq = seq
+                self.ring.mark_consumed(seq)
+                self.frame_index = captured.index
+                self.last_timestamp = captured.timestamp
+                return seq, captured
+            if time.monotonic() > deadline or (self.is_alive is not None and not self.is_alive()):
+                return -1, None
+            time.sleep(0.001)
+
+    def get_frame(self):
+        while True:
+            seq, captured = self.read_next()
+            if captured is None:
+                return None
+            # Cópia: o frame é usado pela UI por tempo indeterminado (ex: selectROI).
+            # Validada depois da cópia: se o escritor sobrescreveu o slot, lê o próximo.
+            image = captured.image.copy()
+            if self.ring.is_valid(seq):
+                return image
+
+    def release(self):
+        self.ring.close()
+
+    @property
+    def fps(self):
+        return self._fps
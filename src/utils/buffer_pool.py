@@ -0,0 +1,59 @@
+import numpy as np
+
+class FramePool:
+    """
+    Pool rotativo de buffers de frame pré-alocados.
+
+    acquire() devolve o próximo buffer da rotação, realocando apenas se o formato
+    mudar. Um buffer continua válido até ser devolvido de novo, ou seja, por
+    'size - 1' chamadas seguintes de acquire(). Quem precisar guardar um frame
+    por mais tempo deve copiá-lo.
+    """
+    def __init__(self, size=3):
+        """
+        Args:
+            size (int): Número de buffers em rotação (mínimo 1).
+        """
+        self.size = max(1, size)
+        self._buffers = [None] * self.size
+        self._next = 0
+        self.allocations = 0 # Quantas vezes um buffer precisou ser (re)alocado
+
+    def acquire(self, shape, dtype=np.uint8):
+        """
+        Returns:
+            numpy.ndarray: Buffer com o formato pedido (conteúdo indefinido).
+        """
+        shape = tuple(shape)
+        buf = self._buffers[self._next]
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = np.empty(shape, dtype=dtype)
+            self._buffers[self._next] = buf
+            self.allocations += 1
+        self._next = (self._next + 1) % self.size
+        return buf
+
+class ScratchBuffers:
+    """
+    Arrays de trabalho nomeados, reutilizados entre chamadas.
+
+    Usado por etapas que precisam de imagens intermediárias (HSV, máscaras...)
+    que não saem da função: cada nome tem um único buffer, realocado só quando
+    o formato muda.
+    """
+    def __init__(self):
+        self._buffers = {}
+        self.allocations = 0
+
+    def get(self, name, shape, dtype=np.uint8):
+        """
+        Returns:
+            numpy.ndarray: Buffer 'name' com o formato pedido (conteúdo indefinido).
+        """
+        shape = tuple(shape)
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = np.empty(shape, dtype=dtype)
+            self._buffers[name] = buf
+            self.allocations += 1
+        return buf
@@ -0,0 +1,132 @@
+import time
+from collections import deque
+
+# Limites (ms) dos buckets do histograma de latência. O último bucket é aberto.
+HISTOGRAM_EDGES_MS = (1, 2, 5, 10, 20, 33, 50, 100, 200, 500, 1000)
+# Amostras recentes guardadas para os percentis (memória limitada em sessões longas)
+MAX_SAMPLES = 10000
+
+class LatencyHistogram:
+    """
+    Histograma de latências com buckets fixos. Contagem, média e máximo cobrem todas as
+    amostras; os percentis usam as últimas 'max_samples' (anel de tamanho fixo).
+    """
+    def __init__(self, edges_ms=HISTOGRAM_EDGES_MS, max_samples=MAX_SAMPLES):
+        self.edges_ms = tuple(edges_ms)
+        self.counts = [0] * (len(self.edges_ms) + 1)
+        self.samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, seconds):
+        ms = seconds * 1000.0
+        self.samples.append(ms)
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        for i, edge in enumerate(self.edges_ms):
+            if ms < edge:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def percentile(self, p):
+        """Percentil p (0-100) em ms das amostras recentes, ou None sem amostras."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100.0))]
+
+    def summary(self):
+        """
+        Returns:
+            dict: count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms (vazio sem amostras).
+        """
+        if not self.count:
+            return {}
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+        }
+
+    def format(self, width=40):
+        """Texto com uma barra por bucket."""
+        lines = []
+        peak = max(self.counts) or 1
+        lower = 0
+        for i, count in enumerate(self.counts):
+            label = f"{lower:>5}-{self.edges_ms[i]:<5}ms" if i < len(self.edges_ms) else f"{lower:>5}+     ms"
+            bar = "#" * int(round(width * count / peak))
+            lines.append(f"  {label} {count:>6} {bar}")
+            if i < len(self.edges_ms):
+                lower = self.edges_ms[i]
+        return "\n".join(lines)
+
+class LatencyTracer:
+    """
+    Mede, por frame, a latência entre a captura e a decisão exibida.
+
+    Uso por frame:
+        tracer.begin(index, capture_timestamp)   # início do processamento
+        tracer.mark("cups")                      # fim de cada etapa
+        ...
+        tracer.end()                             # decisão pronta (ex: após desenhar)
+
+    Registra o atraso de fila (captura -> início do processamento), a duração
+    de cada etapa e a latência ponta a ponta (captura -> end()).
+    """
+    def __init__(self):
+        self.end_to_end = LatencyHistogram()
+        self.queueing = LatencyHistogram()
+        self.stages = {}
+        self.frames = 0
+        self.frame_index = None
+        self._capture_ts = None
+        self._last_mark = None
+
+    def begin(self, frame_index, capture_timestamp):
+        """Início do processamento do frame capturado em 'capture_timestamp'."""
+        now = time.monotonic()
+        self.frame_index = frame_index
+        self._capture_ts = capture_timestamp
+        self._last_mark = now
+        if capture_timestamp is not None:
+            self.queueing.add(max(0.0, now - capture_timestamp))
+
+    def mark(self, stage):
+        """Fim da etapa 'stage' (duração medida desde a marca anterior)."""
+        if self._last_mark is None:
+            return
+        now = time.monotonic()
+        self.stages.setdefault(stage, LatencyHistogram()).add(now - self._last_mark)
+        self._last_mark = now
+
+    def end(self):
+        """Decisão do frame concluída."""
+        if self._last_mark is None:
+            return
+        if self._capture_ts is not None:
+            self.end_to_end.add(max(0.0, time.monotonic() - self._capture_ts))
+        self.frames += 1
+        self._capture_ts = None
+        self._last_mark = None
+
+    def report(self):
+        """Relatório em texto: histograma ponta a ponta, fila e tempo por etapa."""
+        lines = [f"[LATÊNCIA] {self.frames} frames"]
+        for name, hist in (("captura->decisão", self.end_to_end), ("fila (captura->início)", self.queueing)):
+            s = hist.summary()
+            if not s:
+                continue
+            lines.append(f"{name}: média {s['mean_ms']:.1f} ms | p50 {s['p50_ms']:.1f} | "
+                         f"p95 {s['p95_ms']:.1f} | p99 {s['p99_ms']:.1f} | máx {s['max_ms']:.1f}")
+        lines.append(self.end_to_end.format())
+        for name, hist in self.stages.items():
+            s = hist.summary()
+            lines.append(f"  etapa {name:<14} média {s['mean_ms']:.2f} ms | p95 {s['p95_ms']:.2f} ms")
+        return "\n".join(lines)
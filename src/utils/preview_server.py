@@ -0,0 +1,211 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+BOUNDARY = "thimblesframe"
+# Tempo máximo (s) de uma escrita para um cliente antes de desconectá-lo
+SEND_TIMEOUT = 5.0
+
+INDEX_HTML = b"""<!doctype html>
+<html><head><title>Thimbles AI - Preview</title></head>
+<body style="margin:0;background:#111">
+<img src="/stream" style="display:block;margin:auto;max-width:100%">
+</body></html>
+"""
+
+class PreviewServer:
+    """
+    Servidor HTTP local que transmite o frame de exibição como MJPEG
+    (alternativa ao cv2.imshow em máquinas sem desktop).
+
+    O loop de rastreamento só chama submit(): sem clientes conectados ou antes do
+    intervalo mínimo entre frames, retorna sem fazer nada; caso contrário copia o frame
+    para um buffer fixo (o mais recente substitui o anterior). Redimensionamento e
+    codificação JPEG acontecem em uma thread separada.
+
+    Clientes travados (socket sem ler) são desconectados após 'send_timeout' segundos
+    numa escrita, para não manter a codificação ativa sem ninguém assistindo.
+
+    Endereços:
+        /        página com o stream
+        /stream  multipart/x-mixed-replace com os JPEGs
+        /frame.jpg  último frame
+    """
+    def __init__(self, port=8080, host="127.0.0.1", max_fps=10.0, max_width=960, quality=70,
+                 send_timeout=SEND_TIMEOUT):
+        self.max_fps = float(max_fps)
+        self.max_width = int(max_width)
+        self.quality = int(quality)
+
+        self.clients = 0
+        self.submitted = 0
+        self.skipped = 0
+        self.encoded = 0
+        self.dropped_clients = 0
+
+        self._pending = None       # buffer do último frame recebido (reutilizado)
+        self._has_pending = False
+        self._last_submit = 0.0
+        self._jpeg = None
+        self._jpeg_seq = 0
+        self._running = True
+        self._lock = threading.Lock()
+        self._new_frame = threading.Condition(self._lock)
+        self._new_jpeg = threading.Condition(threading.Lock())
+
+        server = self
+        class Handler(_PreviewHandler):
+            preview = server
+            timeout = send_timeout # Timeout do socket do cliente (StreamRequestHandler)
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self.address = self._httpd.server_address
+
+        self._encoder = threading.Thread(target=self._encode_loop, name="PreviewEncoder", daemon=True)
+        self._server = threading.Thread(target=self._httpd.serve_forever, name="PreviewServer", daemon=True)
+        self._encoder.start()
+        self._server.start()
+
+    @property
+    def url(self):
+        return f"http://{self.address[0]}:{self.address[1]}/"
+
+    def submit(self, frame):
+        """
+        Oferece um frame ao preview. Barato o suficiente para o loop de rastreamento:
+        no pior caso faz uma cópia para um buffer pré-alocado.
+
+        Returns:
+            bool: True se o frame foi aceito para codificação.
+        """
+        if not self.clients:
+            self.skipped += 1
+            return False
+        now = time.monotonic()
+        if now - self._last_submit < 1.0 / self.max_fps:
+            self.skipped += 1
+            return False
+        self._last_submit = now
+
+        with self._lock:
+            if self._pending is None or self._pending.shape != frame.shape:
+                self._pending = np.empty_like(frame)
+            np.copyto(self._pending, frame)
+            self._has_pending = True
+            self._new_frame.notify()
+        self.submitted += 1
+        return True
+
+    def _encode_loop(self):
+        scratch = None
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        while True:
+            with self._lock:
+                while self._running and not self._has_pending:
+                    self._new_frame.wait()
+                if not self._running:
+                    return
+                # Troca de buffers: o encoder fica com o frame, submit() reaproveita o antigo
+                self._pending, scratch = scratch, self._pending
+                self._has_pending = False
+
+            frame = scratch
+            width = frame.shape[1]
+            if width > self.max_width:
+                height = int(frame.shape[0] * self.max_width / width)
+                frame = cv2.resize(frame, (self.max_width, height), interpolation=cv2.INTER_AREA)
+            ok, jpeg = cv2.imencode(".jpg", frame, params)
+            if not ok:
+                continue
+            with self._new_jpeg:
+                self._jpeg = jpeg.tobytes()
+                self._jpeg_seq += 1
+                self.encoded += 1
+                self._new_jpeg.notify_all()
+
+    def wait_jpeg(self, last_seq, timeout=1.0):
+        """
+        Espera um JPEG mais novo que 'last_seq'.
+
+        Returns:
+            tuple: (seq, bytes) ou (last_seq, None) se não chegou nada / servidor parou.
+        """
+        with self._new_jpeg:
+            if self._jpeg_seq == last_seq and self._running:
+                self._new_jpeg.wait(timeout)
+            if self._jpeg_seq == last_seq or self._jpeg is None:
+                return last_seq, None
+            return self._jpeg_seq, self._jpeg
+
+    def _client_connected(self, delta):
+        with self._lock:
+            self.clients += delta
+
+    def close(self):
+        self._running = False
+        with self._lock:
+            self._new_frame.notify_all()
+        with self._new_jpeg:
+            self._new_jpeg.notify_all()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._encoder.join(timeout=1.0)
+
+class _PreviewHandler(BaseHTTPRequestHandler):
+    preview = None
+
+    def log_message(self, format, *args):
+        pass # Sem log por requisição no terminal do rastreamento
+
+    def do_GET(self):
+        if self.path == "/":
+            self._send(200, "text/html; charset=utf-8", INDEX_HTML)
+        elif self.path == "/frame.jpg":
+            self.preview._client_connected(1)
+            try:
+                _, jpeg = self.preview.wait_jpeg(0, timeout=2.0)
+            finally:
+                self.preview._client_connected(-1)
+            if jpeg is None:
+                self._send(503, "text/plain", b"sem frames")
+            else:
+                self._send(200, "image/jpeg", jpeg)
+        elif self.path == "/stream":
+            self._stream()
+        else:
+            self._send(404, "text/plain", b"not found")
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        preview = self.preview
+        preview._client_connected(1)
+        seq = 0
+        try:
+            while preview._running:
+                seq, jpeg = preview.wait_jpeg(seq)
+                if jpeg is None:
+                    continue
+                self.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                 f"Content-Length: {len(jpeg)}\r\n\r\n".encode("ascii"))
+                self.wfile.write(jpeg)
+                self.wfile.write(b"\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass # Cliente desconectou
+        except TimeoutError:
+            # Cliente travado: derruba a conexão para que deixe de contar como assistindo
+            preview.dropped_clients += 1
+        finally:
+            preview._client_connected(-1)
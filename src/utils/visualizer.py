@@ -1,8 +1,60 @@
+from functools import lru_cache
+
 import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+class TextSprite:
+    """
+    Texto pré-renderizado para ser composto no frame por ROI, em vez de rasterizar a
+    fonte com putText a cada frame. A cobertura em tons de cinza do putText vira um alfa:
+    a cor já multiplicada pelo alfa é somada à ROI escurecida por (1 - alfa), com duas
+    operações do OpenCV no lugar, preservando as bordas suavizadas.
+    """
+    def __init__(self, text, font_scale, color, thickness, font=FONT):
+        (w, h), baseline = cv2.getTextSize(text, font, font_scale, thickness)
+        pad = thickness + 1
+        size = (h + baseline + 2 * pad, w + 2 * pad)
+        self.offset = (pad, h + pad) # Posição da origem do texto (canto inferior esquerdo) no sprite
+        coverage = np.zeros(size, dtype=np.uint8)
+        cv2.putText(coverage, text, self.offset, font, font_scale, 255, thickness)
+        alpha = cv2.merge([coverage] * 3)
+        image = np.zeros(size + (3,), dtype=np.uint8)
+        image[:] = color
+        self.premultiplied = cv2.multiply(image, alpha, scale=1 / 255)
+        self.inverse_alpha = cv2.bitwise_not(alpha)
+
+    def draw(self, frame, org):
+        """Cola o sprite com a origem do texto em 'org' (como em putText), recortando nas bordas."""
+        x0, y0 = org[0] - self.offset[0], org[1] - self.offset[1]
+        sh, sw = self.inverse_alpha.shape[:2]
+        fh, fw = frame.shape[:2]
+        fx0, fy0 = max(0, x0), max(0, y0)
+        fx1, fy1 = min(fw, x0 + sw), min(fh, y0 + sh)
+        if fx0 >= fx1 or fy0 >= fy1:
+            return frame
+        sx0, sy0 = fx0 - x0, fy0 - y0
+        sx1, sy1 = sx0 + (fx1 - fx0), sy0 + (fy1 - fy0)
+        roi = frame[fy0:fy1, fx0:fx1]
+        cv2.multiply(roi, self.inverse_alpha[sy0:sy1, sx0:sx1], dst=roi, scale=1 / 255)
+        cv2.add(roi, self.premultiplied[sy0:sy1, sx0:sx1], dst=roi)
+        return frame
+
+@lru_cache(maxsize=256)
+def text_sprite(text, font_scale, color, thickness):
+    """TextSprite em cache: cada combinação de texto/estilo é rasterizada uma única vez."""
+    return TextSprite(text, font_scale, tuple(color), thickness)
+
+def draw_text(frame, text, org, font_scale, color, thickness):
+    """Substituto de cv2.putText (FONT_HERSHEY_SIMPLEX) usando sprites em cache."""
+    return text_sprite(text, font_scale, tuple(color), thickness).draw(frame, org)
 
 class Visualizer:
     """
     Responsável por desenhar informações visuais no frame.
+    Os textos (rótulos e status) vêm de sprites pré-renderizados por estado: a cada
+    frame só são desenhados os retângulos e coladas algumas ROIs pequenas.
     """
     
     @staticmethod
@@ -28,7 +80,7 @@ class Visualizer:
                     label = f"BOLA AQUI"
                     
                     cv2.rectangle(frame, (x, y), (x+w, y+h), color, thickness)
-                    cv2.putText(frame, label, (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 3)
+                    draw_text(frame, label, (x, y-10), 0.8, color, 3)
                     
                     # Desenhar "Ghost Ball" se a bola estiver escondida para confirmar visualmente
                     if is_ball_hidden:
@@ -44,10 +96,23 @@ class Visualizer:
             x, y, w, h = map(int, ball_bbox)
             # Box Magenta para destacar bem a bola detectada
             cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 255), 3) 
-            cv2.putText(frame, "BOLA DETECTADA", (x, y-15), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 255), 2)
+            draw_text(frame, "BOLA DETECTADA", (x, y-15), 0.6, (255, 0, 255), 2)
         
         # Info na tela
         status = "Bola: ESCONDIDA" if is_ball_hidden else "Bola: VISIVEL"
-        cv2.putText(frame, f"Status: {status}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        draw_text(frame, f"Status: {status}", (10, 30), 0.7, (255, 255, 255), 2)
+
+        return frame
 
+    @staticmethod
+    def draw_status(frame, tracking_ball, waiting_ball):
+        """
+        Overlay de status do rastreamento (aguardando bola / em jogo), no rodapé do frame.
+        """
+        if waiting_ball:
+            # Mensagem mais clara para o usuário
+            draw_text(frame, "JOGUE PARA REVELAR A BOLA", (10, 100), 0.7, (0, 0, 255), 2)
+        status_color = (0, 255, 0) if tracking_ball else (0, 255, 255)
+        status_text = "EM JOGO" if tracking_ball else "AGUARDANDO BOLA"
+        draw_text(frame, f"STATUS: {status_text}", (10, frame.shape[0]-20), 0.6, status_color, 2)
         return frame
@@ -0,0 +1,65 @@
+import re
+import shutil
+import subprocess
+
+# Backend X11 baseado no utilitário 'xwininfo' (pacote x11-utils).
+# Funciona em qualquer servidor X, inclusive Xvfb em nós de análise sem monitor.
+
+# Linha típica de 'xwininfo -root -tree':
+#   0x2a00003 "Thimbles - Chrome": ("chrome" "Chrome")  1280x720+0+0  +100+50
+# Geometria: LxA+x_rel+y_rel seguida da posição absoluta +x_abs+y_abs.
+_TREE_LINE = re.compile(
+    r'^\s*0x[0-9a-fA-F]+\s+"(?P<title>.*)":.*?'
+    r'(?P<w>\d+)x(?P<h>\d+)[+-]-?\d+[+-]-?\d+\s+\+(?P<x>-?\d+)\+(?P<y>-?\d+)\s*$'
+)
+
+def parse_xwininfo_tree(output):
+    """
+    Extrai as janelas nomeadas da saída de 'xwininfo -root -tree'.
+
+    Returns:
+        list: Lista de tuplas (title, (x, y, w, h)) em coordenadas absolutas da tela.
+    """
+    windows = []
+    for line in output.splitlines():
+        match = _TREE_LINE.match(line)
+        if not match:
+            continue
+        rect = tuple(int(match.group(k)) for k in ("x", "y", "w", "h"))
+        windows.append((match.group("title"), rect))
+    return windows
+
+def get_window_rect(title_keyword):
+    """
+    Busca uma janela que contenha 'title_keyword' no título e retorna suas coordenadas.
+
+    Returns:
+        tuple: (x, y, w, h) ou None se não encontrar.
+    """
+    if shutil.which("xwininfo") is None:
+        print("[ERRO] 'xwininfo' não encontrado. Instale o pacote x11-utils.")
+        return None
+
+    try:
+        result = subprocess.run(["xwininfo", "-root", "-tree"],
+                                capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print(f"[ERRO] Falha ao consultar janelas do X11: {e}")
+        return None
+
+    if result.returncode != 0:
+        print(f"[ERRO] xwininfo falhou: {result.stderr.strip()}")
+        return None
+
+    # A árvore lista as janelas de cima para baixo; a maior correspondência
+    # costuma ser a janela de nível superior (e não um filho decorativo).
+    best = None
+    for title, rect in parse_xwininfo_tree(result.stdout):
+        if title_keyword.lower() not in title.lower():
+            continue
+        x, y, w, h = rect
+        if w <= 1 or h <= 1:
+            continue
+        if best is None or w * h > best[2] * best[3]:
+            best = rect
+    return best